@@ -0,0 +1,60 @@
+"""
+Memory taken by an idle actor and by a queued message, without starting an actor system:
+
+    PYTHONPATH=. python benchmarks/memory.py [count]
+"""
+import gc
+import sys
+import tracemalloc
+
+import stardust
+from stardust.actor.atom import Atom
+from stardust.actor.mailbox import create_mailbox
+from stardust.actor.system_events import MessageEvent, StartupEvent
+
+
+class Idle(stardust.Actor):
+    def receive(self, message, sender):
+        yield self.send(sender, message)
+
+
+def measure(create, count: int) -> float:
+    """
+    :return: Bytes allocated per object that 'create' returns, and that are still alive.
+    """
+    gc.collect()
+    tracemalloc.start()
+
+    objects = [create(idx) for idx in range(count)]
+    allocated = tracemalloc.get_traced_memory()[0]
+
+    tracemalloc.stop()
+    del objects
+
+    # The list of objects itself is not counted
+    return (allocated - 8 * count - 56) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    system_ref = stardust.ActorRef('System')
+    target = Idle('target', system_ref)
+    mailbox = create_mailbox(actor=target)
+
+    def create_atom(idx: int) -> Atom:
+        actor = Idle(f'actor-{idx}', system_ref)
+        return Atom(actor=actor, mailbox=create_mailbox(actor=actor, initial_mailbox=[StartupEvent(sender=system_ref)]))
+
+    def create_message(idx: int) -> MessageEvent:
+        event = MessageEvent(sender=system_ref, target=target.ref, message='payload')
+        mailbox.enqueue(event)
+
+        return event
+
+    print(f'actor:   {measure(create_atom, count):8.1f} bytes (actor, atom, mailbox and a queued startup event)')
+    print(f'message: {measure(create_message, count):8.1f} bytes (event and its mailbox slot, message excluded)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Bytes that a message takes on the wire between processes, pickled as a whole and encoded by the binary codec,
+and time it takes to encode and decode it:
+
+    PYTHONPATH=. python benchmarks/wire.py
+"""
+import pickle
+import timeit
+import uuid
+
+from stardust.actor.actor_ref import ActorRef
+from stardust.actor.address import AddressAllocator
+from stardust.actor.codec import BinaryCodec
+from stardust.actor.system_events import MessageEvent, MessageBatchEvent
+
+
+PAYLOADS = {
+    "'ping'": 'ping',
+    '42': 42,
+    "(1, 'a', 2.0)": (1, 'a', 2.0),
+    'bytes(1024)': bytes(1024),
+}
+
+
+def path_refs():
+    system = f'System-{uuid.uuid1()}'
+    ping = f'{system}/Ping-{uuid.uuid1()}'
+
+    return ActorRef(ping), ActorRef(f'{ping}/Pong-{uuid.uuid1()}')
+
+
+def numeric_refs():
+    allocator = AddressAllocator(allocator_idx=1)
+
+    return ActorRef(allocator.allocate(0)), ActorRef(allocator.allocate(1))
+
+
+def measure(event, number: int = 20000):
+    """
+    :return: Bytes of the event pickled, encoded by the codec (after its addresses were sent once),
+        and microseconds to pickle and unpickle it, and to encode and decode it.
+    """
+    writer, reader = BinaryCodec(), BinaryCodec()
+
+    # Addresses are defined by the first frame of a connection
+    reader.decode(writer.encode(event))
+
+    pickled = len(pickle.dumps(event))
+    encoded = len(writer.encode(event))
+
+    pickle_time = timeit.timeit(lambda: pickle.loads(pickle.dumps(event)), number=number) / number * 1e6
+    codec_time = timeit.timeit(lambda: reader.decode(writer.encode(event)), number=number) / number * 1e6
+
+    return pickled, encoded, pickle_time, codec_time
+
+
+def report(addressing: str, name: str, values):
+    print(f'{addressing:<10}{name:<16}' + ''.join(f'{value:>12.1f}' for value in values))
+
+
+def main():
+    print(f"{'addresses':<10}{'message':<16}{'pickle, B':>12}{'binary, B':>12}{'pickle, us':>12}{'binary, us':>12}")
+
+    for addressing, refs in (('path', path_refs), ('numeric', numeric_refs)):
+        sender, target = refs()
+
+        for name, payload in PAYLOADS.items():
+            report(addressing, name, measure(MessageEvent(sender=sender, target=target, message=payload)))
+
+        # Per message of a batch
+        events = [MessageEvent(sender=sender, target=target, message='ping') for _ in range(64)]
+        report(addressing, "64 x 'ping'", [value / 64 for value in measure(MessageBatchEvent(events), number=1000)])
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,6 @@
 from stardust import actor
-from .actor import Actor, ActorRef, ActorSystem
-from .actor.system_messages import PoisonPillMessage, StartupMessage
-from .actor.config import SystemConfig
+from .actor import Actor, ActorRef, RouterRef, ActorSystem
+from .actor.system_messages import PoisonPillMessage, StartupMessage, MailboxOverflowMessage
+from .actor.config import SystemConfig, MailboxConfig
+from .actor.actor_events import AskTimeout
+from .actor.codec import register_serializer
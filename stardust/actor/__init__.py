@@ -1,3 +1,4 @@
 from .actor import Actor
 from .actor_ref import ActorRef
+from .router import RouterRef
 from .actor_system import ActorSystem
@@ -1,10 +1,11 @@
-import uuid
-
 from .actor_ref import ActorRef
-from typing import Callable, Any, Generator, Union, Type, Optional
+from .address import Address
+from .config import MailboxConfig, DEFAULT_DISPATCHER
+from typing import Callable, Any, Generator, Union, Type, Optional, Sequence
 from .actor_events import (
     ActorEvent, SendEvent, AskEvent, ResponseEvent,
-    SpawnEvent, KillEvent,
+    SpawnEvent, SpawnManyEvent, KillEvent,
+    SubscribeEvent, UnsubscribeEvent, PublishEvent,
     StashEvent, UnstashEvent
 )
 from abc import ABC
@@ -15,16 +16,27 @@ class Actor(ABC):
 
     """
 
-    def __init__(self, address: str, parent: ActorRef, *args, **kwargs):
-        self.__address: str = address
+    # Subclasses get a __dict__ as usual, attributes of the base class take no room in it
+    __slots__ = ('__address', '__ref', '__parent', '__context', '__behavior', '__previous_behavior')
+
+    # Mailbox capacity and overflow policy of every actor of this class, unless overridden at spawn
+    mailbox_config: Optional[MailboxConfig] = None
+
+    # 'blocking' runs actors of this class on the executor's thread pool (see SystemConfig.blocking_pool_size)
+    dispatcher: str = DEFAULT_DISPATCHER
+
+    def __init__(self, address: Address, parent: ActorRef, *args, **kwargs):
+        self.__address: Address = address
         self.__ref: ActorRef = ActorRef(address)
         self.__parent: ActorRef = parent
         self.__context: int = hash(self.__address)  # I don't care right now
-        self.__behavior: Union[Callable[[Actor, Any, ActorRef], None], Generator[ActorEvent, Any, Any]] = self.receive
+
+        # None stands for 'receive', so that idle actors do not hold a bound method each
+        self.__behavior: Optional[Callable[[Any, ActorRef], Any]] = None
         self.__previous_behavior = None
 
     @property
-    def address(self) -> str:
+    def address(self) -> Address:
         """
         :return: An address of current actor in the actor system.
         """
@@ -57,14 +69,26 @@ class Actor(ABC):
 
     @property
     def behavior(self) -> Union[Callable[['Actor', Any, ActorRef], None], Generator[ActorEvent, Any, Any]]:
-        return self.__behavior
+        return self.__behavior or self.receive
 
     def next_context(self):
         self.__context += 1
 
     def receive(self, message: Any, sender: ActorRef):
+        """
+        Processes a message, yielding actor events: 'yield self.send(ref, message)'.
+        May also be 'async def', to await I/O on the executor's event loop: other actors of the executor keep running
+        meanwhile, while the actor gets its next message only once it is done with the current one.
+        """
         raise NotImplementedError()
 
+    def message_priority(self, message: Any) -> int:
+        """
+        Classifies messages for a priority mailbox (see MailboxConfig.priority). Lower values are dequeued first.
+        :return: A 'priority' attribute of a message, or 0.
+        """
+        return getattr(message, 'priority', 0)
+
     def send(self, target: ActorRef, message: Any) -> SendEvent:
         return SendEvent(
             target=target,
@@ -72,32 +96,113 @@ class Actor(ABC):
             message=message
         )
 
-    def ask(self, target: ActorRef, message: Any) -> AskEvent:
-        return AskEvent(
+    def ask(self, target: ActorRef, message: Any, timeout: Optional[float] = None) -> AskEvent:
+        """
+        Sends a message and suspends the actor until the target responds: 'response = yield self.ask(ref, message)'.
+        The actor does not process other messages meanwhile, while other actors keep running.
+        :param timeout: Seconds to wait before AskTimeout is raised in the actor (if it is not caught, processing
+            of the current message ends). None means no timeout.
+        """
+        event = AskEvent(
             target=target,
             sender=self.ref,
             message=message,
-            context_code=self.__context
+            context_code=self.__context,
+            timeout=timeout
         )
 
+        self.next_context()
+
+        return event
+
     def respond(self, message: Any) -> ResponseEvent:
+        """
+        Sends a message back to the sender of the message that is being processed, as a response to its ask.
+        """
         return ResponseEvent(
             message=message
         )
 
-    def spawn(self, actor_type: Type['Actor'], address: Optional[str] = None, *args, **kwargs) -> SpawnEvent:
+    def spawn(self,
+              actor_type: Type['Actor'],
+              address: Optional[str] = None,
+              *args,
+              mailbox_config: Optional[MailboxConfig] = None,
+              near: Optional[ActorRef] = None,
+              local: bool = False,
+              **kwargs) -> SpawnEvent:
+        """
+        :param address: Address of a new actor (or its name, with numeric addressing).
+            Assigned by the executor if omitted.
+        :param mailbox_config: Overrides mailbox_config of the actor type.
+        :param near: Places a new actor in the same process as the given one, if its location is known.
+        :param local: Constructs a new actor in this actor's process before the spawn returns, without waiting for
+            the actor system to place it. The actor can be sent messages right away.
+        """
         return SpawnEvent(
             parent=self.ref,
             actor_type=actor_type,
             args=args,
             kwargs=kwargs,
-            address=address or f"{self.__address}/{actor_type.__name__}-{str(uuid.uuid1())}"
+            address=address,
+            mailbox_config=mailbox_config,
+            near=near,
+            local=local
+        )
+
+    def spawn_many(self,
+                   actor_type: Type['Actor'],
+                   args_list: Sequence[tuple],
+                   kwargs_list: Optional[Sequence[dict]] = None,
+                   mailbox_config: Optional[MailboxConfig] = None) -> SpawnManyEvent:
+        """
+        Spawns an actor per item of 'args_list' (and 'kwargs_list'), in batches: 'refs = yield self.spawn_many(...)'.
+        """
+        return SpawnManyEvent(
+            parent=self.ref,
+            actor_type=actor_type,
+            args_list=list(args_list),
+            kwargs_list=list(kwargs_list) if kwargs_list is not None else None,
+            mailbox_config=mailbox_config
         )
 
-    def kill(self, actor_ref: ActorRef) -> KillEvent:
+    def kill(self, actor_ref: ActorRef, soft: bool = False) -> KillEvent:
+        """
+        Stops an actor along with its descendants. A hard kill stops it right away, dropping messages in its mailbox;
+        a soft one lets it process messages that are queued already (it sends a PoisonPillMessage). Descendants
+        are killed hard, once the actor itself has stopped.
+        """
         return KillEvent(
             sender=self.ref,
-            target=actor_ref
+            target=actor_ref,
+            soft=soft
+        )
+
+    def subscribe(self, topic: str) -> SubscribeEvent:
+        """
+        Subscribes the actor to messages published to a topic (see EventService). Sender of a published message
+        is its publisher.
+        """
+        return SubscribeEvent(
+            subscriber=self.ref,
+            topic=topic
+        )
+
+    def unsubscribe(self, topic: str) -> UnsubscribeEvent:
+        return UnsubscribeEvent(
+            subscriber=self.ref,
+            topic=topic
+        )
+
+    def publish(self, topic: str, message: Any) -> PublishEvent:
+        """
+        Sends a message to every subscriber of a topic. The message is serialized once per process that has
+        subscribers, so subscribers have to treat it as immutable.
+        """
+        return PublishEvent(
+            sender=self.ref,
+            topic=topic,
+            message=message
         )
 
     def become(self, behavior: Union[Callable[['Actor', Any, ActorRef], None], Generator[ActorEvent, Any, Any]]):
@@ -1,51 +1,111 @@
 from dataclasses import dataclass
 from .actor_ref import ActorRef
-from typing import Any, Type, List, Dict, Tuple, Optional
+from .address import Address
+from .config import MailboxConfig
+from typing import Any, Callable, Type, List, Dict, Tuple, Optional
 
 
 class ActorEvent:
+    # Events are created for every message, so none of them has a __dict__ (see system_events)
+    __slots__ = ()
+
+
+class AskTimeout(Exception):
+    """
+    Raised inside an actor when a response to its ask does not arrive in time.
+    """
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class SendEvent(ActorEvent):
     sender: ActorRef
     message: Any
     target: ActorRef
     context_code: Optional[int] = None
+    response: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class AskEvent(ActorEvent):
     sender: ActorRef
     context_code: int
     message: Any
     target: ActorRef
+    timeout: Optional[float] = None
+
+
+@dataclass(slots=True)
+class AwaitEvent(ActorEvent):
+    """
+    A step of an 'async def receive' that runs on the executor's event loop (see Atom.execute_async).
+    """
+    awaitable: Any
+
 
+@dataclass(slots=True)
+class BlockingEvent(ActorEvent):
+    """
+    A step of an actor of the blocking dispatcher that runs on the executor's thread pool (see Atom.execute_blocking).
+    """
+    call: Callable[[], Any]
 
-@dataclass
+
+@dataclass(slots=True)
 class ResponseEvent(ActorEvent):
     message: Any
 
 
-@dataclass
+@dataclass(slots=True)
 class SpawnEvent(ActorEvent):
     parent: ActorRef
     actor_type: Type['Actor']
     args: Tuple[Any, ...]
     kwargs: dict
-    address: str
+    address: Optional[Address]
+    mailbox_config: Optional[MailboxConfig] = None
+    near: Optional[ActorRef] = None  # an actor to co-locate the new one with
+    local: bool = False  # constructed right away in the parent's process
+
+
+@dataclass(slots=True)
+class SpawnManyEvent(ActorEvent):
+    parent: ActorRef
+    actor_type: Type['Actor']
+    args_list: List[Tuple[Any, ...]]
+    kwargs_list: Optional[List[dict]] = None
+    mailbox_config: Optional[MailboxConfig] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class KillEvent(ActorEvent):
     sender: ActorRef
     target: ActorRef
+    soft: bool = False  # stop after the messages that are already queued (see PoisonPillMessage)
+
+
+@dataclass(slots=True)
+class SubscribeEvent(ActorEvent):
+    subscriber: ActorRef
+    topic: str
+
+
+@dataclass(slots=True)
+class UnsubscribeEvent(ActorEvent):
+    subscriber: ActorRef
+    topic: str
+
+
+@dataclass(slots=True)
+class PublishEvent(ActorEvent):
+    sender: ActorRef
+    topic: str
+    message: Any
 
 
 class StashEvent(ActorEvent):
-    pass
+    __slots__ = ()
 
 
 class UnstashEvent(ActorEvent):
-    pass
+    __slots__ = ()
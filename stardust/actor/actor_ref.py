@@ -1,11 +1,19 @@
+from .address import Address
+
+
 class ActorRef:
-    def __init__(self, address: str):
+    __slots__ = ('_address',)
+
+    def __init__(self, address: Address):
         self._address = address
 
     @property
-    def address(self):
+    def address(self) -> Address:
         return self._address
 
+    def __reduce__(self):
+        return ActorRef, (self._address,)
+
     def __str__(self):
         return f"ActorRef({self._address})"
 
@@ -1,16 +1,41 @@
+import time
 import random
+import asyncio
 import threading
+import dataclasses
 import multiprocessing as mp
-from typing import Dict, Callable, List, Optional
+from concurrent.futures import Future
+from typing import Any, Dict, Callable, List, Optional, Sequence, Tuple
 
-from stardust.actor.config import SystemConfig
+from stardust.actor.config import SystemConfig, MailboxConfig
 from .pipe import Pipe
+from .address import Address, AddressAllocator, REMOTE_ALLOCATOR, is_numeric, address_node
+from .routing_table import RoutingTable
+from .load_balancing_service import LoadBalancingService, WorkerStats, AffinityGraph, AUTO, target_location
+from .ask_service import AskService
+from .router import RouterRef, ROUND_ROBIN, resolve
+from .event_service import EventService
+from .actor_tree import ActorTree
+from .system_messages import PoisonPillMessage
+from .dead_letters import (
+    DeadLetters, DeadLetterStats, Tombstones, PendingMessages,
+    KILLED, EXPIRED, OVERFLOW, UNREACHABLE
+)
+from .network_service import NetworkService
+from .transport import create_queue
+from .shared_buffers import release_segments
 import uuid
 from queue import Queue as ThreadingQueue
 from .system_events import (
-    MessageEvent,
+    MessageEvent, MessageBatchEvent,
     ExecutionStopped, StopSystemExecution, StopExecution,
-    ActorLifecycleEvent, ActorSpawnEvent, ActorDeathEvent, ActorSpawnNotificationEvent
+    ActorLifecycleEvent, ActorSpawnEvent, ActorDeathEvent, ActorBatchDeathEvent, ActorSpawnNotificationEvent,
+    ActorBatchSpawnEvent, ActorBatchSpawnNotificationEvent, ActorLocalSpawnEvent,
+    RoutingUpdateEvent, RoutingRequestEvent,
+    ActorMigratedEvent, MigrationFenceEvent, MigrationRequestEvent, ExpectMigrationEvent,
+    WorkerStatsEvent, TrafficReportEvent,
+    TopicInterestEvent, TopicMessageEvent,
+    NodeJoinedEvent, NodeLeftEvent, NodeStatsEvent, RouteQueryEvent, RouteAnswerEvent
 )
 from .actor import Actor
 from .actor_ref import ActorRef
@@ -28,12 +53,16 @@ class IncomingEventManager(threading.Thread):
                  system_event_queue: ThreadingQueue,
                  system_event_queue_lock: threading.Lock,
 
+                 asks: AskService,
+
                  running: Callable[[], bool],
 
                  *args, **kwargs):
 
         super(IncomingEventManager, self).__init__(*args, **kwargs)
 
+        self.asks = asks
+
         self.incoming_queue = incoming_queue
 
         self.message_event_queue = message_event_queue
@@ -49,6 +78,10 @@ class IncomingEventManager(threading.Thread):
             event = self.incoming_queue.get()
 
             if isinstance(event, MessageEvent):
+                # Replies to asks from outside of the system end here
+                if self.asks.complete(event):
+                    continue
+
                 # ------------------------------------------------------------------------------------------------------
                 self.message_event_queue_lock.acquire()
                 # ======================================================================================================
@@ -59,6 +92,19 @@ class IncomingEventManager(threading.Thread):
                 self.message_event_queue_lock.release()
                 # ------------------------------------------------------------------------------------------------------
 
+            elif isinstance(event, MessageBatchEvent):
+                # ------------------------------------------------------------------------------------------------------
+                self.message_event_queue_lock.acquire()
+                # ======================================================================================================
+
+                for message_event in event.events:
+                    if not self.asks.complete(message_event):
+                        self.message_event_queue.put(message_event)
+
+                # ======================================================================================================
+                self.message_event_queue_lock.release()
+                # ------------------------------------------------------------------------------------------------------
+
             elif isinstance(event, ExecutionStopped):
                 break
 
@@ -79,14 +125,21 @@ class OutgoingEventManager(threading.Thread):
 
                  message_event_queue: ThreadingQueue,
 
-                 actor_to_process: Dict[str, int],
+                 actor_to_process: RoutingTable,
                  actor_to_process_lock: threading.Lock,
 
                  process_to_queue: Dict[int, ThreadingQueue],
 
-                 message_cache: Dict[str, List[MessageEvent]],
+                 message_cache: PendingMessages,
                  message_cache_lock: threading.Lock,
 
+                 tombstones: Tombstones,
+                 dead_letters: DeadLetters,
+
+                 remote_routes: Dict[Address, int],
+                 network: Optional[NetworkService],
+                 node_idx: int,
+
                  running: Callable[[], bool],
 
                  *args, **kwargs):
@@ -103,52 +156,99 @@ class OutgoingEventManager(threading.Thread):
         self.message_cache = message_cache
         self.message_cache_lock = message_cache_lock
 
+        self.tombstones = tombstones
+        self.dead_letters = dead_letters
+
+        # Address -> node of actors of other nodes of the cluster, guarded by actor_to_process_lock
+        self.remote_routes = remote_routes
+        self.network = network
+        self.node_idx = node_idx
+
         self.running = running
 
+    def remote_node(self, address: Address) -> Optional[int]:
+        """
+        :return: Node of the cluster that hosts an actor which is not hosted by this one, if it is known.
+        """
+        if self.network is None:
+            return None
+
+        node_idx = self.remote_routes.get(address, None)
+
+        if node_idx is None:
+            if is_numeric(address):
+                node_idx = address_node(address) if address_node(address) != self.node_idx else None
+
+            else:
+                node_idx = self.network.reply_node(address)
+
+        return node_idx
+
     def run(self) -> None:
         while self.running():
             event = self.message_event_queue.get()
 
             if isinstance(event, MessageEvent):
                 cached = False
+                held = True
 
                 # ------------------------------------------------------------------------------------------------------
                 self.message_cache_lock.acquire()
                 # ======================================================================================================
 
                 if event.target.address in self.message_cache:
-                    self.message_cache[event.target.address].append(event)
+                    held = self.message_cache.hold(event)
                     cached = True
 
                 # ======================================================================================================
                 self.message_cache_lock.release()
                 # ------------------------------------------------------------------------------------------------------
 
+                if not held:
+                    self.dead_letters.record([event], OVERFLOW)
+
                 if not cached:
                     # --------------------------------------------------------------------------------------------------
                     self.actor_to_process_lock.acquire()
                     # ==================================================================================================
 
-                    if event.target.address in self.actor_to_process:
+                    process_idx = self.actor_to_process.get(event.target.address, None)
+                    node_idx = self.remote_node(event.target.address) if process_idx is None else None
 
-                        process_idx = self.actor_to_process[event.target.address]
+                    if process_idx is not None:
                         self.process_to_queue[process_idx].put(event)
 
+                    elif node_idx is not None:
+                        if not self.network.send(node_idx, event):
+                            self.dead_letters.record([event], UNREACHABLE)
+
+                    elif event.target.address in self.tombstones:
+                        self.dead_letters.record([event], self.tombstones.cause(event.target.address) or KILLED)
+
                     else:
-                        # TODO: UPDATE THIS PART (ActorUnknownLocation MUST BE SENT TO A SENDER)
+                        # Held until the actor is routed, or evicted once 'pending_ttl' expires
                         # ----------------------------------------------------------------------------------------------
                         self.message_cache_lock.acquire()
                         # ==============================================================================================
 
-                        if event.target.address not in self.message_cache:
-                            self.message_cache[event.target.address] = []
-
-                        self.message_cache[event.target.address].append(event)
+                        unknown = event.target.address not in self.message_cache
+                        held = self.message_cache.hold(event)
+                        expired = self.message_cache.expire() if unknown else []
 
                         # ==============================================================================================
                         self.message_cache_lock.release()
                         # ----------------------------------------------------------------------------------------------
 
+                        if not held:
+                            self.dead_letters.record([event], OVERFLOW)
+
+                        if expired:
+                            self.dead_letters.record(expired, EXPIRED)
+
+                        # Other nodes are asked once, and the messages follow the answer (see SystemEventManager)
+                        if unknown and held and self.network is not None:
+                            self.network.resolve(event.target.address)
+
                     # ==================================================================================================
                     self.actor_to_process_lock.release()
                     # --------------------------------------------------------------------------------------------------
@@ -160,7 +260,7 @@ class OutgoingEventManager(threading.Thread):
 class SystemEventManager(threading.Thread):
     def __init__(self,
 
-                 actor_to_process: Dict[str, int],
+                 actor_to_process: RoutingTable,
                  actor_to_process_lock: threading.Lock,
 
                  process_to_pipe: Dict[int, Pipe],
@@ -171,9 +271,26 @@ class SystemEventManager(threading.Thread):
                  message_event_queue: ThreadingQueue,
                  message_event_queue_lock: threading.Lock,
 
-                 message_cache: Dict[str, List[MessageEvent]],
+                 message_cache: PendingMessages,
                  message_cache_lock: threading.Lock,
 
+                 tombstones: Tombstones,
+                 dead_letters: DeadLetters,
+
+                 address_allocator: AddressAllocator,
+                 names: Dict[str, Address],
+
+                 load_balancer: LoadBalancingService,
+                 affinity: AffinityGraph,
+
+                 topics: EventService,
+
+                 remote_routes: Dict[Address, int],
+                 network: Optional[NetworkService],
+
+                 system_ref: ActorRef,
+                 config: SystemConfig,
+
                  running: Callable[[], bool],
 
                  *args, **kwargs):
@@ -183,9 +300,25 @@ class SystemEventManager(threading.Thread):
         self.actor_to_process = actor_to_process
         self.actor_to_process_lock = actor_to_process_lock
 
-        self.process_actors_count: Dict[int, Dict[str, int]] = {
-            process_idx: dict() for process_idx in process_to_pipe.keys()
-        }
+        self.load_balancer = load_balancer
+
+        self.affinity = affinity
+        self.next_affinity_round = time.monotonic() + config.affinity_interval
+
+        self.topics = topics
+
+        # Address -> node of actors of other nodes of the cluster, guarded by actor_to_process_lock
+        self.remote_routes = remote_routes
+        self.network = network
+
+        # Allocators of numeric addresses of actors placed on other nodes, by node
+        self.remote_allocators: Dict[int, AddressAllocator] = dict()
+
+        self.system_ref = system_ref
+        self.config = config
+
+        self.address_allocator = address_allocator
+        self.names = names
 
         self.process_to_pipe = process_to_pipe
 
@@ -198,53 +331,172 @@ class SystemEventManager(threading.Thread):
         self.message_cache = message_cache
         self.message_cache_lock = message_cache_lock
 
+        self.tombstones = tombstones
+        self.dead_letters = dead_letters
+
+        # Parent -> children of live actors, so that killed actors take their descendants along
+        self.tree = ActorTree(root=system_ref.address)
+
         self.running = running
 
-    def schedule_spawn(self, event: ActorSpawnEvent):
+    def schedule_spawn(self, event: ActorSpawnEvent) -> Address:
+        """
+        Places a new actor and sends it to its process, which may be a process of another node of the cluster.
+        An event without an address gets a numeric one, allocated after the placement.
+        :return: Address of the new actor.
+        """
+        actor_typename = event.actor_type.__name__
+        target = self.load_balancer.place(actor_typename, event.process_idx)
+        node_idx, target_process_idx = target_location(target)
+
+        if event.address is None:
+            event = dataclasses.replace(event, address=self.allocate(node_idx, target_process_idx))
+
+        event = dataclasses.replace(event, process_idx=target_process_idx)
+
+        self.load_balancer.register(event.address, actor_typename, target)
+        self.tree.add(event.parent_ref.address, [event.address])
+
+        if event.name is not None:
+            self.names[event.name] = event.address
+
+        # A named actor may be spawned again after it was killed
+        self.tombstones.revive([event.address])
+
+        if node_idx is not None:
+            self.send_remote(node_idx, [event.address], event)
+            return event.address
+
         # --------------------------------------------------------------------------------------------------------------
         self.message_cache_lock.acquire()
         # ==============================================================================================================
 
-        if event.address not in self.message_cache:
-            self.message_cache[event.address] = []
+        self.message_cache.reserve(event.address)
 
         # ==============================================================================================================
         self.message_cache_lock.release()
         # --------------------------------------------------------------------------------------------------------------
 
+        # --------------------------------------------------------------------------------------------------------------
+        self.actor_to_process_lock.acquire()
+        # ==============================================================================================================
+
+        self.actor_to_process[event.address] = target_process_idx
+
+        # ==============================================================================================================
+        self.actor_to_process_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        self.process_to_pipe[target_process_idx].parent_output_queue.put(event)
+
+        return event.address
+
+    def schedule_spawn_batch(self, event: ActorBatchSpawnEvent) -> List[Address]:
+        """
+        Same as schedule_spawn, for many actors of the same type: they are sent with one event per process.
+        :return: Addresses of the new actors.
+        """
         actor_typename = event.actor_type.__name__
+        process_indices = event.process_indices or [None] * len(event.args_list)
+        targets = self.load_balancer.place_many(actor_typename, process_indices)
+
+        addresses = event.addresses
+
+        if addresses is None:
+            addresses = [self.allocate(*target_location(target)) for target in targets]
+
+        self.load_balancer.register_many(addresses, actor_typename, targets)
+        self.tree.add(event.parent_ref.address, addresses)
+        self.tombstones.revive(addresses)
+
+        # Node -> positions of its actors in the batch, for actors placed on other nodes
+        remote_groups: Dict[int, List[int]] = dict()
+
+        for position, target in enumerate(targets):
+            node_idx, _ = target_location(target)
+
+            if node_idx is not None:
+                remote_groups.setdefault(node_idx, []).append(position)
 
-        counts = []
+        kwargs_list = event.kwargs_list
 
-        for process_idx in self.process_actors_count.keys():
-            if actor_typename not in self.process_actors_count[process_idx]:
-                self.process_actors_count[process_idx][actor_typename] = 0
+        for node_idx, positions in remote_groups.items():
+            self.send_remote(
+                node_idx,
+                [addresses[position] for position in positions],
+                dataclasses.replace(
+                    event,
+                    addresses=[addresses[position] for position in positions],
+                    args_list=[event.args_list[position] for position in positions],
+                    kwargs_list=[kwargs_list[position] for position in positions] if kwargs_list else None,
+                    process_indices=[target_location(targets[position])[1] for position in positions]
+                )
+            )
+
+        placement = {
+            address: target for address, target in zip(addresses, targets) if target_location(target)[0] is None
+        }
 
-            counts.append(self.process_actors_count[process_idx][actor_typename])
+        # --------------------------------------------------------------------------------------------------------------
+        self.message_cache_lock.acquire()
+        # ==============================================================================================================
 
-        target_process_idx = counts.index(min(counts))
+        for address in placement.keys():
+            self.message_cache.reserve(address)
 
-        self.process_actors_count[target_process_idx][actor_typename] += 1
+        # ==============================================================================================================
+        self.message_cache_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
 
         # --------------------------------------------------------------------------------------------------------------
         self.actor_to_process_lock.acquire()
         # ==============================================================================================================
 
-        self.actor_to_process[event.address] = target_process_idx
+        for address, process_idx in placement.items():
+            self.actor_to_process[address] = process_idx
 
         # ==============================================================================================================
         self.actor_to_process_lock.release()
         # --------------------------------------------------------------------------------------------------------------
 
-        self.process_to_pipe[target_process_idx].parent_output_queue.put(event)
+        # Process -> positions of its actors in the batch
+        groups: Dict[int, List[int]] = dict()
+
+        for position, target in enumerate(targets):
+            if target_location(target)[0] is None:
+                groups.setdefault(target, []).append(position)
+
+        for process_idx, positions in groups.items():
+            self.process_to_pipe[process_idx].parent_output_queue.put(
+                dataclasses.replace(
+                    event,
+                    addresses=[addresses[position] for position in positions],
+                    args_list=[event.args_list[position] for position in positions],
+                    kwargs_list=[kwargs_list[position] for position in positions] if kwargs_list else None,
+                    process_indices=None
+                )
+            )
+
+        return addresses
+
+    def register_local_spawn(self, event: ActorLocalSpawnEvent):
+        """
+        Routes an actor that an executor has spawned by itself, and sends it messages that arrived before.
+        """
+        self.load_balancer.register(event.address, event.actor_type.__name__, event.process_idx)
+        self.tree.add(event.parent_ref.address, [event.address])
+
+        if event.name is not None:
+            self.names[event.name] = event.address
+
+        self.tombstones.revive([event.address])
 
-    def flush_cache(self, event: ActorSpawnNotificationEvent):
+        # Messages keep being cached until the cache is flushed, so that they are not overtaken by newer ones
         # --------------------------------------------------------------------------------------------------------------
         self.message_cache_lock.acquire()
         # ==============================================================================================================
 
-        messages = self.message_cache[event.address]
-        del self.message_cache[event.address]
+        self.message_cache.reserve(event.address)
 
         # ==============================================================================================================
         self.message_cache_lock.release()
@@ -254,32 +506,393 @@ class SystemEventManager(threading.Thread):
         self.actor_to_process_lock.acquire()
         # ==============================================================================================================
 
-        process_idx = self.actor_to_process[event.address]
+        self.actor_to_process[event.address] = event.process_idx
+
+        # ==============================================================================================================
+        self.actor_to_process_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        self.flush_cache([event.address], {})
+
+    def flush_cache(self, addresses: List[Address], errors: Dict[Address, Exception]):
+        """
+        Routes actors that have started (or forgets ones that failed to start), and sends them messages that
+        arrived before. The outgoing event manager routes under the same lock, so messages that it sends to the new
+        routes follow the ones that were held.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.actor_to_process_lock.acquire()
+        # ==============================================================================================================
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.message_cache_lock.acquire()
+        # ==============================================================================================================
+
+        messages = {address: self.message_cache.pop(address) for address in addresses}
+
+        # ==============================================================================================================
+        self.message_cache_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        routes: Dict[Address, Optional[int]] = dict()
+        locations: Dict[Address, int] = dict()
+
+        for address in addresses:
+            # The actor may have been killed before its spawn notification arrived
+            process_idx = self.actor_to_process.get(address, None)
+
+            if process_idx is not None:
+                routes[address] = process_idx if address not in errors else None
+                locations[address] = process_idx
+
+        routing_update = self.actor_to_process.update_routes(routes) if routes else None
+
+        # Messages of actors that failed to start, or were killed before they started, are dead letters
+        dead = [address for address in addresses if address not in locations or address in errors]
+
+        if dead:
+            self.tombstones.bury(dead)
+
+        for address, process_idx in locations.items():
+            if address not in errors:
+                queue = self.process_to_pipe[process_idx].parent_output_queue
+
+                for message in messages[address]:
+                    queue.put(message)
 
         # ==============================================================================================================
         self.actor_to_process_lock.release()
         # --------------------------------------------------------------------------------------------------------------
 
-        queue = self.process_to_pipe[process_idx].parent_output_queue
+        if dead:
+            self.dead_letters.record([message for address in dead for message in messages[address]], KILLED)
+
+        if routing_update is None:
+            return
+
+        for address in errors:
+            if address in locations:
+                self.load_balancer.remove(address)
+
+        # Executors route numeric addresses by themselves
+        if not is_numeric(addresses[0]):
+            self.broadcast(routing_update)
+
+    def allocate(self, node_idx: Optional[int], process_idx: int) -> int:
+        """
+        :param node_idx: Node of the cluster that is going to host the actor (None - this one).
+        :return: New numeric address of an actor.
+        """
+        if node_idx is None:
+            return self.address_allocator.allocate(process_idx)
+
+        allocator = self.remote_allocators.get(node_idx, None)
+
+        if allocator is None:
+            allocator = self.remote_allocators[node_idx] = AddressAllocator(
+                allocator_idx=REMOTE_ALLOCATOR - self.config.node_idx,
+                node_idx=node_idx
+            )
+
+        return allocator.allocate(process_idx)
+
+    def send_remote(self, node_idx: int, addresses: List[Address], event: Any):
+        """
+        Sends an event that places actors on another node of the cluster, and routes the actors there,
+        along with messages that arrived for them before.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.actor_to_process_lock.acquire()
+        # ==============================================================================================================
+
+        self.network.send(node_idx, event)
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.message_cache_lock.acquire()
+        # ==============================================================================================================
+
+        messages = [message for address in addresses for message in self.message_cache.pop(address)]
+
+        # ==============================================================================================================
+        self.message_cache_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        for address in addresses:
+            self.remote_routes[address] = node_idx
 
         for message in messages:
-            queue.put(message)
+            self.network.send(node_idx, message)
+
+        # ==============================================================================================================
+        self.actor_to_process_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def schedule_kill(self, addresses: List[Address], sender: ActorRef):
+        """
+        Kills actors along with their descendants: a whole subtree is sent with one event per process that hosts
+        a part of it, and one per node of the cluster (which kills descendants that it has placed in turn).
+        """
+        addresses = self.tree.remove(addresses)
+
+        # Messages that are still coming are dropped where they turn out to be unroutable
+        self.tombstones.bury(addresses)
+
+        # Process (or node) -> killed actors that it hosts
+        groups: Dict[int, List[Address]] = dict()
+        remote_groups: Dict[int, List[Address]] = dict()
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.actor_to_process_lock.acquire()
+        # ==============================================================================================================
+
+        for address in addresses:
+            process_idx = self.actor_to_process.get(address, None)
+
+            if process_idx is not None:
+                groups.setdefault(process_idx, []).append(address)
+
+            elif self.network is not None:
+                node_idx = self.remote_routes.pop(address, None)
+
+                if node_idx is None and is_numeric(address) and address_node(address) != self.config.node_idx:
+                    node_idx = address_node(address)
+
+                if node_idx is not None:
+                    remote_groups.setdefault(node_idx, []).append(address)
+
+        for process_idx, group in groups.items():
+            self.process_to_pipe[process_idx].parent_output_queue.put(
+                ActorBatchDeathEvent(addresses=group, sender=sender)
+            )
+
+        for node_idx, group in remote_groups.items():
+            self.network.send(node_idx, ActorBatchDeathEvent(addresses=group, sender=sender))
+
+        routes = {address: None for group in groups.values() for address in group}
+        routing_update = self.actor_to_process.update_routes(routes) if routes else None
+
+        # ==============================================================================================================
+        self.actor_to_process_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        for address in addresses:
+            self.load_balancer.remove(address)
+
+        if routing_update is not None and any(not is_numeric(address) for address in routes):
+            self.broadcast(routing_update)
+
+    def resolve_route(self, event: RoutingRequestEvent):
+        # --------------------------------------------------------------------------------------------------------------
+        self.message_cache_lock.acquire()
+        # ==============================================================================================================
+
+        pending = event.address in self.message_cache
+
+        # ==============================================================================================================
+        self.message_cache_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        # Routes of actors that are not yet spawned, as well as unknown ones, are broadcast once they become available
+        if pending:
+            return
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.actor_to_process_lock.acquire()
+        # ==============================================================================================================
+
+        process_idx = self.actor_to_process.get(event.address, None)
+        version = self.actor_to_process.version
+
+        # ==============================================================================================================
+        self.actor_to_process_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        if process_idx is not None:
+            self.process_to_pipe[event.process_idx].parent_output_queue.put(
+                RoutingUpdateEvent(version=version, routes={event.address: process_idx})
+            )
+
+    def expire_pending(self):
+        """
+        Drops messages of addresses that were not routed within 'pending_ttl' seconds.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.message_cache_lock.acquire()
+        # ==============================================================================================================
+
+        expired = self.message_cache.expire()
 
-    def schedule_kill(self, event: ActorDeathEvent):
+        # ==============================================================================================================
+        self.message_cache_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        if expired:
+            self.dead_letters.record(expired, EXPIRED)
+
+    def answer_route(self, event: RouteQueryEvent):
+        """
+        Lets a node of the cluster know that an actor it looks for is hosted by this one.
+        """
         # --------------------------------------------------------------------------------------------------------------
         self.actor_to_process_lock.acquire()
         # ==============================================================================================================
 
-        if event.actor_ref.address in self.actor_to_process:
-            process_idx = self.actor_to_process[event.actor_ref.address]
-            queue = self.process_to_pipe[process_idx].parent_output_queue
+        hosted = event.address in self.actor_to_process
+
+        # ==============================================================================================================
+        self.actor_to_process_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        if hosted:
+            self.network.send(event.node_idx, RouteAnswerEvent(address=event.address, node_idx=self.config.node_idx))
+
+    def learn_route(self, event: RouteAnswerEvent):
+        """
+        Routes an actor of another node of the cluster, and sends it messages that were held until then.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.actor_to_process_lock.acquire()
+        # ==============================================================================================================
+
+        # The actor may have been spawned on this node meanwhile
+        if event.address not in self.actor_to_process:
+            self.remote_routes[event.address] = event.node_idx
+
+            # ----------------------------------------------------------------------------------------------------------
+            self.message_cache_lock.acquire()
+            # ==========================================================================================================
+
+            messages = self.message_cache.pop(event.address)
+
+            # ==========================================================================================================
+            self.message_cache_lock.release()
+            # ----------------------------------------------------------------------------------------------------------
+
+            for message in messages:
+                self.network.send(event.node_idx, message)
+
+        # ==============================================================================================================
+        self.actor_to_process_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def forget_node(self, event: NodeLeftEvent):
+        """
+        Stops placing actors on a node that has left the cluster, and forgets routes of its actors. Messages sent to
+        them are dropped as unreachable: numeric addresses tell their node by themselves, path ones are buried.
+        """
+        self.load_balancer.remove_node(event.node_idx)
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.actor_to_process_lock.acquire()
+        # ==============================================================================================================
+
+        departed = [address for address, node_idx in self.remote_routes.items() if node_idx == event.node_idx]
+
+        for address in departed:
+            del self.remote_routes[address]
+
+        self.tombstones.bury(departed, UNREACHABLE)
+
+        # ==============================================================================================================
+        self.actor_to_process_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        departed.extend(
+            self.tree.select(lambda address: is_numeric(address) and address_node(address) == event.node_idx)
+        )
+
+        self.tree.forget(departed)
+
+    def migrate(self, event: ActorMigratedEvent):
+        """
+        Moves routes of actors that were stolen by another executor, fences their previous location on behalf of
+        the actor system, and lets executors know (they fence it as well, see ExecutorEventManager.fence).
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.actor_to_process_lock.acquire()
+        # ==============================================================================================================
+
+        # Actors that were killed meanwhile are not routed again
+        moved = {
+            address: event.target_process_idx
+            for address in event.actor_types.keys()
+            if self.actor_to_process.get(address, None) == event.source_process_idx
+        }
+
+        routing_update = None
+
+        if moved:
+            routing_update = self.actor_to_process.update_routes(moved, moved_from=event.source_process_idx)
+
+            self.process_to_pipe[event.source_process_idx].parent_output_queue.put(
+                MigrationFenceEvent(addresses=tuple(moved))
+            )
+
+        # ==============================================================================================================
+        self.actor_to_process_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        if routing_update is None:
+            return
+
+        for address in moved.keys():
+            self.load_balancer.move(address, event.target_process_idx)
+
+        # Numeric addresses no longer point at their process, so their routes are broadcast as well
+        self.broadcast(routing_update)
+
+    def record_traffic(self, event: TrafficReportEvent):
+        """
+        Adds sampled traffic to the affinity graph, and, once per 'affinity_interval' seconds, finds actors that
+        should move closer to their partners. In the 'auto' mode, asks their executors to move them.
+        """
+        self.affinity.record(event.traffic)
+
+        now = time.monotonic()
+
+        if now < self.next_affinity_round:
+            return
+
+        self.next_affinity_round = now + self.config.affinity_interval
 
-            queue.put(event)
+        # --------------------------------------------------------------------------------------------------------------
+        self.actor_to_process_lock.acquire()
+        # ==============================================================================================================
+
+        locations = dict(self.actor_to_process)
 
         # ==============================================================================================================
         self.actor_to_process_lock.release()
         # --------------------------------------------------------------------------------------------------------------
 
+        moves = self.affinity.suggest_moves(
+            locations=locations,
+            actor_counts={process_idx: stats.actors for process_idx, stats in self.load_balancer.stats().items()}
+        )
+
+        if self.config.affinity != AUTO:
+            return
+
+        # (current process, new process) -> addresses
+        groups: Dict[Tuple[int, int], List[Address]] = dict()
+
+        for address, source_process_idx, target_process_idx in moves:
+            groups.setdefault((source_process_idx, target_process_idx), []).append(address)
+
+        for (source_process_idx, target_process_idx), addresses in groups.items():
+            # The new location holds messages for unknown actors until the actors arrive (see ExecutorEventManager)
+            self.process_to_pipe[target_process_idx].parent_output_queue.put(
+                ExpectMigrationEvent(source_process_idx=source_process_idx)
+            )
+
+            self.process_to_pipe[source_process_idx].parent_output_queue.put(
+                MigrationRequestEvent(addresses=tuple(addresses), process_idx=target_process_idx)
+            )
+
+    def broadcast(self, event: RoutingUpdateEvent):
+        for pipe in self.process_to_pipe.values():
+            pipe.parent_output_queue.put(event)
+
     def run(self) -> None:
 
         while self.running():
@@ -292,11 +905,55 @@ class SystemEventManager(threading.Thread):
                 if isinstance(event, ActorSpawnEvent):
                     self.schedule_spawn(event)
 
+                elif isinstance(event, ActorBatchSpawnEvent):
+                    self.schedule_spawn_batch(event)
+
+                elif isinstance(event, ActorLocalSpawnEvent):
+                    self.register_local_spawn(event)
+
                 elif isinstance(event, ActorDeathEvent):
-                    self.schedule_kill(event)
+                    self.schedule_kill([event.actor_ref.address], event.sender)
+
+                elif isinstance(event, ActorBatchDeathEvent):
+                    self.schedule_kill(event.addresses, event.sender)
 
                 elif isinstance(event, ActorSpawnNotificationEvent):
-                    self.flush_cache(event)
+                    self.flush_cache([event.address], {event.address: event.error} if event.error is not None else {})
+
+                elif isinstance(event, ActorBatchSpawnNotificationEvent):
+                    self.flush_cache(event.addresses, event.errors)
+
+            elif isinstance(event, RoutingRequestEvent):
+                self.resolve_route(event)
+
+            elif isinstance(event, ActorMigratedEvent):
+                self.migrate(event)
+
+            elif isinstance(event, WorkerStatsEvent):
+                self.load_balancer.update(event)
+                self.dead_letters.update(event.process_idx, event.dead_letters)
+                self.expire_pending()
+
+            elif isinstance(event, TrafficReportEvent):
+                self.record_traffic(event)
+
+            elif isinstance(event, TopicInterestEvent):
+                self.topics.update_interest(event.topic, event.process_idx, event.interested)
+
+            elif isinstance(event, RouteQueryEvent):
+                self.answer_route(event)
+
+            elif isinstance(event, RouteAnswerEvent):
+                self.learn_route(event)
+
+            elif isinstance(event, NodeStatsEvent):
+                self.load_balancer.update_node(event)
+
+            elif isinstance(event, NodeJoinedEvent):
+                self.load_balancer.add_node(event.node_idx, event.num_processes)
+
+            elif isinstance(event, NodeLeftEvent):
+                self.forget_node(event)
 
             else:
                 # TODO: IMPLEMENT
@@ -309,28 +966,85 @@ class SystemEventManager(threading.Thread):
 class ActorSystem:
     def __init__(self, name=None, config: Optional[SystemConfig] = None):
         self.running = True
-        self.config = config
+        self.config = config or SystemConfig(num_processes=mp.cpu_count())
 
-        self.manager = mp.Manager()
+        self.manager = mp.Manager() if self.config.transport == 'manager' else None
 
-        self.actor_to_process: Dict[str, int] = self.manager.dict()
-        self.actor_to_process_lock = self.manager.Lock()
+        self.actor_to_process: RoutingTable = RoutingTable()
+        self.actor_to_process_lock = threading.Lock()
 
         # ActorAddress -> [Event]. Used in case when actor is not yet started, but has already received some messages.
-        self.message_cache: Dict[str, List[MessageEvent]] = dict()
+        self.message_cache = PendingMessages(capacity=self.config.pending_capacity, ttl=self.config.pending_ttl)
         self.message_cache_lock = threading.Lock()
 
+        # Recently killed actors, and messages that could not be delivered (see stardust.actor.dead_letters)
+        self.tombstones = Tombstones(capacity=self.config.tombstone_capacity, ttl=self.config.tombstone_ttl)
+        self.dead_letter_office = DeadLetters(sample_size=self.config.dead_letter_samples)
+
         self.system_ref = ActorRef(name or f"System-{uuid.uuid1()}")
 
+        self.address_allocator = AddressAllocator(allocator_idx=0, node_idx=self.config.node_idx)
+
+        # Human-readable name -> address of actors that were spawned with a name
+        self.names: Dict[str, Address] = dict()
+
+        self.load_balancer = LoadBalancingService(
+            process_indices=list(range(self.config.num_processes)),
+            strategy=self.config.placement
+        )
+
+        self.affinity = AffinityGraph()
+
+        self.asks = AskService(system_ref=self.system_ref)
+
+        # Which executors have subscribers of a topic. The actor system only publishes.
+        self.topics = EventService()
+
         self.message_event_queue: ThreadingQueue = ThreadingQueue()
         self.message_event_queue_lock = threading.Lock()
 
         self.system_event_queue: ThreadingQueue = ThreadingQueue()
         self.system_event_queue_lock = threading.Lock()
 
+        # Address -> node of actors that are hosted by other nodes of the cluster, as far as this node knows
+        self.remote_routes: Dict[Address, int] = dict()
+
+        # Events from other nodes of the cluster, read as events of executors are
+        self.network_queue: ThreadingQueue = ThreadingQueue()
+
+        self.network: Optional[NetworkService] = None
+
+        if self.config.cluster:
+            self.network = NetworkService(
+                node_idx=self.config.node_idx,
+                host=self.config.host,
+                port=self.config.port,
+                seeds=self.config.seeds,
+                num_processes=self.config.num_processes,
+                reply_prefix=self.asks.prefix,
+                secret=self.config.secret.encode(),
+                incoming_queue=self.network_queue,
+                local_stats=self.load_balancer.stats,
+                codec=self.config.codec,
+                batch_size=self.config.batch_size,
+                stats_interval=self.config.stats_interval
+            )
+
+        # Shared memory segments of messages between processes of this system (see stardust.actor.codec)
+        self.segment_prefix = f"sd{uuid.uuid4().hex[:8]}"
+
         self.process_to_pipe: Dict[int, Pipe] = {
-            process_idx: Pipe(self.manager.Queue(), self.manager.Queue())
-            for process_idx in range(mp.cpu_count() if not self.config else self.config.num_processes)
+            process_idx: Pipe(
+                create_queue(
+                    self.config.transport, self.manager, self.config.codec,
+                    self.config.shared_memory_threshold, self.segment_prefix
+                ),
+                create_queue(
+                    self.config.transport, self.manager, self.config.codec,
+                    self.config.shared_memory_threshold, self.segment_prefix
+                )
+            )
+            for process_idx in range(self.config.num_processes)
         }
 
         self.process_idx_to_queue: Dict[int, ThreadingQueue] = {
@@ -344,7 +1058,7 @@ class ActorSystem:
                 pipe=pipe,
                 system_ref=self.system_ref,
                 process_idx_to_queue=self.process_idx_to_queue,
-                actor_to_process=self.actor_to_process
+                config=self.config
             )
             for process_idx, pipe in self.process_to_pipe.items()
         ]
@@ -356,11 +1070,25 @@ class ActorSystem:
                 message_event_queue_lock=self.message_event_queue_lock,
                 system_event_queue=self.system_event_queue,
                 system_event_queue_lock=self.system_event_queue_lock,
+                asks=self.asks,
                 running=lambda: self.running
             )
             for pipe in self.process_to_pipe.values()
         ]
 
+        if self.network is not None:
+            self.incoming_events_managers.append(
+                IncomingEventManager(
+                    incoming_queue=self.network_queue,
+                    message_event_queue=self.message_event_queue,
+                    message_event_queue_lock=self.message_event_queue_lock,
+                    system_event_queue=self.system_event_queue,
+                    system_event_queue_lock=self.system_event_queue_lock,
+                    asks=self.asks,
+                    running=lambda: self.running
+                )
+            )
+
         self.outgoing_event_manager = OutgoingEventManager(
             actor_to_process=self.actor_to_process,
             actor_to_process_lock=self.actor_to_process_lock,
@@ -368,6 +1096,11 @@ class ActorSystem:
             process_to_queue=self.process_idx_to_queue,
             message_cache=self.message_cache,
             message_cache_lock=self.message_cache_lock,
+            tombstones=self.tombstones,
+            dead_letters=self.dead_letter_office,
+            remote_routes=self.remote_routes,
+            network=self.network,
+            node_idx=self.config.node_idx,
             running=lambda: self.running
         )
 
@@ -377,37 +1110,204 @@ class ActorSystem:
             process_to_pipe=self.process_to_pipe,
             message_cache=self.message_cache,
             message_cache_lock=self.message_cache_lock,
+            tombstones=self.tombstones,
+            dead_letters=self.dead_letter_office,
             message_event_queue=self.message_event_queue,
             message_event_queue_lock=self.message_event_queue_lock,
             system_event_queue=self.system_event_queue,
             system_event_queue_lock=self.system_event_queue_lock,
+            address_allocator=self.address_allocator,
+            names=self.names,
+            load_balancer=self.load_balancer,
+            affinity=self.affinity,
+            topics=self.topics,
+            remote_routes=self.remote_routes,
+            network=self.network,
+            system_ref=self.system_ref,
+            config=self.config,
             running=lambda: self.running
         )
 
-    def spawn(self, actor_class, name=None, *args, **kwargs):
+    def spawn(self,
+              actor_class,
+              name=None,
+              *args,
+              mailbox_config: Optional[MailboxConfig] = None,
+              near: Optional[ActorRef] = None,
+              **kwargs):
+        """
+        :param near: Places a new actor in the same process as the given one, if its location is known.
+        """
+        process_idx = self.actor_to_process.get(near.address, None) if near is not None else None
+
+        return self.__spawn(actor_class, name, args, kwargs, mailbox_config, process_idx)
+
+    def spawn_router(self,
+                     actor_class,
+                     n: int,
+                     *args,
+                     strategy: str = ROUND_ROBIN,
+                     key: Optional[Callable[[Any], Any]] = None,
+                     name: Optional[str] = None,
+                     mailbox_config: Optional[MailboxConfig] = None,
+                     **kwargs) -> RouterRef:
+        """
+        Spawns a pool of 'n' actors of the same type, spread over processes, to share a job.
+        :param strategy: 'round_robin', 'random', 'consistent_hash' or 'smallest_mailbox' (see stardust.actor.router).
+        :param key: Key of a message for 'consistent_hash' (the message itself by default). Has to be picklable.
+        :return: A ref that routes every message to one of the actors, in the sender's process.
+            Killing it kills all the actors.
+        """
+        assert n > 0, 'Router must have routees.'
+
+        routees = [
+            self.__spawn(actor_class, None, args, kwargs, mailbox_config, process_idx % self.config.num_processes)
+            for process_idx in range(n)
+        ]
+
+        return RouterRef(
+            address=name or f"{self.system_ref.address}/Router-{uuid.uuid1()}",
+            routees=routees,
+            strategy=strategy,
+            key=key
+        )
+
+    def spawn_many(self,
+                   actor_class,
+                   args_list: Sequence[tuple],
+                   kwargs_list: Optional[Sequence[dict]] = None,
+                   mailbox_config: Optional[MailboxConfig] = None) -> List[ActorRef]:
+        """
+        Spawns an actor per item of 'args_list' (positional arguments after address and parent) and 'kwargs_list'.
+        Actors are placed and shipped to executors in batches of 'spawn_batch_size', and executors confirm
+        every batch with one notification.
+        """
+        assert kwargs_list is None or len(kwargs_list) == len(args_list), 'Every actor must have its kwargs.'
+
+        refs = []
+
+        for start in range(0, len(args_list), self.config.spawn_batch_size):
+            end = start + self.config.spawn_batch_size
+
+            event = ActorBatchSpawnEvent(
+                actor_type=actor_class,
+                parent_ref=self.system_ref,
+                addresses=None,
+                args_list=list(args_list[start:end]),
+                kwargs_list=list(kwargs_list[start:end]) if kwargs_list is not None else None,
+                mailbox_config=mailbox_config
+            )
+
+            if self.config.addressing == 'numeric':
+                # Numeric addresses depend on placement, so the actors are placed right away
+                addresses = self.system_event_manager.schedule_spawn_batch(event)
+
+            else:
+                prefix = f"{self.system_ref.address}/{actor_class.__name__}-{uuid.uuid1()}"
+                addresses = [f"{prefix}-{idx}" for idx in range(len(event.args_list))]
+
+                self.system_event_queue.put(dataclasses.replace(event, addresses=addresses))
+
+            refs.extend(ActorRef(address) for address in addresses)
+
+        return refs
+
+    def __spawn(self, actor_class, name, args, kwargs, mailbox_config, process_idx) -> ActorRef:
+        if self.config.addressing == 'numeric':
+            # Numeric address depends on placement, so the actor is placed right away
+            address = self.system_event_manager.schedule_spawn(
+                ActorSpawnEvent(
+                    actor_type=actor_class,
+                    address=None,
+                    parent_ref=self.system_ref,
+                    args=args,
+                    kwargs=kwargs,
+                    name=name,
+                    process_idx=process_idx,
+                    mailbox_config=mailbox_config
+                )
+            )
+
+            return ActorRef(address)
+
         address = name or f"{self.system_ref.address}/{actor_class.__name__}-{uuid.uuid1()}"
 
+        # Messages sent to a named actor that was killed before are held again from now on
+        if name is not None:
+            self.tombstones.revive([address])
+
         actor_spawn_event = ActorSpawnEvent(
             actor_type=actor_class,
             address=address,
             parent_ref=self.system_ref,
             args=args,
-            kwargs=kwargs
+            kwargs=kwargs,
+            process_idx=process_idx,
+            mailbox_config=mailbox_config
         )
 
         self.system_event_queue.put(actor_spawn_event)
 
         return ActorRef(address)
 
-    def kill(self, actor_ref):
-
-        actor_death_event = ActorDeathEvent(
-            actor_ref=actor_ref,
-            sender=self.system_ref
+    def lookup(self, name: str) -> Optional[ActorRef]:
+        """
+        :return: ActorRef of an actor that was spawned with given name, if it is known to the system.
+        """
+        if self.config.addressing == 'numeric':
+            address = self.names.get(name, None)
+            return ActorRef(address) if address is not None else None
+
+        return ActorRef(name) if name in self.actor_to_process or name in self.remote_routes else None
+
+    def nodes(self) -> Dict[int, Tuple[str, int]]:
+        """
+        :return: Node index -> (host, port) of other nodes of the cluster that this node is connected to.
+        """
+        return self.network.nodes() if self.network is not None else dict()
+
+    def stats(self) -> Dict[int, WorkerStats]:
+        """
+        :return: Process index -> actors, mailbox backlog, throughput, CPU time and overflow counts of the executor.
+            Load figures are as of the executor's last report (see SystemConfig.stats_interval).
+        """
+        return self.load_balancer.stats()
+
+    def dead_letters(self) -> DeadLetterStats:
+        """
+        :return: Messages that could not be delivered: counts by reason (see stardust.actor.dead_letters) and
+            a sample of the latest ones. Figures of executors are as of their last report
+            (see SystemConfig.stats_interval).
+        """
+        return self.dead_letter_office.stats()
+
+    def affinity_suggestions(self) -> List[Tuple[ActorRef, int]]:
+        """
+        :return: Actors that exchange most of their messages with another process, and that process, as of the latest
+            affinity round (see SystemConfig.affinity_sampling). Applied automatically with affinity='auto'.
+        """
+        return [(ActorRef(address), process_idx) for address, _, process_idx in self.affinity.suggestions]
+
+    def kill(self, actor_ref, soft: bool = False):
+        """
+        Stops an actor along with its descendants (see Actor.kill). Killing a router kills its routees.
+        :param soft: Let the actor process messages that are queued already.
+        """
+        targets = actor_ref.routees if isinstance(actor_ref, RouterRef) else [actor_ref]
+
+        if soft:
+            for target in targets:
+                self.send(target, PoisonPillMessage())
+
+            return
+
+        self.system_event_queue.put(
+            ActorBatchDeathEvent(
+                addresses=[target.address for target in targets],
+                sender=self.system_ref
+            )
         )
 
-        self.system_event_queue.put(actor_death_event)
-
     def send(self, actor_ref, message):
         # --------------------------------------------------------------------------------------------------------------
         self.message_event_queue_lock.acquire()
@@ -416,7 +1316,7 @@ class ActorSystem:
         self.message_event_queue.put(
             MessageEvent(
                 sender=self.system_ref,
-                target=actor_ref,
+                target=resolve(actor_ref, message),
                 message=message
             )
         )
@@ -425,7 +1325,55 @@ class ActorSystem:
         self.message_event_queue_lock.release()
         # --------------------------------------------------------------------------------------------------------------
 
+    def publish(self, topic: str, message: Any):
+        """
+        Sends a message to every subscriber of a topic (see Actor.subscribe), once per executor that has subscribers.
+        """
+        event = TopicMessageEvent(
+            topic=topic,
+            sender=self.system_ref,
+            message=message
+        )
+
+        for process_idx in self.topics.interested_processes(topic):
+            self.process_idx_to_queue[process_idx].put(event)
+
+    def ask(self, actor_ref: ActorRef, message: Any, timeout: Optional[float] = None) -> Future:
+        """
+        Sends a message on behalf of a temporary reply address (see AskService).
+        :param timeout: Seconds to wait for a reply, None means no timeout.
+        :return: A future of the first message sent to the reply address (e.g. with Actor.respond).
+            It fails with AskTimeout once the timeout expires, and is cancelled if the system stops.
+        """
+        reply_ref, future = self.asks.register(timeout)
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.message_event_queue_lock.acquire()
+        # ==============================================================================================================
+
+        self.message_event_queue.put(
+            MessageEvent(
+                sender=reply_ref,
+                target=resolve(actor_ref, message),
+                message=message
+            )
+        )
+
+        # ==============================================================================================================
+        self.message_event_queue_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        return future
+
+    async def ask_async(self, actor_ref: ActorRef, message: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Awaitable variant of ask, for asyncio code.
+        """
+        return await asyncio.wrap_future(self.ask(actor_ref, message, timeout))
+
     def run(self):
+        self.asks.start()
+
         for worker in self.workers:
             worker.start()
 
@@ -435,7 +1383,16 @@ class ActorSystem:
         self.outgoing_event_manager.start()
         self.system_event_manager.start()
 
+        # Started after executors are forked, and ready once it listens (see NetworkService.port)
+        if self.network is not None:
+            self.network.start()
+            self.network.listening.wait()
+
     def stop(self):
+        if self.network is not None:
+            self.network.stop()
+            self.network.join()
+
         # --------------------------------------------------------------------------------------------------------------
         self.system_event_queue_lock.acquire()
         # ==============================================================================================================
@@ -457,4 +1414,11 @@ class ActorSystem:
         self.message_event_queue.put(StopSystemExecution())
         self.outgoing_event_manager.join()
 
-        self.manager.shutdown()
+        self.asks.stop()
+        self.asks.join()
+
+        # Segments of messages that were still queued
+        release_segments(self.segment_prefix)
+
+        if self.manager is not None:
+            self.manager.shutdown()
@@ -0,0 +1,126 @@
+import threading
+from typing import Callable, Dict, Iterable, List, Set
+
+from .address import Address
+
+
+class ActorTree:
+    """
+    Parent -> children relations of live actors, so that an actor is killed along with its descendants.
+    Children of the actor system itself are not kept: they are the roots of the tree.
+    Every node of a cluster keeps relations of actors that it has placed, and kills descendants that are hosted
+    by other nodes through their nodes, which kill the rest of the subtree in turn.
+    """
+
+    def __init__(self, root: Address):
+        self.root = root
+
+        self.__children: Dict[Address, Set[Address]] = dict()
+        self.__parents: Dict[Address, Address] = dict()
+
+        self.__lock = threading.Lock()
+
+    def add(self, parent: Address, children: Iterable[Address]):
+        if parent == self.root:
+            return
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        siblings = self.__children.get(parent, None)
+
+        if siblings is None:
+            siblings = self.__children[parent] = set()
+
+        for child in children:
+            siblings.add(child)
+            self.__parents[child] = parent
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def remove(self, addresses: Iterable[Address]) -> List[Address]:
+        """
+        Forgets actors along with their descendants.
+        :return: The actors and their descendants, parents before their children.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        removed = list(dict.fromkeys(addresses))
+        seen = set(removed)
+
+        position = 0
+
+        while position < len(removed):
+            address = removed[position]
+            position += 1
+
+            for child in self.__children.pop(address, ()):
+                if child not in seen:
+                    seen.add(child)
+                    removed.append(child)
+
+            parent = self.__parents.pop(address, None)
+
+            if parent is not None and parent not in seen:
+                siblings = self.__children.get(parent, None)
+
+                if siblings is not None:
+                    siblings.discard(address)
+
+                    if not siblings:
+                        del self.__children[parent]
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        return removed
+
+    def forget(self, addresses: Iterable[Address]):
+        """
+        Forgets relations of actors that are gone without being killed by this node (e.g. actors of a node that
+        has left the cluster). Their children stay alive, as roots.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        for address in addresses:
+            for child in self.__children.pop(address, ()):
+                if self.__parents.get(child, None) == address:
+                    del self.__parents[child]
+
+            parent = self.__parents.pop(address, None)
+            siblings = self.__children.get(parent, None) if parent is not None else None
+
+            if siblings is not None:
+                siblings.discard(address)
+
+                if not siblings:
+                    del self.__children[parent]
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def select(self, predicate: Callable[[Address], bool]) -> List[Address]:
+        """
+        :return: Actors of the tree, parents and children, that satisfy a predicate.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        selected = [address for address in self.__children if predicate(address)]
+        selected.extend(address for address in self.__parents if predicate(address) and address not in self.__children)
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        return selected
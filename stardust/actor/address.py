@@ -0,0 +1,63 @@
+import itertools
+from typing import Union
+
+
+# An actor address is either a path-like string ('System/Parent-<uuid>/Child-<uuid>')
+# or, with SystemConfig(addressing='numeric'), an integer that encodes the actor's location:
+#
+#   | serial | allocator (16 bits) | node (16 bits) | process (16 bits) |
+#
+# where 'allocator' identifies the process that issued the address (0 for the actor system itself,
+# process_idx + 1 for executors), so that serials never collide. An actor system that places an actor on another node
+# of a cluster allocates its address with allocator REMOTE_ALLOCATOR - node_idx (of the issuing node).
+Address = Union[str, int]
+
+ADDRESSING_SCHEMES = ('path', 'numeric')
+
+PROCESS_BITS = 16
+NODE_BITS = 16
+ALLOCATOR_BITS = 16
+
+PROCESS_MASK = (1 << PROCESS_BITS) - 1
+NODE_SHIFT = PROCESS_BITS
+NODE_MASK = (1 << NODE_BITS) - 1
+ALLOCATOR_SHIFT = NODE_SHIFT + NODE_BITS
+ALLOCATOR_MASK = (1 << ALLOCATOR_BITS) - 1
+SERIAL_SHIFT = ALLOCATOR_SHIFT + ALLOCATOR_BITS
+
+REMOTE_ALLOCATOR = ALLOCATOR_MASK
+
+
+def is_numeric(address: Address) -> bool:
+    return type(address) is int
+
+
+def address_process(address: int) -> int:
+    """
+    :return: Index of the process that hosts an actor with given numeric address.
+    """
+    return address & PROCESS_MASK
+
+
+def address_node(address: int) -> int:
+    """
+    :return: Index of the node that hosts an actor with given numeric address.
+    """
+    return (address >> NODE_SHIFT) & NODE_MASK
+
+
+class AddressAllocator:
+    def __init__(self, allocator_idx: int, node_idx: int = 0):
+        assert 0 <= allocator_idx <= ALLOCATOR_MASK, 'Allocator index is out of range.'
+        assert 0 <= node_idx <= NODE_MASK, 'Node index is out of range.'
+
+        self.__prefix = (allocator_idx << ALLOCATOR_SHIFT) | (node_idx << NODE_SHIFT)
+        self.__serials = itertools.count(1)
+
+    def allocate(self, process_idx: int) -> int:
+        """
+        :return: New numeric address of an actor that is going to be hosted by process 'process_idx'.
+        """
+        assert 0 <= process_idx <= PROCESS_MASK, 'Process index is out of range.'
+
+        return (next(self.__serials) << SERIAL_SHIFT) | self.__prefix | process_idx
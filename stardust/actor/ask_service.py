@@ -0,0 +1,121 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from typing import Dict, List, Optional, Tuple
+
+from .actor_events import AskTimeout
+from .actor_ref import ActorRef
+from .address import Address
+from .system_events import MessageEvent
+
+
+def reply_address_prefix(system_address: Address) -> str:
+    """
+    :return: Common prefix of temporary reply addresses of the actor system (see AskService).
+    """
+    return f"{system_address}/ask-"
+
+
+class AskService(threading.Thread):
+    """
+    Asks from outside of the actor system.
+    Every ask gets a temporary reply address, under the system's address, that is not hosted by any executor:
+    executors send messages to it to the actor system, which completes the ask's future with the first one,
+    whether it is a response or a plain message sent to the asker. No actor is spawned per ask, so an outstanding
+    ask costs a future, a dict entry and, with a timeout, a heap entry.
+    """
+
+    def __init__(self, system_ref: ActorRef, *args, **kwargs):
+        super(AskService, self).__init__(*args, **kwargs)
+
+        self.prefix = reply_address_prefix(system_ref.address)
+        self.counter = itertools.count()
+
+        # Reply address -> future of an outstanding ask
+        self.pending: Dict[str, Future] = dict()
+
+        # Heap of (deadline, reply address)
+        self.deadlines: List[Tuple[float, str]] = []
+
+        self.condition = threading.Condition()
+        self.running = True
+
+    def register(self, timeout: Optional[float] = None) -> Tuple[ActorRef, Future]:
+        """
+        :return: A temporary reply address and the future that a message sent to it completes.
+        """
+        reply_address = f"{self.prefix}{next(self.counter)}"
+        future = Future()
+
+        # A cancelled ask is forgotten right away
+        future.add_done_callback(lambda _: self.pending.pop(reply_address, None))
+
+        self.pending[reply_address] = future
+
+        if timeout is not None:
+            with self.condition:
+                heapq.heappush(self.deadlines, (time.monotonic() + timeout, reply_address))
+
+                # Wake the service up if the new deadline is the closest one
+                if self.deadlines[0][1] == reply_address:
+                    self.condition.notify()
+
+        return ActorRef(reply_address), future
+
+    def is_reply_address(self, address: Address) -> bool:
+        return isinstance(address, str) and address.startswith(self.prefix)
+
+    def complete(self, event: MessageEvent) -> bool:
+        """
+        :return: False if the event is not addressed to a reply address. Replies that are not awaited are dropped.
+        """
+        if not self.is_reply_address(event.target.address):
+            return False
+
+        future = self.pending.pop(event.target.address, None)
+
+        if future is not None:
+            try:
+                future.set_result(event.message)
+
+            except InvalidStateError:
+                # Cancelled meanwhile
+                pass
+
+        return True
+
+    def expire(self):
+        now = time.monotonic()
+
+        while self.deadlines and self.deadlines[0][0] <= now:
+            _, reply_address = heapq.heappop(self.deadlines)
+            future = self.pending.pop(reply_address, None)
+
+            if future is None:
+                continue
+
+            try:
+                future.set_exception(AskTimeout(f"No reply to {reply_address} within the timeout."))
+
+            except InvalidStateError:
+                pass
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+    def run(self) -> None:
+        with self.condition:
+            while self.running:
+                self.expire()
+
+                timeout = max(self.deadlines[0][0] - time.monotonic(), 0) if self.deadlines else None
+                self.condition.wait(timeout)
+
+        for future in list(self.pending.values()):
+            future.cancel()
+
+        self.pending.clear()
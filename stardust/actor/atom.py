@@ -1,16 +1,27 @@
-from typing import Optional
+import pickle
+import inspect
+from functools import partial
+from concurrent.futures import Future
+from typing import Optional, Generator, AsyncGenerator, Any, Callable
 
 from stardust.actor import Actor
-from .actor_ref import ActorRef
-from .mailbox import Mailbox
+from .mailbox import Mailbox, create_mailbox
+from .config import BLOCKING_DISPATCHER
+from .serialized_atom import SerializedAtom
 from .system_events import MessageEvent
+from .system_messages import PoisonPillMessage
 from .actor_events import (
-    ActorEvent, SendEvent, AskEvent, ResponseEvent,
-    SpawnEvent, KillEvent,
-    StashEvent, UnstashEvent
+    SendEvent, AskEvent, ResponseEvent,
+    SpawnEvent, SpawnManyEvent, KillEvent, AwaitEvent, BlockingEvent,
+    SubscribeEvent, UnsubscribeEvent, PublishEvent,
+    AskTimeout
 )
 
 
+# Events that an actor yields without waiting for anything back
+ONE_WAY_EVENTS = (SendEvent, KillEvent, SubscribeEvent, UnsubscribeEvent, PublishEvent)
+
+
 class Status:
     pass
 
@@ -18,11 +29,32 @@ class Status:
 Done = Status()
 
 
+class Suspension:
+    """
+    A turn of an actor that is parked until a response to its ask arrives, or the ask times out,
+    or until a step of it is done on the event loop ('async def receive') or on the thread pool (blocking dispatcher).
+    """
+    __slots__ = ('generator', 'context_code', 'response', 'error', 'ready', 'task')
+
+    def __init__(self, generator: Generator, context_code: Optional[int]):
+        self.generator = generator
+        self.context_code = context_code
+        self.response: Any = None
+        self.error: Optional[BaseException] = None
+        self.ready = False
+        self.task: Optional[Future] = None  # the step that runs on the event loop or on the thread pool
+
+
 class Atom:
+    __slots__ = ('__actor', '__mailbox', 'scheduled')
+
     def __init__(self, actor: Actor, mailbox: Mailbox):
         self.__actor = actor
         self.__mailbox = mailbox
 
+        # Whether the atom is in the executor's ready queue (or is being executed)
+        self.scheduled = False
+
     @property
     def actor(self) -> Actor:
         return self.__actor
@@ -31,8 +63,8 @@ class Atom:
     def mailbox(self) -> Mailbox:
         return self.__mailbox
 
-    def enqueue(self, event: MessageEvent):
-        self.__mailbox.enqueue(event)
+    def enqueue(self, event: MessageEvent) -> bool:
+        return self.__mailbox.enqueue(event)
 
     def dequeue(self) -> Optional[MessageEvent]:
         return self.__mailbox.dequeue()
@@ -40,33 +72,208 @@ class Atom:
     def awaits_execution(self) -> bool:
         return len(self.__mailbox) > 0
 
+    def serialize(self) -> SerializedAtom:
+        """
+        Packs the actor and its pending messages, so that the actor can be moved to another process.
+        Raises an exception if the actor's state can not be pickled.
+        """
+        return SerializedAtom(
+            address=self.__actor.address,
+            actor_data=pickle.dumps(self.__actor),
+            mailbox_data=pickle.dumps(self.__mailbox.events),
+            mailbox_config=self.__mailbox.config
+        )
+
+    @staticmethod
+    def deserialize(serialized: SerializedAtom) -> 'Atom':
+        actor = pickle.loads(serialized.actor_data)
+
+        mailbox = create_mailbox(
+            actor=actor,
+            config=serialized.mailbox_config,
+            initial_mailbox=pickle.loads(serialized.mailbox_data)
+        )
+
+        return Atom(actor=actor, mailbox=mailbox)
+
     def execute(self):
         event = self.dequeue()
 
+        if event is not None and type(event.message) is PoisonPillMessage:
+            # A soft kill: messages that were queued before the pill have been processed
+            yield KillEvent(sender=event.sender, target=self.actor.ref)
+            event = None
+
         if event is not None:
-            generator = self.actor.behavior(event.message, event.sender)
+            blocking = self.actor.dispatcher == BLOCKING_DISPATCHER
+
+            if blocking:
+                generator = yield BlockingEvent(call=partial(self.actor.behavior, event.message, event.sender))
+
+            else:
+                generator = self.actor.behavior(event.message, event.sender)
 
-            if generator is not None:
+            if inspect.iscoroutine(generator):
+                # 'async def receive' that does not yield actor events
+                try:
+                    yield AwaitEvent(awaitable=generator)
+
+                except AskTimeout:
+                    pass
+
+            elif inspect.isasyncgen(generator):
+                yield from self.execute_async(event, generator)
+
+            elif blocking and generator is not None:
+                yield from self.execute_blocking(event, generator)
+
+            elif generator is not None:
                 try:
                     actor_event = next(generator)
 
                     while True:
-                        if isinstance(actor_event, SpawnEvent):
+                        if isinstance(actor_event, SpawnEvent) or isinstance(actor_event, SpawnManyEvent):
                             actor_ref = yield actor_event
 
                             actor_event = generator.send(actor_ref)
                             continue
 
-                        elif isinstance(actor_event, KillEvent)\
-                                or isinstance(actor_event, SendEvent):
+                        elif isinstance(actor_event, ONE_WAY_EVENTS):
 
                             yield actor_event
                             actor_event = next(generator)
 
+                        elif isinstance(actor_event, AskEvent):
+                            # The executor parks this generator until the response arrives
+                            try:
+                                response = yield actor_event
+
+                            except AskTimeout as e:
+                                actor_event = generator.throw(e)
+
+                            else:
+                                actor_event = generator.send(response)
+
+                        elif isinstance(actor_event, ResponseEvent):
+                            yield self.reply(event, actor_event)
+
+                            actor_event = next(generator)
+
+                        else:
+                            raise unknown_event(self.actor, actor_event)
+
                 except StopIteration:
                     pass
 
+                except AskTimeout:
+                    # Not handled by the actor
+                    pass
+
         yield Done
 
+    def execute_async(self, event: MessageEvent, generator: AsyncGenerator) -> Generator:
+        """
+        Same as execute, for an 'async def receive' that yields actor events.
+        Code between actor events runs on the executor's event loop, yielded events are carried out by the executor.
+        """
+        step = generator.asend(None)
+
+        while True:
+            try:
+                actor_event = yield AwaitEvent(awaitable=step)
+
+            except (StopAsyncIteration, AskTimeout):
+                return
+
+            if isinstance(actor_event, SpawnEvent) or isinstance(actor_event, SpawnManyEvent):
+                actor_ref = yield actor_event
+                step = generator.asend(actor_ref)
+
+            elif isinstance(actor_event, ONE_WAY_EVENTS):
+                yield actor_event
+                step = generator.asend(None)
+
+            elif isinstance(actor_event, AskEvent):
+                try:
+                    response = yield actor_event
+
+                except AskTimeout as e:
+                    step = generator.athrow(e)
+
+                else:
+                    step = generator.asend(response)
+
+            elif isinstance(actor_event, ResponseEvent):
+                yield self.reply(event, actor_event)
+                step = generator.asend(None)
+
+            else:
+                raise unknown_event(self.actor, actor_event)
+
+    def execute_blocking(self, event: MessageEvent, generator: Generator) -> Generator:
+        """
+        Same as execute, for actors of the blocking dispatcher.
+        Code between actor events runs on the executor's thread pool, yielded events are carried out by the executor.
+        """
+        try:
+            actor_event = yield BlockingEvent(call=partial(advance, generator.send, None))
+
+            while actor_event is not Done:
+                if isinstance(actor_event, SpawnEvent) or isinstance(actor_event, SpawnManyEvent):
+                    actor_ref = yield actor_event
+                    step = partial(advance, generator.send, actor_ref)
+
+                elif isinstance(actor_event, ONE_WAY_EVENTS):
+                    yield actor_event
+                    step = partial(advance, generator.send, None)
+
+                elif isinstance(actor_event, AskEvent):
+                    try:
+                        response = yield actor_event
+
+                    except AskTimeout as e:
+                        step = partial(advance, generator.throw, e)
+
+                    else:
+                        step = partial(advance, generator.send, response)
+
+                elif isinstance(actor_event, ResponseEvent):
+                    yield self.reply(event, actor_event)
+                    step = partial(advance, generator.send, None)
+
+                else:
+                    raise unknown_event(self.actor, actor_event)
+
+                actor_event = yield BlockingEvent(call=step)
+
+        except AskTimeout:
+            # Not handled by the actor
+            pass
+
+    def reply(self, event: MessageEvent, actor_event: ResponseEvent) -> SendEvent:
+        return SendEvent(
+            sender=self.actor.ref,
+            target=event.sender,
+            message=actor_event.message,
+            context_code=event.context_code,
+            response=event.context_code is not None
+        )
+
+
+def advance(method: Callable[[Any], Any], value: Any) -> Any:
+    """
+    Sends a value (or throws an exception) into an actor's generator.
+    :return: The next event yielded by the actor, or Done.
+    """
+    try:
+        return method(value)
+
+    except StopIteration:
+        return Done
 
 
+def unknown_event(actor: Actor, actor_event: Any) -> TypeError:
+    """
+    :return: Error for an object yielded by an actor's receive that is not an actor event.
+    """
+    return TypeError(f"Actor '{actor.address}' yielded {actor_event!r}, which is not an actor event.")
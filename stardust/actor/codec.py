@@ -0,0 +1,432 @@
+import os
+import pickle
+import struct
+import itertools
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .actor_ref import ActorRef
+from .address import Address
+from .shared_buffers import SHARED_MEMORY_SUPPORTED, aligned, segment_size, write_segment, read_segment
+from .system_events import MessageEvent, MessageBatchEvent, new_message_event
+
+
+# How events are put on the wire: 'binary' (see BinaryCodec) or 'pickle' (every event pickled as a whole)
+BINARY = 'binary'
+PICKLE = 'pickle'
+
+CODECS = (BINARY, PICKLE)
+
+# Frame kinds
+PICKLED_FRAME = 0  # any event, pickled as a whole
+MESSAGE_FRAME = 1  # a MessageEvent
+BATCH_FRAME = 2    # a MessageBatchEvent
+
+# | kind | writer token (8 bytes) | size of new address definitions | number of messages |
+# A pickled frame is | kind | serializer |, followed by the pickled event.
+FRAME_HEADER = struct.Struct('<B8sII')
+PICKLED_FRAME_HEADER = struct.Struct('<BB')
+
+# | flags | sender id | target id | serializer | payload size |, followed by the context code of an ask or
+# a response (if the flags say so) and by the payload
+MESSAGE_HEADER = struct.Struct('<BIIBI')
+CONTEXT_CODE = struct.Struct('<q')
+
+HAS_CONTEXT_CODE = 1
+RESPONSE = 2
+
+MIN_CONTEXT_CODE = -(1 << 63)
+MAX_CONTEXT_CODE = (1 << 63) - 1
+
+# Interned addresses per connection. Messages of a connection with a full table are pickled as a whole.
+MAX_INTERNED_ADDRESSES = 1 << 20
+
+# Payload serializers. Codes below USER_SERIALIZERS are reserved for the built-in ones.
+PICKLE_SERIALIZER = 0
+BYTES_SERIALIZER = 1
+STR_SERIALIZER = 2
+SHARED_PICKLE_SERIALIZER = 3  # pickled with out-of-band buffers in a shared memory segment
+SHARED_BYTES_SERIALIZER = 4   # bytes in a shared memory segment
+
+# | number of out-of-band buffers | size of pickled data |, followed by sizes of the buffers, the pickled data
+# and the segment's name
+SHARED_PICKLE_HEADER = struct.Struct('<IQ')
+
+# | size of bytes |, followed by the segment's name
+SHARED_BYTES_HEADER = struct.Struct('<Q')
+
+USER_SERIALIZERS = 16
+
+
+class Serializer:
+    __slots__ = ('code', 'dumps', 'loads')
+
+    def __init__(self, code: int, dumps: Callable[[Any], bytes], loads: Callable[[bytes], Any]):
+        self.code = code
+        self.dumps = dumps
+        self.loads = loads
+
+
+def _dumps(message: Any) -> bytes:
+    return pickle.dumps(message, protocol=5)
+
+
+_default_serializer = Serializer(PICKLE_SERIALIZER, _dumps, pickle.loads)
+
+# Message type -> serializer of its payloads, and serializer code -> serializer
+_serializers: Dict[type, Serializer] = {
+    bytes: Serializer(BYTES_SERIALIZER, bytes, bytes),
+    str: Serializer(STR_SERIALIZER, str.encode, lambda data: str(data, 'utf-8')),
+}
+
+_serializers_by_code: Dict[int, Serializer] = {
+    serializer.code: serializer
+    for serializer in [_default_serializer, *_serializers.values()]
+}
+
+
+def register_serializer(message_type: type,
+                        code: int,
+                        dumps: Callable[[Any], bytes],
+                        loads: Callable[[bytes], Any]):
+    """
+    Serializes messages of a type (exactly that type, not its subclasses) with given functions instead of pickle,
+    e.g. with msgpack. Every process has to register the same serializers, so they are best registered when
+    the module that defines the message type is imported, before the actor system is started.
+    :param code: Identifies the serializer on the wire, from USER_SERIALIZERS to 255.
+    :param loads: Gets a bytes-like object (a memoryview of the received frame).
+    """
+    assert USER_SERIALIZERS <= code <= 255, f'Serializer code must be in [{USER_SERIALIZERS}, 255].'
+
+    registered = _serializers_by_code.get(code, None)
+    assert registered is None or registered is _serializers.get(message_type, None), \
+        f'Serializer code {code} is already taken.'
+
+    serializer = Serializer(code, dumps, loads)
+
+    _serializers[message_type] = serializer
+    _serializers_by_code[code] = serializer
+
+
+class BinaryCodec:
+    """
+    Encodes events that go over one queue.
+    Messages get a fixed binary header, and their payloads are serialized according to their type
+    (see register_serializer). Sender and target addresses are interned per connection (a writing process
+    and the queue): an address is sent once, and then referred to by its position in the connection's table.
+    Other events are pickled as a whole.
+
+    Every writing process has its own token and table. New addresses are defined in the frame that uses them
+    first, so frames of a connection have to be put in the order they are encoded (see CodecQueue).
+    The reading process keeps a table of refs per token.
+
+    Payloads that are pickled with at least 'shared_memory_threshold' bytes of out-of-band buffers (pickle
+    protocol 5, e.g. NumPy arrays), as well as bytes of that size, are not copied into the frame: they are put
+    into a shared memory segment, and the reader gets objects that are backed by the segment.
+    A segment has a single reader, which maps it and unlinks it right away, so the segment is freed
+    as soon as the last of these objects is gone (see stardust.actor.shared_buffers).
+    """
+
+    def __init__(self, shared_memory_threshold: int = 0, segment_prefix: str = 'stardust'):
+        """
+        :param shared_memory_threshold: 0 means that payloads are never put into shared memory.
+        :param segment_prefix: Names of shared memory segments start with it.
+        """
+        self.__token = os.urandom(8)
+
+        self.shared_memory_threshold = shared_memory_threshold if SHARED_MEMORY_SUPPORTED else 0
+        self.segment_prefix = f"{segment_prefix}-{self.__token[:4].hex()}"
+        self.segment_counter = itertools.count()
+
+        # Address -> its position in this writer's table
+        self.__ids: Dict[Address, int] = dict()
+
+        # Writer token -> refs of its table
+        self.__tables: Dict[bytes, List[ActorRef]] = dict()
+
+    def encode(self, event: Any) -> bytes:
+        if type(event) is MessageEvent:
+            events = [event]
+
+        elif type(event) is MessageBatchEvent:
+            events = event.events
+
+        else:
+            return self.__pickle_frame(event, [])
+
+        new_addresses = []
+        parts = [b'']
+
+        for message_event in events:
+            sender, target = message_event.sender, message_event.target
+
+            # Routers and other kinds of refs are pickled
+            if type(sender) is not ActorRef or type(target) is not ActorRef:
+                return self.__pickle_frame(event, new_addresses)
+
+            sender_id = self.__intern(sender.address, new_addresses)
+            target_id = self.__intern(target.address, new_addresses)
+
+            if sender_id is None or target_id is None:
+                return self.__pickle_frame(event, new_addresses)
+
+            code, payload = self.__serialize(message_event.message)
+
+            flags = RESPONSE if message_event.response else 0
+            context_code = message_event.context_code
+
+            if context_code is not None:
+                if not MIN_CONTEXT_CODE <= context_code <= MAX_CONTEXT_CODE:
+                    return self.__pickle_frame(event, new_addresses)
+
+                flags |= HAS_CONTEXT_CODE
+
+            parts.append(MESSAGE_HEADER.pack(flags, sender_id, target_id, code, len(payload)))
+
+            if context_code is not None:
+                parts.append(CONTEXT_CODE.pack(context_code))
+
+            parts.append(payload)
+
+        definitions = pickle.dumps(new_addresses, protocol=5) if new_addresses else b''
+
+        parts[0] = FRAME_HEADER.pack(
+            MESSAGE_FRAME if type(event) is MessageEvent else BATCH_FRAME,
+            self.__token,
+            len(definitions),
+            len(events)
+        ) + definitions
+
+        return b''.join(parts)
+
+    def decode(self, data: bytes) -> Any:
+        if data[0] == PICKLED_FRAME:
+            return self.__deserialize(data[1], memoryview(data)[PICKLED_FRAME_HEADER.size:])
+
+        kind, token, definitions_size, count = FRAME_HEADER.unpack_from(data)
+        table = self.__tables.get(token, None)
+
+        if table is None:
+            table = self.__tables[token] = []
+
+        offset = FRAME_HEADER.size
+
+        if definitions_size:
+            table.extend(ActorRef(address) for address in pickle.loads(data[offset:offset + definitions_size]))
+            offset += definitions_size
+
+        events = []
+        view = memoryview(data)
+
+        for _ in range(count):
+            flags, sender_id, target_id, code, size = MESSAGE_HEADER.unpack_from(data, offset)
+            offset += MESSAGE_HEADER.size
+
+            context_code = None
+
+            if flags & HAS_CONTEXT_CODE:
+                context_code = CONTEXT_CODE.unpack_from(data, offset)[0]
+                offset += CONTEXT_CODE.size
+
+            events.append(
+                new_message_event(
+                    table[sender_id],
+                    table[target_id],
+                    self.__deserialize(code, view[offset:offset + size]),
+                    context_code,
+                    bool(flags & RESPONSE)
+                )
+            )
+
+            offset += size
+
+        if kind == MESSAGE_FRAME:
+            return events[0]
+
+        return MessageBatchEvent(events=events)
+
+    def __intern(self, address: Address, new_addresses: List[Address]) -> Optional[int]:
+        """
+        :return: Position of an address in this writer's table, or None if the table is full.
+        """
+        address_id = self.__ids.get(address, None)
+
+        if address_id is None:
+            if len(self.__ids) >= MAX_INTERNED_ADDRESSES:
+                return None
+
+            address_id = self.__ids[address] = len(self.__ids)
+            new_addresses.append(address)
+
+        return address_id
+
+    def __pickle_frame(self, event: Any, new_addresses: List[Address]) -> bytes:
+        # Addresses interned for this frame are not going to be defined, so they are forgotten
+        for address in new_addresses:
+            del self.__ids[address]
+
+        code, payload = self.__pickle(event)
+
+        return PICKLED_FRAME_HEADER.pack(PICKLED_FRAME, code) + payload
+
+    def __serialize(self, message: Any) -> Tuple[int, bytes]:
+        """
+        :return: Serializer code and payload of a message.
+        """
+        serializer = _serializers.get(type(message), None)
+
+        if serializer is None:
+            return self.__pickle(message)
+
+        if serializer.code == BYTES_SERIALIZER and 0 < self.shared_memory_threshold <= len(message):
+            name = self.__segment_name()
+
+            try:
+                write_segment(name, [memoryview(message)])
+
+            except OSError:
+                # E.g. there is no room left for shared memory
+                pass
+
+            else:
+                return SHARED_BYTES_SERIALIZER, SHARED_BYTES_HEADER.pack(len(message)) + name.encode()
+
+        return serializer.code, serializer.dumps(message)
+
+    def __pickle(self, message: Any) -> Tuple[int, bytes]:
+        if self.shared_memory_threshold <= 0:
+            return PICKLE_SERIALIZER, pickle.dumps(message, protocol=5)
+
+        buffers: List[pickle.PickleBuffer] = []
+        data = pickle.dumps(message, protocol=5, buffer_callback=buffers.append)
+
+        if not buffers:
+            return PICKLE_SERIALIZER, data
+
+        try:
+            views = [buffer.raw() for buffer in buffers]
+
+        except BufferError:
+            # Not contiguous
+            views = []
+
+        sizes = [view.nbytes for view in views]
+
+        if views and sum(sizes) >= self.shared_memory_threshold:
+            name = self.__segment_name()
+
+            try:
+                write_segment(name, views)
+
+            except OSError:
+                pass
+
+            else:
+                return SHARED_PICKLE_SERIALIZER, b''.join([
+                    SHARED_PICKLE_HEADER.pack(len(sizes), len(data)),
+                    struct.pack(f'<{len(sizes)}Q', *sizes),
+                    data,
+                    name.encode()
+                ])
+
+        # Small buffers are copied into the payload, as usual
+        return PICKLE_SERIALIZER, pickle.dumps(message, protocol=5)
+
+    def __deserialize(self, code: int, payload: memoryview) -> Any:
+        if code == SHARED_PICKLE_SERIALIZER:
+            count, data_size = SHARED_PICKLE_HEADER.unpack_from(payload)
+            sizes = struct.unpack_from(f'<{count}Q', payload, SHARED_PICKLE_HEADER.size)
+
+            offset = SHARED_PICKLE_HEADER.size + 8 * count
+            data = payload[offset:offset + data_size]
+
+            segment = read_segment(str(payload[offset + data_size:], 'utf-8'), segment_size(sizes))
+            buffers = []
+            offset = 0
+
+            for size in sizes:
+                buffers.append(segment[offset:offset + size])
+                offset += aligned(size)
+
+            return pickle.loads(data, buffers=buffers)
+
+        if code == SHARED_BYTES_SERIALIZER:
+            size, = SHARED_BYTES_HEADER.unpack_from(payload)
+            segment = read_segment(str(payload[SHARED_BYTES_HEADER.size:], 'utf-8'), max(size, 1))
+
+            # Immutable bytes can not be backed by the segment, so they are copied out of it once
+            with segment:
+                return bytes(segment[:size])
+
+        return _serializers_by_code[code].loads(payload)
+
+    def __segment_name(self) -> str:
+        return f"{self.segment_prefix}-{next(self.segment_counter)}"
+
+
+class CodecQueue:
+    """
+    Queue that puts events encoded by a BinaryCodec into another queue.
+    Encoding and putting happen under a lock, so that frames of every connection arrive in the order they were
+    encoded, whichever thread puts them. A process that starts to use a queue it has inherited from its parent
+    (or gets it pickled) begins a new connection.
+    """
+
+    def __init__(self, queue: Any, shared_memory_threshold: int = 0, segment_prefix: str = 'stardust'):
+        self.queue = queue
+
+        self.shared_memory_threshold = shared_memory_threshold
+        self.segment_prefix = segment_prefix
+
+        self.__reset()
+
+    def put(self, event: Any):
+        if self.__pid != os.getpid():
+            self.__reset()
+
+        with self.__lock:
+            self.__put(self.__codec.encode(event))
+
+    def get(self) -> Any:
+        if self.__pid != os.getpid():
+            self.__reset()
+
+        return self.__codec.decode(self.__get())
+
+    def __reset(self):
+        self.__pid = os.getpid()
+        self.__codec = BinaryCodec(self.shared_memory_threshold, self.segment_prefix)
+        self.__lock = threading.Lock()
+
+        # Queues that move bytes as they are skip pickling of encoded frames
+        self.__put: Callable[[bytes], None] = getattr(self.queue, 'put_bytes', self.queue.put)
+        self.__get: Callable[[], bytes] = getattr(self.queue, 'get_bytes', self.queue.get)
+
+    def __getstate__(self):
+        return self.queue, self.shared_memory_threshold, self.segment_prefix
+
+    def __setstate__(self, state: Tuple[Any, int, str]):
+        self.queue, self.shared_memory_threshold, self.segment_prefix = state
+        self.__reset()
+
+
+def wrap_queue(queue: Any, codec: str, shared_memory_threshold: int = 0, segment_prefix: str = 'stardust') -> Any:
+    """
+    :param codec: One of CODECS. Only the binary codec puts payloads into shared memory.
+    :return: A queue that puts events on the wire with given codec.
+    """
+    if codec == BINARY:
+        return CodecQueue(queue, shared_memory_threshold, segment_prefix)
+
+    elif codec == PICKLE:
+        return queue
+
+    raise ValueError(f"Unknown codec '{codec}', expected one of {CODECS}.")
+
+
+def wire_size(event: Any, codec: Optional[BinaryCodec] = None) -> Tuple[int, int]:
+    """
+    :return: Bytes taken on the wire by an event pickled as a whole, and encoded by a codec (the codec's state
+        is updated, so that an address takes room only the first time it is sent).
+    """
+    return len(pickle.dumps(event)), len((codec or BinaryCodec()).encode(event))
@@ -1,9 +1,119 @@
 from dataclasses import dataclass
+from typing import Optional, Tuple
 
 
 @dataclass(frozen=True)
 class SystemConfig:
     num_processes: int = 2
+
+    # Clustering (see stardust.actor.network_service): with 'cluster' on, the actor system listens on 'host':'port'
+    # (0 - any free port) and joins nodes listed in 'seeds' ('host:port'), along with every node they know.
+    # Every node of a cluster has its own 'node_idx'. Workers of other nodes are placement targets as well.
+    # Nodes of a cluster share a 'secret': a node that connects proves it knows the secret before anything it sends
+    # is decoded. Events that nodes exchange carry pickled messages and actor types to run, and they are neither
+    # encrypted nor signed past that handshake, so the port must never be exposed beyond a trusted network.
+    cluster: bool = False
+    host: str = '127.0.0.1'
     port: int = 8888
+    node_idx: int = 0
+    seeds: Tuple[str, ...] = ()
+    secret: str = ''
+
+    # Interprocess transport: 'queue', 'connection' or 'manager' (see stardust.actor.transport)
+    transport: str = 'queue'
+
+    # How events are encoded on the wire: 'binary' or 'pickle' (see stardust.actor.codec)
+    codec: str = 'binary'
+
+    # With the binary codec, payloads of at least 'shared_memory_threshold' bytes (bytes, or buffers of objects
+    # that support pickle protocol 5, such as NumPy arrays) are passed through shared memory instead of
+    # being copied through the transport (0 - never)
+    shared_memory_threshold: int = 1 << 20
+
+    # Actor addressing scheme: 'path' or 'numeric' (see stardust.actor.address)
+    addressing: str = 'path'
+
+    # Outgoing messages are batched per destination process. A batch is sent once it holds 'batch_size' messages,
+    # once it is older than 'batch_linger' seconds (0 - at the end of every actor turn), or when the executor is idle.
+    batch_size: int = 64
+    batch_linger: float = 0.0
+
+    # An actor processes up to 'throughput' messages per turn before the executor moves on to the next ready actor.
+    # A turn also ends after 'throughput_deadline' seconds (0 - no deadline), so that slow actors do not starve others.
+    throughput: int = 5
+    throughput_deadline: float = 0.0
+
+    # Idle executors steal ready actors (with their pending messages) from executors that have more than
+    # 'steal_threshold' actors waiting in the ready queue, asking one executor every 'steal_interval' seconds.
+    # Only actors that can be pickled are moved.
+    work_stealing: bool = False
+    steal_threshold: int = 2
+    steal_interval: float = 0.05
+
+    # Placement of new actors: 'type_spread', 'least_loaded' or 'power_of_two'
+    # (see stardust.actor.load_balancing_service).
+    # Executors report their load every 'stats_interval' seconds (0 - never).
+    placement: str = 'type_spread'
+    stats_interval: float = 0.5
+
+    # Communication affinity: executors sample one of every 'affinity_sampling' messages sent to other processes
+    # (0 - off), and report them with their load. Every 'affinity_interval' seconds, actors that mostly talk to actors
+    # of another process are suggested to move there ('suggest', see ActorSystem.affinity_suggestions),
+    # or moved ('auto').
+    affinity_sampling: int = 0
+    affinity: str = 'suggest'
+    affinity_interval: float = 1.0
+
+    # Actors of the 'blocking' dispatcher (see Actor.dispatcher) run on a pool of 'blocking_pool_size' threads
+    # of their executor, so that blocking calls do not stall other actors.
+    blocking_pool_size: int = 4
+
+    # spawn_many ships actors to executors in batches of up to 'spawn_batch_size' actors
+    spawn_batch_size: int = 10000
+
+    # Dead letters (see stardust.actor.dead_letters): the actor system holds messages for actors that are not routable
+    # yet (being spawned, or unknown) - up to 'pending_capacity' messages in total, for up to 'pending_ttl' seconds.
+    # Addresses of killed actors are remembered by every process for 'tombstone_ttl' seconds (up to
+    # 'tombstone_capacity' of them), and messages sent to them are dropped. Dropped messages are counted,
+    # and the latest 'dead_letter_samples' of them are kept (see ActorSystem.dead_letters).
+    pending_capacity: int = 100000
+    pending_ttl: float = 30.0
+    tombstone_capacity: int = 100000
+    tombstone_ttl: float = 60.0
+    dead_letter_samples: int = 100
 
     # Good enough for MVP
+
+    def __post_init__(self):
+        assert not self.cluster or self.secret, 'A cluster requires a shared secret.'
+
+
+# Where actors of a type run
+DEFAULT_DISPATCHER = 'default'    # on the executor's thread, one actor at a time
+BLOCKING_DISPATCHER = 'blocking'  # on the executor's thread pool, for actors that make blocking calls
+
+DISPATCHERS = (DEFAULT_DISPATCHER, BLOCKING_DISPATCHER)
+
+
+# What happens to a message that arrives at a full mailbox
+DROP_NEWEST = 'drop_newest'  # the arrived message is dropped
+DROP_OLDEST = 'drop_oldest'  # the oldest queued message is dropped to make room for the arrived one
+REJECT = 'reject'            # the arrived message is sent back to its sender, wrapped into MailboxOverflowMessage
+
+# There is no policy that makes the arrived message wait for room: senders never block, so waiting messages would
+# pile up without bound in front of the mailbox, defeating its capacity. REJECT is the backpressure signal - a sender
+# that gets MailboxOverflowMessage back can slow down, and send the message again later.
+OVERFLOW_POLICIES = (DROP_NEWEST, DROP_OLDEST, REJECT)
+
+
+@dataclass(frozen=True)
+class MailboxConfig:
+    capacity: Optional[int] = None  # None means unbounded
+    overflow_policy: str = DROP_NEWEST
+
+    # Use a priority mailbox: control messages go first, then messages ordered by Actor.message_priority
+    priority: bool = False
+
+    def __post_init__(self):
+        assert self.capacity is None or self.capacity > 0, 'Mailbox capacity must be positive.'
+        assert self.overflow_policy in OVERFLOW_POLICIES, f'Overflow policy must be one of {OVERFLOW_POLICIES}.'
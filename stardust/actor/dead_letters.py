@@ -0,0 +1,290 @@
+import time
+import threading
+from collections import deque, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from .address import Address
+from .system_messages import RelayFenceMessage
+
+
+# Why a message was not delivered
+KILLED = 'killed'            # its target was killed before it got to the message, or recently (see Tombstones)
+EXPIRED = 'expired'          # its target did not become routable within 'pending_ttl' seconds
+OVERFLOW = 'overflow'        # the actor system held 'pending_capacity' messages for targets that were not routable
+UNREACHABLE = 'unreachable'  # its target is hosted by a node that has left the cluster
+MAILBOX_FULL = 'mailbox_full'  # its target's mailbox was full, and the overflow policy dropped it (or a rejection)
+
+DEAD_LETTER_REASONS = (KILLED, EXPIRED, OVERFLOW, UNREACHABLE, MAILBOX_FULL)
+
+
+@dataclass(frozen=True)
+class DeadLetter:
+    reason: str
+    sender: Address
+    target: Address
+    message_type: str  # messages themselves are not kept
+    timestamp: float   # time.time() of the drop
+
+
+@dataclass
+class DeadLetterStats:
+    counts: Dict[str, int] = field(default_factory=dict)  # reason -> messages dropped since the system started
+    samples: List[DeadLetter] = field(default_factory=list)  # the latest dead letters, oldest first
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+
+class DeadLetters:
+    """
+    Counts messages that could not be delivered, by reason, and keeps a sample of the latest ones.
+    Executors report theirs with their load (see WorkerStatsEvent), and the actor system adds them up with its own.
+    """
+
+    def __init__(self, sample_size: int = 100):
+        self.__counts: Dict[str, int] = dict()
+        self.__samples: Deque[DeadLetter] = deque(maxlen=sample_size)
+
+        # Process -> counts as of its last report
+        self.__reported: Dict[int, Dict[str, int]] = dict()
+
+        self.__lock = threading.Lock()
+
+    def record(self, events: Iterable[Any], reason: str):
+        """
+        :param events: MessageEvents that were dropped.
+        """
+        now = time.time()
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        for event in events:
+            # Fences of relayed messages are not sent by anyone
+            if type(event.message) is RelayFenceMessage:
+                continue
+
+            self.__counts[reason] = self.__counts.get(reason, 0) + 1
+
+            self.__samples.append(
+                DeadLetter(
+                    reason=reason,
+                    sender=event.sender.address,
+                    target=event.target.address,
+                    message_type=type(event.message).__name__,
+                    timestamp=now
+                )
+            )
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def take_report(self) -> DeadLetterStats:
+        """
+        :return: Counts since the start, and samples since the previous report, which are forgotten.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        report = DeadLetterStats(counts=dict(self.__counts), samples=list(self.__samples))
+        self.__samples.clear()
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        return report
+
+    def update(self, process_idx: int, report: DeadLetterStats):
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        self.__reported[process_idx] = report.counts
+        self.__samples.extend(report.samples)
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def stats(self) -> DeadLetterStats:
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        counts = dict(self.__counts)
+
+        for reported in self.__reported.values():
+            for reason, count in reported.items():
+                counts[reason] = counts.get(reason, 0) + count
+
+        samples = sorted(self.__samples, key=lambda dead_letter: dead_letter.timestamp)
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        return DeadLetterStats(counts=counts, samples=samples)
+
+
+class Tombstones:
+    """
+    Addresses of recently killed actors (or of actors of a node that has left the cluster): messages sent to them
+    are dropped where they turn out to be unroutable, instead of being held for actors that are never going to start.
+    Holds up to 'capacity' addresses (the oldest are forgotten first), for 'ttl' seconds each. An address that is
+    spawned again (e.g. a named actor) is revived.
+    """
+
+    def __init__(self, capacity: int, ttl: float):
+        self.capacity = capacity
+        self.ttl = ttl
+
+        # Address -> (when its tombstone expires, reason to drop its messages), oldest first
+        self.__deaths: OrderedDict = OrderedDict()
+
+        self.__lock = threading.Lock()
+
+    def __contains__(self, address: Address) -> bool:
+        return self.cause(address) is not None
+
+    def cause(self, address: Address) -> Optional[str]:
+        """
+        :return: Reason to drop messages sent to an address (see DEAD_LETTER_REASONS), or None if it is not buried.
+        """
+        if not self.__deaths:
+            return None
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        death = self.__deaths.get(address, None)
+
+        if death is not None and death[0] < time.monotonic():
+            del self.__deaths[address]
+            death = None
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        return death[1] if death is not None else None
+
+    def bury(self, addresses: Iterable[Address], reason: str = KILLED):
+        death = (time.monotonic() + self.ttl, reason)
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        for address in addresses:
+            self.__deaths.pop(address, None)
+            self.__deaths[address] = death
+
+        while len(self.__deaths) > self.capacity:
+            self.__deaths.popitem(last=False)
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def revive(self, addresses: Iterable[Address]):
+        if not self.__deaths:
+            return
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        for address in addresses:
+            self.__deaths.pop(address, None)
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+
+class PendingMessages:
+    """
+    Messages for actors that are not routable yet: actors that are being spawned, and unknown ones (e.g. hosted
+    by another node of the cluster, whose route is being resolved). Holds up to 'capacity' messages in total,
+    and an address that is not routed within 'ttl' seconds is evicted along with its messages (see expire).
+    Not thread-safe: guarded by the actor system's message_cache_lock.
+    """
+
+    def __init__(self, capacity: int, ttl: float):
+        self.capacity = capacity
+        self.ttl = ttl
+
+        self.__messages: Dict[Address, List[Any]] = dict()
+
+        # Address -> when it is evicted, in the order of addresses' arrival (thus of deadlines as well)
+        self.__deadlines: Dict[Address, float] = dict()
+
+        self.size = 0  # messages held
+
+    def __contains__(self, address: Address) -> bool:
+        return address in self.__messages
+
+    def __len__(self) -> int:
+        return len(self.__messages)
+
+    def reserve(self, address: Address):
+        """
+        Starts holding messages for an address, unless they are held already.
+        """
+        if address not in self.__messages:
+            self.__messages[address] = []
+            self.__deadlines[address] = time.monotonic() + self.ttl
+
+    def hold(self, event: Any) -> bool:
+        """
+        Holds a message, along with others for the same address (reserved for it, if it was not).
+        :return: False if the message was not held, because the buffer is full. Fences of relayed messages are
+            always held, so that their senders do not wait for them forever.
+        """
+        if self.size >= self.capacity and type(event.message) is not RelayFenceMessage:
+            return False
+
+        self.reserve(event.target.address)
+
+        self.__messages[event.target.address].append(event)
+        self.size += 1
+
+        return True
+
+    def pop(self, address: Address) -> List[Any]:
+        """
+        Stops holding messages for an address.
+        :return: Messages that were held for it, in the order they arrived.
+        """
+        messages = self.__messages.pop(address, None)
+
+        if messages is None:
+            return []
+
+        del self.__deadlines[address]
+        self.size -= len(messages)
+
+        return messages
+
+    def expire(self, now: Optional[float] = None) -> List[Any]:
+        """
+        Evicts addresses that were not routed in time.
+        :return: Their messages.
+        """
+        now = time.monotonic() if now is None else now
+        expired = []
+
+        for address, deadline in self.__deadlines.items():
+            if deadline > now:
+                break
+
+            expired.append(address)
+
+        return [message for address in expired for message in self.pop(address)]
@@ -1,12 +1,151 @@
-from concurrent.futures import Future, wait
 import threading
-from threading import Thread, Event, Condition, Lock, RLock, Barrier, Semaphore
-from queue import Queue
+from typing import Callable, Dict, List, Optional, Set
 
+from .address import Address
 
-class EventService(Thread):
-    def __init__(self, *args, **kwargs):
-        super(EventService, self).__init__(*args, **kwargs)
 
-    def run(self) -> None:
-        pass
+class EventService:
+    """
+    Topic subscriptions of one process: an executor, or the actor system itself (which only publishes).
+    Every executor keeps a table of its own subscribers, and a replica of which other processes have subscribers
+    of a topic (see TopicInterestEvent). A message published to a topic is delivered to local subscribers
+    right away, and is sent once to every other process that has subscribers, where it is fanned out
+    to them (see TopicMessageEvent). Subscribers of a process share one copy of a published message.
+    Delivery is best effort for actors that move between processes while a message is published.
+    """
+
+    def __init__(self, process_idx: Optional[int] = None, announce: Optional[Callable[[str, bool], None]] = None):
+        """
+        :param announce: Tells other processes whether this one has subscribers of a topic. It is called under
+            the lock of the service, so that announcements of the same topic are not reordered.
+        """
+        self.process_idx = process_idx
+        self.announce = announce
+
+        # Topic -> addresses of local subscribers, and address -> topics of a local subscriber
+        self.__subscribers: Dict[str, Set[Address]] = dict()
+        self.__topics: Dict[Address, Set[str]] = dict()
+
+        # Topic -> other processes that have subscribers of the topic
+        self.__interest: Dict[str, Set[int]] = dict()
+
+        # Subscriptions are changed by the executor, and read by its event manager
+        self.__lock = threading.Lock()
+
+    def subscribe(self, topic: str, address: Address):
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        subscribers = self.__subscribers.setdefault(topic, set())
+        first = len(subscribers) == 0
+
+        subscribers.add(address)
+        self.__topics.setdefault(address, set()).add(topic)
+
+        if first:
+            self.announce(topic, True)
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def unsubscribe(self, topic: str, address: Address):
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        self.__discard(topic, address)
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def unsubscribe_all(self, address: Address) -> List[str]:
+        """
+        Forgets subscriptions of an actor that is dead, or that moves to another process.
+        :return: Topics of the actor.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        topics = list(self.__topics.get(address, ()))
+
+        for topic in topics:
+            self.__discard(topic, address)
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        return topics
+
+    def subscribers(self, topic: str) -> List[Address]:
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        subscribers = list(self.__subscribers.get(topic, ()))
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        return subscribers
+
+    def update_interest(self, topic: str, process_idx: int, interested: bool):
+        if process_idx == self.process_idx:
+            return
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        if interested:
+            self.__interest.setdefault(topic, set()).add(process_idx)
+
+        else:
+            processes = self.__interest.get(topic, set())
+            processes.discard(process_idx)
+
+            if not processes:
+                self.__interest.pop(topic, None)
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def interested_processes(self, topic: str) -> List[int]:
+        """
+        :return: Other processes that have subscribers of a topic.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        processes = list(self.__interest.get(topic, ()))
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        return processes
+
+    def __discard(self, topic: str, address: Address):
+        subscribers = self.__subscribers.get(topic, None)
+
+        if subscribers is None or address not in subscribers:
+            return
+
+        subscribers.discard(address)
+
+        topics = self.__topics.get(address, set())
+        topics.discard(topic)
+
+        if not topics:
+            self.__topics.pop(address, None)
+
+        if not subscribers:
+            del self.__subscribers[topic]
+            self.announce(topic, False)
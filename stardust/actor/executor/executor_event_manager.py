@@ -1,20 +1,32 @@
+import gc
 import threading
 
-from queue import Queue as ThreadingQueue
-from multiprocessing import Queue as InterprocessQueue
-from typing import Dict, Set, Generator, Type, Optional, Callable
+from typing import Dict, Set, Deque, Type, Optional, Callable, List, Iterable, Any
 
 from stardust.actor import ActorRef
 from stardust.actor.actor import Actor
-from stardust.actor.atom import Atom
+from stardust.actor.address import Address
+from stardust.actor.atom import Atom, Suspension
+from stardust.actor.dead_letters import DeadLetters, Tombstones, KILLED, MAILBOX_FULL
+from stardust.actor.event_service import EventService
+from stardust.actor.executor.outbound_buffer import OutboundBuffer
 from stardust.actor.pipe import Pipe
+from stardust.actor.routing_table import RoutingTable
 from stardust.actor.system_events import (
     SystemEvent,
-    MessageEvent,
-    ActorSpawnEvent, ActorSpawnNotificationEvent, ActorDeathEvent,
-    StopExecution, StartupEvent
+    MessageEvent, MessageBatchEvent, new_message_event,
+    ActorSpawnEvent, ActorSpawnNotificationEvent, ActorDeathEvent, ActorBatchDeathEvent,
+    ActorBatchSpawnEvent, ActorBatchSpawnNotificationEvent,
+    StopExecution, StartupEvent,
+    RoutingUpdateEvent,
+    StealRequestEvent, ActorMigrationEvent, ActorMigratedEvent, MigrationForwardEvent, MigrationFenceEvent,
+    MigrationRequestEvent, ExpectMigrationEvent, RelayFenceEvent,
+    TopicInterestEvent, TopicMessageEvent
 )
-from stardust.actor.mailbox import Mailbox
+from stardust.actor.serialized_atom import SerializedAtom
+from stardust.actor.config import SystemConfig, MailboxConfig, OVERFLOW_POLICIES, DROP_NEWEST, DROP_OLDEST, REJECT
+from stardust.actor.mailbox import create_mailbox
+from stardust.actor.system_messages import MailboxOverflowMessage, RelayFenceMessage, PoisonPillMessage
 
 
 class ExecutorEventManager(threading.Thread):
@@ -23,12 +35,23 @@ class ExecutorEventManager(threading.Thread):
                  process_idx: int,
                  atom_by_name: Dict[str, Atom],
                  local_addresses: Set[str],
-                 candidates: Set[Atom],
+                 candidates: Deque[Atom],
                  candidates_lock: threading.Lock,
-                 suspended_atoms: Dict[str, Generator],
+                 suspended_atoms: Dict[Address, Suspension],
                  suspended_atoms_lock: threading.Lock,
-                 actor_to_process: Dict[str, int],
+                 actor_to_process: RoutingTable,
+                 requested_routes: Set[str],
+                 relayed: Set[Address],
+                 fenced: Dict[Address, List[MessageEvent]],
+                 route: Callable[[MessageEvent], None],
                  execution_condition: threading.Condition,
+                 turn_lock: threading.Lock,
+                 outbound: OutboundBuffer,
+                 process_idx_to_queue: Dict[int, Any],
+                 topics: EventService,
+                 tombstones: Tombstones,
+                 dead_letters: DeadLetters,
+                 config: SystemConfig,
                  pipe: Pipe,
                  stop: Callable[[], None],
                  *args, **kwargs):
@@ -46,12 +69,55 @@ class ExecutorEventManager(threading.Thread):
         self.candidates_lock = candidates_lock
 
         self.actor_to_process = actor_to_process
+        self.requested_routes = requested_routes
+
+        # Messages relayed through the actor system, and ones held until they arrive (see ExecutorService.fence)
+        self.relayed = relayed
+        self.fenced = fenced
+        self.route = route
 
         self.suspended_atoms = suspended_atoms
         self.suspended_atoms_lock = suspended_atoms_lock
 
         self.execution_condition = execution_condition
 
+        # Held by the executor during an actor's turn. Taking it pauses the executor between turns, so that
+        # actors can be moved in and out, and routes can be changed, while no actor is running.
+        self.turn_lock = turn_lock
+
+        # The executor's outgoing buffer. Used only while holding the turn lock.
+        self.outbound = outbound
+
+        self.process_idx_to_queue = process_idx_to_queue
+        self.config = config
+
+        self.topics = topics
+
+        # Messages for recently killed actors are dropped, instead of being sent to the actor system
+        self.tombstones = tombstones
+        self.dead_letters = dead_letters
+
+        # Work stealing (see ExecutorService.request_steal).
+        # A thief holds messages for unknown actors while its request is not answered, since some of them may be
+        # sent to actors that are on their way. Once an actor arrives, messages that were sent to it directly are
+        # held until every process fences the previous location: each process sends a MigrationFenceEvent to the
+        # previous location after its last message sent there, and the previous location forwards messages and
+        # fences in order. So a sender's old messages are always delivered before its new ones.
+        # The actor system moves actors as well (see LoadBalancingService.suggest_moves), and lets the new location
+        # know in advance with ExpectMigrationEvent.
+        self.steal_pending: bool = False
+        self.expected_migrations: int = 0
+        self.orphans: List[MessageEvent] = []
+
+        self.forwarding: Dict[Address, int] = dict()  # address of an actor that moved away -> its new process
+        self.forwarded_fences: Dict[Address, int] = dict()
+
+        self.held_messages: Dict[Address, List[MessageEvent]] = dict()  # address of an arrived actor -> messages
+        self.received_fences: Dict[Address, int] = dict()
+
+        # Policy -> number of messages that did not fit into mailboxes of this executor
+        self.overflow_counts: Dict[str, int] = {policy: 0 for policy in OVERFLOW_POLICIES}
+
         self.stop = stop
 
     def spawn(self, event: ActorSpawnEvent) -> None:
@@ -59,21 +125,14 @@ class ExecutorEventManager(threading.Thread):
         exception = None
 
         try:
-
-            actor: Actor = event.actor_type(
+            atom = self.create_atom(
+                actor_type=event.actor_type,
                 address=event.address,
-                parent=self.system_ref if not event.parent_ref else event.parent_ref,
-                *event.args,
-                **event.kwargs
+                parent_ref=event.parent_ref,
+                args=event.args,
+                kwargs=event.kwargs,
+                mailbox_config=event.mailbox_config
             )
-            mailbox = Mailbox(
-                actor_address=event.address,
-                initial_mailbox=[
-                    StartupEvent(sender=self.system_ref)
-                ]
-            )
-
-            atom = Atom(actor=actor, mailbox=mailbox)
 
         except Exception as e:
             exception = e
@@ -81,10 +140,7 @@ class ExecutorEventManager(threading.Thread):
         else:
             self.atom_by_name[event.address] = atom
             self.local_addresses.add(event.address)
-            self.candidates.add(atom)
-
-            with self.execution_condition:
-                self.execution_condition.notify_all()
+            self.schedule([atom])
 
         self.pipe.child_output_queue.put(
             ActorSpawnNotificationEvent(
@@ -93,53 +149,570 @@ class ExecutorEventManager(threading.Thread):
             )
         )
 
-    def kill_actor(self, event: ActorDeathEvent):
-        # TODO: WRITE SOFT KILL METHOD (like PoisonPill in Akka)
-        if event.actor_ref.address in self.atom_by_name:
-            atom = self.atom_by_name[event.actor_ref.address]
+    def spawn_batch(self, event: ActorBatchSpawnEvent):
+        atoms = []
+        errors: Dict[Address, Exception] = dict()
+
+        # The startup event is immutable, so actors of a batch share it
+        startup = StartupEvent(sender=self.system_ref)
+
+        # Garbage collection is paused while the batch is created: every new actor adds a few objects to track,
+        # and full collections triggered in the middle of a large batch would scan every live actor again and again
+        collecting = gc.isenabled()
+        gc.disable()
+
+        try:
+            for position, address in enumerate(event.addresses):
+                try:
+                    atom = self.create_atom(
+                        actor_type=event.actor_type,
+                        address=address,
+                        parent_ref=event.parent_ref,
+                        args=event.args_list[position],
+                        kwargs=event.kwargs_list[position] if event.kwargs_list else {},
+                        mailbox_config=event.mailbox_config,
+                        startup=startup
+                    )
+
+                except Exception as e:
+                    errors[address] = e
+
+                else:
+                    self.atom_by_name[address] = atom
+                    self.local_addresses.add(address)
+                    atoms.append(atom)
+
+        finally:
+            if collecting:
+                gc.enable()
+
+        self.schedule(atoms)
+
+        self.pipe.child_output_queue.put(
+            ActorBatchSpawnNotificationEvent(
+                addresses=event.addresses,
+                errors=errors
+            )
+        )
+
+    def create_atom(self,
+                    actor_type: Type[Actor],
+                    address: Address,
+                    parent_ref: Optional[ActorRef],
+                    args: tuple,
+                    kwargs: dict,
+                    mailbox_config: Optional[MailboxConfig],
+                    startup: Optional[StartupEvent] = None) -> Atom:
+
+        # A named actor may be spawned again after it was killed
+        self.tombstones.revive([address])
+
+        # Address and parent are positional, so that they do not collide with positional arguments of the actor
+        actor: Actor = actor_type(address, parent_ref or self.system_ref, *args, **kwargs)
+
+        mailbox = create_mailbox(
+            actor=actor,
+            config=mailbox_config or actor_type.mailbox_config,
+            initial_mailbox=[
+                startup or StartupEvent(sender=self.system_ref)
+            ]
+        )
+
+        return Atom(actor=actor, mailbox=mailbox)
+
+    def kill_actor(self, address: Address, sender: ActorRef):
+        if address in self.forwarding:
+            # The actor has moved away: its death follows the messages forwarded to it
+            self.process_idx_to_queue[self.forwarding.pop(address)].put(
+                ActorDeathEvent(actor_ref=ActorRef(address), sender=sender)
+            )
+            self.forwarded_fences.pop(address, None)
+            return
+
+        held = self.held_messages.pop(address, None)
+        self.received_fences.pop(address, None)
+
+        self.tombstones.bury([address])
+
+        if held:
+            self.dead_letters.record(held, KILLED)
+
+        # An actor that has killed itself is unregistered by the executor already (see ExecutorService.drive)
+        self.unregister(address)
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.suspended_atoms_lock.acquire()
+        # ==============================================================================================================
+
+        self.topics.unsubscribe_all(address)
+
+        suspension = self.suspended_atoms.pop(address, None)
+
+        # ==============================================================================================================
+        self.suspended_atoms_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        if suspension is not None and suspension.task is not None:
+            suspension.task.cancel()
+
+    def unregister(self, address: Address):
+        """
+        Forgets a dead actor. Messages that are left in its mailbox are dead letters.
+        A queued atom is not removed from the ready queue: the executor skips atoms that are not registered.
+        """
+        atom = self.atom_by_name.pop(address, None)
+        self.local_addresses.discard(address)
+
+        if atom is not None:
+            self.dead_letters.record(
+                [
+                    event for event in atom.mailbox.events
+                    if isinstance(event, MessageEvent) and type(event.message) is not PoisonPillMessage
+                ],
+                KILLED
+            )
+
+    def kill_actors(self, event: ActorBatchDeathEvent):
+        for address in event.addresses:
+            self.kill_actor(address, event.sender)
+
+    def send(self, event: MessageEvent):
+        atom = self.atom_by_name.get(event.target.address, None)
+
+        if atom is None or event.response or event.target.address in self.held_messages or is_fence(event):
+            self.send_batch([event])
+            return
+
+        if not atom.enqueue(event) and not self.overflow(atom, event):
+            return
+
+        self.schedule([atom])
+
+    def deliver(self, atom: Atom, event: MessageEvent) -> bool:
+        """
+        :return: True if an atom has got a message and has to be scheduled.
+        """
+        if is_fence(event):
+            # Messages relayed before the fence have arrived: their sender may send directly
+            self.process_idx_to_queue[event.message.process_idx].put(RelayFenceEvent(address=event.target.address))
+            return False
+
+        if event.response:
+            self.resume(atom, event)
+            return False
+
+        return atom.enqueue(event) or self.overflow(atom, event)
+
+    def resume(self, atom: Atom, event: MessageEvent):
+        """
+        Hands a response over to an actor that waits for it, and puts the actor into the ready queue.
+        Responses that are not awaited (e.g. ones that arrive after a timeout) are dropped.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.suspended_atoms_lock.acquire()
+        # ==============================================================================================================
+
+        suspension = self.suspended_atoms.get(atom.actor.address, None)
+        awaited = suspension is not None and suspension.context_code == event.context_code and not suspension.ready
+
+        if awaited:
+            suspension.response = event.message
+            suspension.ready = True
+
+        # ==============================================================================================================
+        self.suspended_atoms_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        if awaited:
+            # A suspended atom stays marked as scheduled, so it is queued directly
+            with self.execution_condition:
+                self.candidates.append(atom)
+                self.execution_condition.notify()
+
+    def send_batch(self, events: List[MessageEvent]):
+        unknown = []
+        scheduled = []
+        forwarded: Dict[int, List[MessageEvent]] = dict()
+
+        for event in events:
+            address = event.target.address
+            atom = self.atom_by_name.get(address, None)
+
+            if atom is None:
+                if address in self.forwarding:
+                    forwarded.setdefault(self.forwarding[address], []).append(event)
+
+                elif self.steal_pending or self.expected_migrations > 0:
+                    self.orphans.append(event)
+
+                elif address in self.tombstones:
+                    self.dead_letters.record([event], KILLED)
+
+                else:
+                    unknown.append(event)
+
+            elif address in self.held_messages:
+                self.held_messages[address].append(event)
+
+            elif self.deliver(atom, event):
+                scheduled.append(atom)
+
+        if scheduled:
+            self.schedule(scheduled)
+
+        for process_idx, process_events in forwarded.items():
+            self.process_idx_to_queue[process_idx].put(MigrationForwardEvent(events=process_events))
+
+        if len(unknown) == 1:
+            self.pipe.child_output_queue.put(unknown[0])
+
+        elif unknown:
+            self.pipe.child_output_queue.put(MessageBatchEvent(events=unknown))
+
+    def receive_forwarded(self, events: List[MessageEvent]):
+        """
+        Enqueues messages that bypass holding: ones forwarded by the previous location of their targets (they were
+        sent before the corresponding fences), and held ones that are released.
+        """
+        scheduled = []
+
+        for event in events:
+            atom = self.atom_by_name.get(event.target.address, None)
+
+            if atom is None:
+                self.send_batch([event])
+
+            elif self.deliver(atom, event):
+                scheduled.append(atom)
+
+        if scheduled:
+            self.schedule(scheduled)
+
+    def fan_out(self, event: TopicMessageEvent):
+        """
+        Delivers a message, published in another process, to local subscribers of its topic.
+        """
+        self.send_batch([
+            new_message_event(event.sender, ActorRef(address), event.message)
+            for address in self.topics.subscribers(event.topic)
+        ])
+
+    def schedule(self, atoms: Iterable[Atom]):
+        """
+        Appends idle atoms to the executor's ready queue. Atoms that are already queued keep their place.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.execution_condition.acquire()
+        # ==============================================================================================================
+
+        woken = False
+
+        for atom in atoms:
+            if not atom.scheduled:
+                atom.scheduled = True
+                self.candidates.append(atom)
+                woken = True
+
+        if woken:
+            self.execution_condition.notify()
+
+        # ==============================================================================================================
+        self.execution_condition.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def lift_fence(self, event: RelayFenceEvent):
+        """
+        Routes messages that were held until the fence that followed relayed messages reached their target.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.turn_lock.acquire()
+        # ==============================================================================================================
+
+        self.relayed.discard(event.address)
+
+        for message_event in self.fenced.pop(event.address, []):
+            self.route(message_event)
+
+        # The executor may be idle, waiting for actors to run
+        self.outbound.flush_all()
+
+        # ==============================================================================================================
+        self.turn_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def overflow(self, atom: Atom, event: MessageEvent) -> bool:
+        """
+        Handles an event that did not fit into a mailbox, according to the mailbox's overflow policy.
+        :return: True if the event was enqueued after all.
+        """
+        policy = atom.mailbox.overflow_policy
+        self.overflow_counts[policy] += 1
+
+        if policy == DROP_NEWEST:
+            self.dead_letters.record([event], MAILBOX_FULL)
+
+        elif policy == REJECT:
+            # Rejections are not rejected again, and the system has no mailbox to receive them
+            if isinstance(event.message, MailboxOverflowMessage) or event.sender.address == self.system_ref.address:
+                self.dead_letters.record([event], MAILBOX_FULL)
+
+            else:
+                self.send(
+                    MessageEvent(
+                        sender=event.target,
+                        target=event.sender,
+                        message=MailboxOverflowMessage(message=event.message, target=event.target)
+                    )
+                )
+
+        elif policy == DROP_OLDEST:
+            evicted = atom.mailbox.displace(event)
+
+            if evicted is not None:
+                self.dead_letters.record([evicted], MAILBOX_FULL)
+
+            return True
+
+        return False
+
+    def give_away(self, process_idx: int, addresses: Optional[Iterable[Address]] = None):
+        """
+        Moves actors, with their pending messages, to another executor.
+        Without addresses, answers a steal request: if more than 'steal_threshold' actors are waiting in the ready
+        queue, moves up to half of the surplus (the ones that would run last) to the idle executor.
+        Actors that are waiting for a response, or can not be pickled, stay.
+        """
+        atoms = []
+        actor_types = dict()
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.turn_lock.acquire()
+        self.execution_condition.acquire()
+        # ==============================================================================================================
+
+        if addresses is None:
+            surplus = len(self.candidates) - self.config.steal_threshold
+            kept = []
+
+            while len(atoms) < (surplus + 1) // 2 and self.candidates:
+                atom = self.candidates.pop()
+
+                if self.atom_by_name.get(atom.actor.address, None) is not atom:
+                    continue
+
+                serialized = self.detach(atom, process_idx)
+
+                if serialized is None:
+                    kept.append(atom)
+                    continue
+
+                atoms.append(serialized)
+                actor_types[serialized.address] = type(atom.actor).__name__
+
+            self.candidates.extend(reversed(kept))
+
+        else:
+            for address in addresses:
+                atom = self.atom_by_name.get(address, None)
+                serialized = self.detach(atom, process_idx) if atom is not None else None
+
+                if serialized is None:
+                    continue
+
+                # The executor may have taken the atom already; it skips atoms that are gone
+                if atom in self.candidates:
+                    self.candidates.remove(atom)
+
+                atoms.append(serialized)
+                actor_types[address] = type(atom.actor).__name__
+
+        # The actors go first, so that everything forwarded to them arrives after them
+        self.process_idx_to_queue[process_idx].put(
+            ActorMigrationEvent(source_process_idx=self.process_idx, atoms=atoms, stolen=addresses is None)
+        )
+
+        # ==============================================================================================================
+        self.execution_condition.release()
+        self.turn_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        if atoms:
+            self.pipe.child_output_queue.put(
+                ActorMigratedEvent(
+                    source_process_idx=self.process_idx,
+                    target_process_idx=process_idx,
+                    actor_types=actor_types
+                )
+            )
+
+    def detach(self, atom: Atom, process_idx: int) -> Optional[SerializedAtom]:
+        """
+        Serializes an atom and starts forwarding its messages to the given executor. Requires the turn lock.
+        :return: None if the atom can not be moved.
+        """
+        address = atom.actor.address
+
+        if address in self.held_messages or address in self.suspended_atoms:
+            return None
+
+        try:
+            serialized = atom.serialize()
+
+        except Exception:
+            return None
+
+        atom.scheduled = False
+
+        # Subscriptions move along with the actor
+        serialized.topics = tuple(self.topics.unsubscribe_all(address))
+
+        del self.atom_by_name[address]
+        self.local_addresses.discard(address)
+
+        self.forwarding[address] = process_idx
+        self.forwarded_fences[address] = 0
+
+        return serialized
+
+    def accept(self, event: ActorMigrationEvent):
+        """
+        Installs actors moved from another executor and delivers messages that were held while they were on the way.
+        """
+        atoms = [Atom.deserialize(serialized) for serialized in event.atoms]
+
+        for serialized in event.atoms:
+            for topic in serialized.topics:
+                self.topics.subscribe(topic, serialized.address)
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.turn_lock.acquire()
+        # ==============================================================================================================
+
+        for atom in atoms:
+            self.atom_by_name[atom.actor.address] = atom
+            self.local_addresses.add(atom.actor.address)
+
+            self.held_messages[atom.actor.address] = []
+            self.received_fences[atom.actor.address] = 0
+
+        if event.stolen:
+            self.steal_pending = False
+
+        else:
+            self.expected_migrations -= 1
+
+        orphans = self.orphans
+        self.orphans = []
+
+        self.send_batch(orphans)
+
+        # ==============================================================================================================
+        self.turn_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        self.schedule([atom for atom in atoms if atom.awaits_execution()])
+
+    def fence(self, event: MigrationFenceEvent):
+        """
+        At the previous location of moved actors, passes a fence on to their new location.
+        At the new location, counts fences, and releases held messages once every process (all executors and
+        the actor system) has fenced.
+        """
+        expected = len(self.process_idx_to_queue) + 1
+
+        forwarded: Dict[int, List[Address]] = dict()
+        released = []
+
+        for address in event.addresses:
+            if address in self.forwarding:
+                forwarded.setdefault(self.forwarding[address], []).append(address)
+                self.forwarded_fences[address] += 1
 
+                if self.forwarded_fences[address] == expected:
+                    del self.forwarding[address]
+                    del self.forwarded_fences[address]
+
+            elif address in self.received_fences:
+                self.received_fences[address] += 1
+
+                if self.received_fences[address] == expected:
+                    del self.received_fences[address]
+                    released.append(address)
+
+        for process_idx, addresses in forwarded.items():
+            self.process_idx_to_queue[process_idx].put(MigrationFenceEvent(addresses=tuple(addresses)))
+
+        for address in released:
+            self.release(address)
+
+    def release(self, address: Address):
+        """
+        Delivers messages held for an arrived actor. The executor may keep adding to them meanwhile, so they are
+        taken in rounds, and the actor stops being held once there is nothing left.
+        """
+        while True:
             # ----------------------------------------------------------------------------------------------------------
-            self.candidates_lock.acquire()
+            self.turn_lock.acquire()
             # ==========================================================================================================
 
-            if atom in self.candidates:
-                self.candidates.remove(atom)
+            held = self.held_messages.get(address, None)
 
-            # ==========================================================================================================
-            self.candidates_lock.release()
-            # ----------------------------------------------------------------------------------------------------------
+            if held:
+                self.held_messages[address] = []
 
-            if event.actor_ref.address in self.atom_by_name:
-                del self.atom_by_name[event.actor_ref.address]
+            else:
+                self.held_messages.pop(address, None)
 
-            if event.actor_ref.address in self.suspended_atoms:
-                del self.suspended_atoms[event.actor_ref.address]
+            # ==========================================================================================================
+            self.turn_lock.release()
+            # ----------------------------------------------------------------------------------------------------------
 
-            if event.actor_ref.address in self.local_addresses:
-                self.local_addresses.remove(event.actor_ref.address)
+            if not held:
+                break
 
-    def send(self, event: MessageEvent):
-        actor_ref = event.target
+            self.receive_forwarded(held)
 
-        if actor_ref.address in self.atom_by_name:
-            atom = self.atom_by_name[actor_ref.address]
-            atom.enqueue(event)
+    def update_routes(self, event: RoutingUpdateEvent):
+        # Actors that are no longer routable were killed, or failed to start. Named ones may be spawned again.
+        dead = [address for address, process_idx in event.routes.items() if process_idx is None]
+        self.tombstones.bury(dead)
 
+        # Their fences are dropped along with the relayed messages
+        if any(address in self.relayed for address in dead):
             # ----------------------------------------------------------------------------------------------------------
-            self.candidates_lock.acquire()
+            self.turn_lock.acquire()
             # ==========================================================================================================
 
-            self.candidates.add(atom)
+            self.relayed.difference_update(dead)
+            self.dead_letters.record([held for address in dead for held in self.fenced.pop(address, [])], KILLED)
 
             # ==========================================================================================================
-            self.candidates_lock.release()
+            self.turn_lock.release()
             # ----------------------------------------------------------------------------------------------------------
 
-            with self.execution_condition:
-                self.execution_condition.notify_all()
+        self.tombstones.revive([address for address, process_idx in event.routes.items() if process_idx is not None])
 
-        else:
-            self.pipe.child_output_queue.put(event)
+        if event.moved_from is None:
+            self.actor_to_process.apply(event)
+            self.requested_routes.difference_update(event.routes)
+            return
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.turn_lock.acquire()
+        # ==============================================================================================================
+
+        self.actor_to_process.apply(event)
+        self.requested_routes.difference_update(event.routes)
+
+        # Nothing is sent to the previous location of moved actors after this fence
+        self.outbound.put_now(
+            self.process_idx_to_queue[event.moved_from],
+            MigrationFenceEvent(addresses=tuple(event.routes))
+        )
+
+        # ==============================================================================================================
+        self.turn_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
 
     def run(self) -> None:
 
@@ -149,14 +722,56 @@ class ExecutorEventManager(threading.Thread):
             if isinstance(event, ActorSpawnEvent):
                 self.spawn(event)
 
+            elif isinstance(event, ActorBatchSpawnEvent):
+                self.spawn_batch(event)
+
             elif isinstance(event, ActorDeathEvent):
-                self.kill_actor(event)
+                self.kill_actor(event.actor_ref.address, event.sender)
+
+            elif isinstance(event, ActorBatchDeathEvent):
+                self.kill_actors(event)
 
             elif isinstance(event, MessageEvent):
                 self.send(event)
 
+            elif isinstance(event, MessageBatchEvent):
+                self.send_batch(event.events)
+
+            elif isinstance(event, RoutingUpdateEvent):
+                self.update_routes(event)
+
+            elif isinstance(event, RelayFenceEvent):
+                self.lift_fence(event)
+
+            elif isinstance(event, MigrationForwardEvent):
+                self.receive_forwarded(event.events)
+
+            elif isinstance(event, MigrationFenceEvent):
+                self.fence(event)
+
+            elif isinstance(event, StealRequestEvent):
+                self.give_away(event.process_idx)
+
+            elif isinstance(event, MigrationRequestEvent):
+                self.give_away(event.process_idx, event.addresses)
+
+            elif isinstance(event, ExpectMigrationEvent):
+                self.expected_migrations += 1
+
+            elif isinstance(event, TopicMessageEvent):
+                self.fan_out(event)
+
+            elif isinstance(event, TopicInterestEvent):
+                self.topics.update_interest(event.topic, event.process_idx, event.interested)
+
+            elif isinstance(event, ActorMigrationEvent):
+                self.accept(event)
+
             elif isinstance(event, StopExecution):
                 break
 
         self.stop()
 
+
+def is_fence(event: MessageEvent) -> bool:
+    return type(event.message) is RelayFenceMessage
@@ -1,23 +1,43 @@
-import random
+import time
+import uuid
+import heapq
+import asyncio
+import itertools
 import threading
 import multiprocessing as mp
-from typing import Dict, Set, Generator, Optional
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Dict, Set, Deque, Generator, Optional, Tuple, List
 
 from stardust.actor.actor_events import (
     ActorEvent,
     SendEvent, AskEvent,
-    SpawnEvent, KillEvent
+    SpawnEvent, SpawnManyEvent, KillEvent, AwaitEvent, BlockingEvent,
+    SubscribeEvent, UnsubscribeEvent, PublishEvent,
+    AskTimeout
 )
 from stardust.actor.system_events import (
-    SystemEvent,
-    MessageEvent,
-    ActorSpawnEvent,
-    ActorDeathEvent, ExecutionStopped)
+    MessageEvent, new_message_event,
+    ActorSpawnEvent, ActorBatchSpawnEvent, ActorLocalSpawnEvent,
+    ActorDeathEvent, ExecutionStopped,
+    RoutingRequestEvent, StealRequestEvent,
+    WorkerStatsEvent, TrafficReportEvent,
+    TopicInterestEvent, TopicMessageEvent
+)
 from stardust.actor.actor_ref import ActorRef
-from stardust.actor.atom import Atom, Done
+from stardust.actor.address import Address, AddressAllocator, is_numeric, address_process, address_node
+from stardust.actor.config import SystemConfig
+from stardust.actor.ask_service import reply_address_prefix
+from stardust.actor.atom import Atom, Done, Suspension
+from stardust.actor.event_service import EventService
+from stardust.actor.dead_letters import DeadLetters, Tombstones, KILLED
 from stardust.actor.executor.executor_event_manager import ExecutorEventManager
+from stardust.actor.executor.outbound_buffer import OutboundBuffer
 
 from stardust.actor.pipe import Pipe
+from stardust.actor.routing_table import RoutingTable
+from stardust.actor.router import RouterRef, resolve
+from stardust.actor.system_messages import RelayFenceMessage, PoisonPillMessage
 
 
 class ExecutorService(mp.Process):
@@ -27,7 +47,7 @@ class ExecutorService(mp.Process):
                  pipe: Pipe,
                  system_ref: ActorRef,
                  process_idx_to_queue: Dict[int, mp.Queue],
-                 actor_to_process: Dict[str, int],
+                 config: SystemConfig,
 
                  *args, **kwargs):
 
@@ -37,20 +57,77 @@ class ExecutorService(mp.Process):
         self.pipe: Pipe = pipe
         self.system_ref = system_ref
         self.process_idx_to_queue = process_idx_to_queue
+        self.config = config
+
+        # Temporary reply addresses of asks from outside of the system are not routable: the system catches replies
+        self.reply_prefix = reply_address_prefix(system_ref.address)
+
+        self.address_allocator = AddressAllocator(allocator_idx=process_idx + 1, node_idx=config.node_idx)
+        self.spawn_counter = itertools.count(process_idx)
+
+        self.outbound = OutboundBuffer(batch_size=config.batch_size, linger=config.batch_linger)
+
+        # Local replica of the system's routing table, kept up to date by the event manager
+        self.actor_to_process: RoutingTable = RoutingTable()
+        self.requested_routes: Set[str] = set()
+
+        # Addresses that messages were relayed to through the actor system, because their location was unknown, and
+        # messages held for the ones that are located meanwhile (see fence)
+        self.relayed: Set[Address] = set()
+        self.fenced: Dict[Address, List[MessageEvent]] = dict()
 
-        self.actor_to_process: Dict[str, int] = actor_to_process
         self.atom_by_name: Dict[str, Atom] = dict()
         self.local_addresses: Set[str] = set()
 
-        self.suspended_atoms: Dict[str, Generator] = dict()
+        # Topic subscriptions of local actors (see EventService)
+        self.topics = EventService(process_idx=process_idx, announce=self.announce)
+
+        # Recently killed actors, and messages sent to them (see stardust.actor.dead_letters)
+        self.tombstones = Tombstones(capacity=config.tombstone_capacity, ttl=config.tombstone_ttl)
+        self.dead_letters = DeadLetters(sample_size=config.dead_letter_samples)
+
+        # Actors that wait for responses to their asks, and a heap of (deadline, counter, atom, suspension)
+        self.suspended_atoms: Dict[Address, Suspension] = dict()
         self.suspended_atoms_lock = threading.Lock()
+        self.ask_deadlines: List[tuple] = []
+        self.ask_counter = itertools.count()
+
+        # Event loop of 'async def receive' actors, started in its own thread when the first one runs
+        self.event_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.event_loop_thread: Optional[threading.Thread] = None
+
+        # Thread pool of actors of the blocking dispatcher, started when the first one runs
+        self.blocking_pool: Optional[ThreadPoolExecutor] = None
 
-        self.candidates = set()
+        # Ready queue: atoms that have messages to process, in FIFO order. Each atom is queued at most once.
+        self.candidates: Deque[Atom] = deque()
         self.candidates_lock = threading.Lock()
 
-        self.execution_condition = threading.Condition()
+        self.execution_condition = threading.Condition(self.candidates_lock)
         self.running: bool = True
 
+        # Held during an actor's turn, and while the outgoing buffer is flushed (see ExecutorEventManager.turn_lock)
+        self.turn_lock = threading.Lock()
+
+        # Executors that an idle executor asks for actors, in turn
+        self.steal_victims = itertools.cycle([idx for idx in process_idx_to_queue.keys() if idx != process_idx])
+
+        # Load reports (see LoadBalancingService)
+        self.messages_processed = 0
+        self.next_report = 0.0
+
+        # Sampled traffic to actors of other processes, reported along with the load (see AffinityGraph)
+        self.traffic: Dict[Tuple[Address, Address], int] = dict()
+        self.traffic_countdown = config.affinity_sampling
+
+        # How long an idle executor waits before it asks for actors or reports its load again
+        intervals = [self.config.stats_interval] if self.config.stats_interval > 0 else []
+
+        if self.config.work_stealing:
+            intervals.append(self.config.steal_interval)
+
+        self.idle_timeout: Optional[float] = min(intervals) if intervals else None
+
         self.event_manager = ExecutorEventManager(
             process_idx=self.process_idx,
             system_ref=system_ref,
@@ -61,13 +138,22 @@ class ExecutorService(mp.Process):
             suspended_atoms=self.suspended_atoms,
             suspended_atoms_lock=self.suspended_atoms_lock,
             execution_condition=self.execution_condition,
+            turn_lock=self.turn_lock,
+            outbound=self.outbound,
+            process_idx_to_queue=self.process_idx_to_queue,
+            topics=self.topics,
+            tombstones=self.tombstones,
+            dead_letters=self.dead_letters,
+            config=self.config,
             actor_to_process=self.actor_to_process,
+            requested_routes=self.requested_routes,
+            relayed=self.relayed,
+            fenced=self.fenced,
+            route=self.route,
             pipe=self.pipe,
             stop=self.stop
         )
 
-        self._previous_candidate: Optional[Atom] = None
-
     def stop(self):
         self.running = False
 
@@ -80,100 +166,711 @@ class ExecutorService(mp.Process):
 
         self.event_manager.start()
 
+        while self.running:
+            candidate = self.next_candidate()
+
+            if candidate is None:
+                break
+
+            # ----------------------------------------------------------------------------------------------------------
+            self.turn_lock.acquire()
+            # ==========================================================================================================
+
+            self.run_turn(candidate)
+            self.outbound.flush_expired()
+            self.reschedule(candidate)
+
+            # ==========================================================================================================
+            self.turn_lock.release()
+            # ----------------------------------------------------------------------------------------------------------
+
+            if self.ask_deadlines:
+                self.schedule_expired()
+
+            self.report_stats()
+
+        self.finalize()
+
+    def next_candidate(self) -> Optional[Atom]:
+        """
+        Takes the first atom from the ready queue, waiting for one if the queue is empty.
+        An idle executor asks other executors for their ready actors every 'steal_interval' seconds,
+        and keeps reporting its load.
+        :return: Atom to execute, or None if the executor is stopped.
+        """
+        if len(self.candidates) == 0:
+            with self.turn_lock:
+                self.outbound.flush_all()
+
         with self.execution_condition:
-            while self.running:
-                if len(self.candidates) == 0:
-                    self.execution_condition.wait()
+            while self.running and len(self.candidates) == 0:
+                if self.config.work_stealing:
+                    self.request_steal()
 
-                if not self.running:
-                    break
+                self.report_stats()
+
+                timeout = self.idle_timeout
+
+                if self.ask_deadlines:
+                    self.candidates.extend(self.expire_asks())
+
+                    if len(self.candidates) > 0:
+                        break
+
+                    until_deadline = max(self.ask_deadlines[0][0] - time.monotonic(), 0) if self.ask_deadlines else None
+
+                    if until_deadline is not None and (timeout is None or until_deadline < timeout):
+                        timeout = until_deadline
+
+                self.execution_condition.wait(timeout)
+
+            if not self.running:
+                return None
+
+            return self.candidates.popleft()
+
+    def request_steal(self):
+        """
+        Asks the next executor for some of its ready actors, unless the previous request is not answered yet.
+        """
+        if self.event_manager.steal_pending or len(self.process_idx_to_queue) < 2:
+            return
+
+        self.event_manager.steal_pending = True
+        self.process_idx_to_queue[next(self.steal_victims)].put(StealRequestEvent(process_idx=self.process_idx))
+
+    def report_stats(self):
+        """
+        Sends the executor's load to the actor system, at most once per 'stats_interval' seconds.
+        """
+        now = time.monotonic()
+
+        if self.config.stats_interval <= 0 or now < self.next_report:
+            return
+
+        self.next_report = now + self.config.stats_interval
+
+        # Only ready and parked atoms have pending messages, so idle atoms (most of them, with many actors)
+        # are not walked through
+        pending = list(self.candidates) + [
+            self.atom_by_name[address] for address in list(self.suspended_atoms) if address in self.atom_by_name
+        ]
+
+        self.pipe.child_output_queue.put(
+            WorkerStatsEvent(
+                process_idx=self.process_idx,
+                timestamp=now,
+                backlog=sum(len(atom.mailbox) for atom in pending),
+                ready=len(self.candidates),
+                messages=self.messages_processed,
+                cpu_time=time.process_time(),
+                overflow_counts=dict(self.event_manager.overflow_counts),
+                dead_letters=self.dead_letters.take_report()
+            )
+        )
+
+        if self.traffic:
+            self.pipe.child_output_queue.put(TrafficReportEvent(process_idx=self.process_idx, traffic=self.traffic))
+            self.traffic = dict()
+
+    def schedule_expired(self):
+        expired = self.expire_asks()
+
+        if expired:
+            with self.execution_condition:
+                self.candidates.extend(expired)
+
+    def reschedule(self, atom: Atom):
+        """
+        Puts an atom to the back of the ready queue if it still has messages, or marks it as idle.
+        An atom that waits for a response stays out of the queue until the response arrives.
+        """
+        if atom.actor.address in self.suspended_atoms:
+            return
+
+        with self.execution_condition:
+            if len(atom.mailbox) > 0 and self.atom_by_name.get(atom.actor.address, None) is atom:
+                self.candidates.append(atom)
+
+            else:
+                atom.scheduled = False
 
-                self.candidates_lock.acquire()
+    def run_turn(self, atom: Atom):
+        """
+        Lets an actor process up to 'throughput' messages (within 'throughput_deadline' seconds, if it is set).
+        A turn of an actor that waits for a response ends, and the actor is not run until the response arrives.
+        """
+        deadline = time.monotonic() + self.config.throughput_deadline if self.config.throughput_deadline > 0 else None
 
-                candidates = self.candidates - {self._previous_candidate}
+        for _ in range(self.config.throughput):
+            # An actor could be killed while it was waiting in the ready queue or during its turn
+            if self.atom_by_name.get(atom.actor.address, None) is not atom:
+                break
 
-                if len(candidates) == 0:
-                    candidates = self.candidates
+            suspension = self.suspended_atoms.get(atom.actor.address, None)
+
+            if suspension is not None:
+                if not suspension.ready:
+                    break
 
-                    if len(candidates) == 0:
-                        self.candidates_lock.release()
+                self.resume(atom, suspension)
+
+            elif atom.awaits_execution():
+                self.execute(atom)
+                self.messages_processed += 1
+
+            else:
+                break
+
+            # A parked actor is resumed through the ready queue
+            if atom.actor.address in self.suspended_atoms:
+                break
+
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+
+    def execute(self, atom: Atom):
+        generator = atom.execute()
+        self.drive(atom, generator, next(generator))
+
+    def resume(self, atom: Atom, suspension: Suspension):
+        """
+        Continues a turn that was parked by an ask, with the response or with AskTimeout.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.suspended_atoms_lock.acquire()
+        # ==============================================================================================================
+
+        self.suspended_atoms.pop(atom.actor.address, None)
+
+        # ==============================================================================================================
+        self.suspended_atoms_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        if suspension.error is not None:
+            actor_event = suspension.generator.throw(suspension.error)
+
+        else:
+            actor_event = suspension.generator.send(suspension.response)
+
+        self.drive(atom, suspension.generator, actor_event)
+
+    def drive(self, atom: Atom, generator: Generator, actor_event: ActorEvent):
+        """
+        Carries out events yielded by an actor, until it is done with the message, or suspends on an ask.
+        """
+        while actor_event != Done:
+            if isinstance(actor_event, SendEvent):
+                self.route(
+                    new_message_event(
+                        actor_event.sender,
+                        resolve(actor_event.target, actor_event.message, self.mailbox_size),
+                        actor_event.message,
+                        actor_event.context_code,
+                        actor_event.response
+                    )
+                )
+
+                actor_event = next(generator)
+
+            elif isinstance(actor_event, AskEvent):
+                self.suspend(atom, generator, actor_event)
+
+                self.route(
+                    new_message_event(
+                        actor_event.sender,
+                        resolve(actor_event.target, actor_event.message, self.mailbox_size),
+                        actor_event.message,
+                        actor_event.context_code
+                    )
+                )
+
+                return
+
+            elif isinstance(actor_event, AwaitEvent):
+                self.await_step(atom, generator, actor_event)
+                return
+
+            elif isinstance(actor_event, BlockingEvent):
+                self.dispatch_step(atom, generator, actor_event)
+                return
+
+            elif isinstance(actor_event, SpawnEvent) and actor_event.local:
+                actor_event = generator.send(self.spawn_local(actor_event))
+
+            elif isinstance(actor_event, SpawnEvent):
+                address, process_idx = self.spawn_address(actor_event)
+                actor_ref = ActorRef(address)
+
+                self.outbound.put_now(
+                    self.pipe.child_output_queue,
+                    ActorSpawnEvent(
+                        actor_type=actor_event.actor_type,
+                        parent_ref=actor_event.parent,
+                        address=address,
+                        args=actor_event.args,
+                        kwargs=actor_event.kwargs,
+                        name=actor_event.address if is_numeric(address) else None,
+                        process_idx=process_idx,
+                        mailbox_config=actor_event.mailbox_config
+                    )
+                )
+
+                actor_event = generator.send(actor_ref)
+
+            elif isinstance(actor_event, SpawnManyEvent):
+                actor_event = generator.send(self.spawn_many(actor_event))
+
+            elif isinstance(actor_event, KillEvent):
+                targets = [actor_event.target]
+
+                if isinstance(actor_event.target, RouterRef):
+                    # Killing a router kills its routees
+                    targets = actor_event.target.routees
+
+                for target in targets:
+                    if actor_event.soft:
+                        # The target stops once it gets to the pill (see Atom.execute)
+                        self.route(new_message_event(actor_event.sender, target, PoisonPillMessage()))
                         continue
 
-                candidate: Atom = random.sample(candidates, 1)[0]
-
-                if len(candidate.mailbox) < 2:
-                    self.candidates.remove(candidate)
-
-                self.candidates_lock.release()
-
-                generator = candidate.execute()
-
-                actor_event: ActorEvent = next(generator)
-
-                while actor_event != Done:
-                    if isinstance(actor_event, SendEvent):
-                        process_idx = self.actor_to_process.get(actor_event.target.address, None)
-
-                        if process_idx == self.process_idx:
-                            self.pipe.child_input_queue.put(
-                                MessageEvent(
-                                    sender=actor_event.sender,
-                                    target=actor_event.target,
-                                    message=actor_event.message,
-                                    context_code=actor_event.context_code
-                                )
-                            )
-
-                        elif process_idx is not None:
-                            if process_idx:
-                                self.process_idx_to_queue[process_idx].put(
-                                    MessageEvent(
-                                        sender=actor_event.sender,
-                                        target=actor_event.target,
-                                        message=actor_event.message,
-                                        context_code=actor_event.context_code
-                                    )
-                                )
-                        else:
-                            self.pipe.child_output_queue.put(
-                                MessageEvent(
-                                    sender=actor_event.sender,
-                                    target=actor_event.target,
-                                    message=actor_event.message,
-                                    context_code=actor_event.context_code
-                                )
-                            )
-
-                        actor_event = next(generator)
-
-                    elif isinstance(actor_event, SpawnEvent):
-                        actor_ref = ActorRef(actor_event.address)
-
-                        self.pipe.child_output_queue.put(
-                            ActorSpawnEvent(
-                                actor_type=actor_event.actor_type,
-                                parent_ref=actor_event.parent,
-                                address=actor_event.address,
-                                args=actor_event.args,
-                                kwargs=actor_event.kwargs
-                            )
+                    if target.address == atom.actor.address:
+                        # An actor that kills itself (e.g. on a PoisonPillMessage) processes no more messages
+                        self.tombstones.bury([target.address])
+                        self.event_manager.unregister(target.address)
+
+                    # The actor system kills the target along with its descendants
+                    self.outbound.put_now(
+                        self.pipe.child_output_queue,
+                        ActorDeathEvent(
+                            actor_ref=target,
+                            sender=actor_event.sender
                         )
+                    )
 
-                        actor_event = generator.send(actor_ref)
+                actor_event = next(generator)
 
-                    elif isinstance(actor_event, KillEvent):
-                        self.pipe.child_output_queue.put(
-                            ActorDeathEvent(
-                                actor_ref=actor_event.target,
-                                sender=actor_event.sender
-                            )
-                        )
+            elif isinstance(actor_event, SubscribeEvent):
+                self.topics.subscribe(actor_event.topic, actor_event.subscriber.address)
+                actor_event = next(generator)
 
-                        actor_event = next(generator)
+            elif isinstance(actor_event, UnsubscribeEvent):
+                self.topics.unsubscribe(actor_event.topic, actor_event.subscriber.address)
+                actor_event = next(generator)
 
-        self.finalize()
+            elif isinstance(actor_event, PublishEvent):
+                self.publish(actor_event)
+                actor_event = next(generator)
+
+    def publish(self, event: PublishEvent):
+        """
+        Delivers a published message to local subscribers right away, and sends it once to every other executor
+        that has subscribers of the topic.
+        """
+        for address in self.topics.subscribers(event.topic):
+            self.event_manager.send(new_message_event(event.sender, ActorRef(address), event.message))
+
+        for process_idx in self.topics.interested_processes(event.topic):
+            self.outbound.put_now(
+                self.process_idx_to_queue[process_idx],
+                TopicMessageEvent(
+                    topic=event.topic,
+                    sender=event.sender,
+                    message=event.message
+                )
+            )
+
+    def announce(self, topic: str, interested: bool):
+        """
+        Lets other executors and the actor system know whether this executor has subscribers of a topic.
+        """
+        event = TopicInterestEvent(topic=topic, process_idx=self.process_idx, interested=interested)
+
+        for process_idx, queue in self.process_idx_to_queue.items():
+            if process_idx != self.process_idx:
+                queue.put(event)
+
+        self.pipe.child_output_queue.put(event)
+
+    def mailbox_size(self, address: Address) -> Optional[int]:
+        """
+        :return: Number of messages that a local actor has to process (counting one being processed), or None
+            if the actor is not local (see RouterRef.route).
+        """
+        if address not in self.local_addresses:
+            return None
+
+        atom = self.atom_by_name.get(address, None)
+
+        return len(atom.mailbox) + atom.scheduled if atom is not None else None
+
+    def route(self, message_event: MessageEvent):
+        target_address = message_event.target.address
+
+        # Earlier messages to the target went through the actor system, and may still be on the way
+        if target_address in self.relayed and self.fence(message_event):
+            return
+
+        if target_address in self.local_addresses:
+            # Local target: enqueue straight into its mailbox, without leaving the process
+            self.event_manager.send(message_event)
+            return
+
+        if self.config.affinity_sampling > 0:
+            self.sample_traffic(message_event.sender.address, target_address)
+
+        process_idx = self.actor_to_process.get(target_address, None)
+
+        if process_idx is None and is_numeric(target_address):
+            process_idx = self.numeric_process(target_address)
+
+        if process_idx is not None:
+            self.outbound.put(self.process_idx_to_queue[process_idx], message_event)
+            return
+
+        if target_address in self.tombstones:
+            self.dead_letters.record([message_event], KILLED)
+            return
+
+        # Unknown location, or another node of the cluster: the system routes the message and sends the route back
+        self.outbound.put(self.pipe.child_output_queue, message_event)
+
+        if isinstance(target_address, str) and target_address.startswith(self.reply_prefix):
+            return
+
+        self.relayed.add(target_address)
+
+        if target_address in self.requested_routes:
+            return
+
+        self.requested_routes.add(target_address)
+
+        self.outbound.put_now(
+            self.pipe.child_output_queue,
+            RoutingRequestEvent(
+                address=target_address,
+                process_idx=self.process_idx
+            )
+        )
+
+    def fence(self, message_event: MessageEvent) -> bool:
+        """
+        Holds a message to a target that earlier messages were relayed to, once the target's location is known:
+        sent directly, it could overtake them. The first held message sends a fence through the actor system after
+        the relayed ones, and the held messages are routed once the fence reaches the target's executor
+        (see ExecutorEventManager.lift_fence).
+        :return: False if the target's location is still unknown, and the message is relayed as well.
+        """
+        target = message_event.target
+        held = self.fenced.get(target.address, None)
+
+        if held is None:
+            # Numeric addresses are relayed only if they are hosted by another node, so they are never located
+            if target.address not in self.local_addresses and target.address not in self.actor_to_process:
+                return False
+
+            held = self.fenced[target.address] = []
+
+            self.outbound.put(
+                self.pipe.child_output_queue,
+                new_message_event(self.system_ref, target, RelayFenceMessage(self.process_idx))
+            )
+
+        held.append(message_event)
+
+        return True
+
+    def suspend(self, atom: Atom, generator: Generator, event: AskEvent):
+        """
+        Parks a turn until a response with the ask's context code arrives (see ExecutorEventManager.resume).
+        The atom stays marked as scheduled meanwhile, so new messages do not put it into the ready queue.
+        """
+        suspension = Suspension(generator=generator, context_code=event.context_code)
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.suspended_atoms_lock.acquire()
+        # ==============================================================================================================
+
+        self.suspended_atoms[atom.actor.address] = suspension
+
+        # ==============================================================================================================
+        self.suspended_atoms_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        if event.timeout is not None:
+            heapq.heappush(
+                self.ask_deadlines,
+                (time.monotonic() + event.timeout, next(self.ask_counter), atom, suspension)
+            )
+
+    def await_step(self, atom: Atom, generator: Generator, event: AwaitEvent):
+        """
+        Parks a turn of an 'async def receive' actor while a step of it runs on the event loop (see Atom.execute_async).
+        Other actors keep running meanwhile, and the actor gets no other message until the turn is over.
+        """
+        suspension = self.park(atom, generator)
+
+        suspension.task = asyncio.run_coroutine_threadsafe(self.step(event.awaitable), self.start_event_loop())
+        suspension.task.add_done_callback(lambda task: self.wake(atom, suspension, task))
+
+    def dispatch_step(self, atom: Atom, generator: Generator, event: BlockingEvent):
+        """
+        Parks a turn of an actor of the blocking dispatcher while a step of it runs on the thread pool
+        (see Atom.execute_blocking). Events that the actor yields are carried out by the executor, as usual.
+        """
+        suspension = self.park(atom, generator)
+
+        suspension.task = self.start_blocking_pool().submit(event.call)
+        suspension.task.add_done_callback(lambda task: self.wake(atom, suspension, task))
+
+    def park(self, atom: Atom, generator: Generator) -> Suspension:
+        suspension = Suspension(generator=generator, context_code=None)
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.suspended_atoms_lock.acquire()
+        # ==============================================================================================================
+
+        self.suspended_atoms[atom.actor.address] = suspension
+
+        # ==============================================================================================================
+        self.suspended_atoms_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        return suspension
+
+    @staticmethod
+    async def step(awaitable: Awaitable) -> Any:
+        return await awaitable
+
+    def wake(self, atom: Atom, suspension: Suspension, task: Future):
+        """
+        Hands the outcome of a step over to a parked actor, and puts the actor into the ready queue.
+        Runs on the event loop's or on the thread pool's thread. Steps of killed actors are cancelled.
+        """
+        if task.cancelled():
+            return
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.suspended_atoms_lock.acquire()
+        # ==============================================================================================================
+
+        awaited = self.suspended_atoms.get(atom.actor.address, None) is suspension and not suspension.ready
+
+        if awaited:
+            suspension.error = task.exception()
+            suspension.response = task.result() if suspension.error is None else None
+            suspension.ready = True
+
+        # ==============================================================================================================
+        self.suspended_atoms_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        if awaited:
+            with self.execution_condition:
+                self.candidates.append(atom)
+                self.execution_condition.notify()
+
+    def start_event_loop(self) -> asyncio.AbstractEventLoop:
+        if self.event_loop is None:
+            self.event_loop = asyncio.new_event_loop()
+            self.event_loop_thread = threading.Thread(target=self.event_loop.run_forever, daemon=True)
+            self.event_loop_thread.start()
+
+        return self.event_loop
+
+    def start_blocking_pool(self) -> ThreadPoolExecutor:
+        if self.blocking_pool is None:
+            self.blocking_pool = ThreadPoolExecutor(
+                max_workers=self.config.blocking_pool_size,
+                thread_name_prefix=f'{self.name}-blocking'
+            )
+
+        return self.blocking_pool
+
+    def stop_event_loop(self):
+        if self.event_loop is None:
+            return
+
+        async def cancel_steps():
+            for task in asyncio.all_tasks():
+                if task is not asyncio.current_task():
+                    task.cancel()
+
+        asyncio.run_coroutine_threadsafe(cancel_steps(), self.event_loop).result()
+
+        self.event_loop.call_soon_threadsafe(self.event_loop.stop)
+        self.event_loop_thread.join()
+        self.event_loop.close()
+
+    def expire_asks(self) -> List[Atom]:
+        """
+        Fails asks whose timeout has expired.
+        :return: Atoms that have to be put into the ready queue, to be resumed with AskTimeout.
+        """
+        expired = []
+        now = time.monotonic()
+
+        while self.ask_deadlines and self.ask_deadlines[0][0] <= now:
+            _, _, atom, suspension = heapq.heappop(self.ask_deadlines)
+
+            # ----------------------------------------------------------------------------------------------------------
+            self.suspended_atoms_lock.acquire()
+            # ==========================================================================================================
+
+            # The response may have arrived already, or the actor may be dead
+            if self.suspended_atoms.get(atom.actor.address, None) is suspension and not suspension.ready:
+                suspension.error = AskTimeout(f"No response to ask with context code {suspension.context_code}.")
+                suspension.ready = True
+                expired.append(atom)
+
+            # ==========================================================================================================
+            self.suspended_atoms_lock.release()
+            # ----------------------------------------------------------------------------------------------------------
+
+        return expired
+
+    def spawn_address(self, event: SpawnEvent) -> Tuple[Address, Optional[int]]:
+        """
+        :return: Address of an actor that is about to be spawned, and its process if it is already chosen.
+            Numeric addresses encode the process, so children are spread over processes in a round-robin manner,
+            unless they are spawned near another actor.
+        """
+        process_idx = self.locate(event.near.address) if event.near is not None else None
+
+        if self.config.addressing == 'numeric':
+            if process_idx is None:
+                process_idx = next(self.spawn_counter) % len(self.process_idx_to_queue)
+
+            return self.address_allocator.allocate(process_idx), process_idx
+
+        address = event.address or f"{event.parent.address}/{event.actor_type.__name__}-{uuid.uuid1()}"
+        return address, process_idx
+
+    def spawn_local(self, event: SpawnEvent) -> ActorRef:
+        """
+        Constructs a child in this process right away, and lets the actor system route it afterwards.
+        Messages sent to the child from this process are delivered at once. Other processes reach it as soon as
+        they learn its route, and messages that the actor system gets meanwhile are held until then.
+        A child whose constructor fails is not routed, as with spawns placed by the actor system.
+        :return: Ref of the child.
+        """
+        name = None
+
+        if self.config.addressing == 'numeric':
+            address, name = self.address_allocator.allocate(self.process_idx), event.address
+
+        else:
+            address = event.address or f"{event.parent.address}/{event.actor_type.__name__}-{uuid.uuid1()}"
+
+        try:
+            atom = self.event_manager.create_atom(
+                actor_type=event.actor_type,
+                address=address,
+                parent_ref=event.parent,
+                args=event.args,
+                kwargs=event.kwargs,
+                mailbox_config=event.mailbox_config
+            )
+
+        except Exception:
+            return ActorRef(address)
+
+        self.atom_by_name[address] = atom
+        self.local_addresses.add(address)
+        self.event_manager.schedule([atom])
+
+        # Sent before anything that the parent yields next (e.g. a kill of the child)
+        self.outbound.put_now(
+            self.pipe.child_output_queue,
+            ActorLocalSpawnEvent(
+                actor_type=event.actor_type,
+                parent_ref=event.parent,
+                address=address,
+                process_idx=self.process_idx,
+                name=name
+            )
+        )
+
+        return ActorRef(address)
+
+    def spawn_many(self, event: SpawnManyEvent) -> List[ActorRef]:
+        """
+        Asks the actor system to spawn actors in batches of 'spawn_batch_size' (see ActorSystem.spawn_many).
+        :return: Refs of the actors.
+        """
+        refs = []
+
+        for start in range(0, len(event.args_list), self.config.spawn_batch_size):
+            args_list = event.args_list[start:start + self.config.spawn_batch_size]
+            process_indices = None
+
+            if self.config.addressing == 'numeric':
+                process_indices = [next(self.spawn_counter) % len(self.process_idx_to_queue) for _ in args_list]
+                addresses = [self.address_allocator.allocate(process_idx) for process_idx in process_indices]
+
+            else:
+                prefix = f"{event.parent.address}/{event.actor_type.__name__}-{uuid.uuid1()}"
+                addresses = [f"{prefix}-{idx}" for idx in range(len(args_list))]
+
+            self.outbound.put_now(
+                self.pipe.child_output_queue,
+                ActorBatchSpawnEvent(
+                    actor_type=event.actor_type,
+                    parent_ref=event.parent,
+                    addresses=addresses,
+                    args_list=args_list,
+                    kwargs_list=event.kwargs_list[start:start + len(args_list)] if event.kwargs_list else None,
+                    process_indices=process_indices,
+                    mailbox_config=event.mailbox_config
+                )
+            )
+
+            refs.extend(ActorRef(address) for address in addresses)
+
+        return refs
+
+    def locate(self, address: Address) -> Optional[int]:
+        """
+        :return: Process that hosts an actor, as far as this executor knows.
+        """
+        if address in self.local_addresses:
+            return self.process_idx
+
+        process_idx = self.actor_to_process.get(address, None)
+
+        if process_idx is None and is_numeric(address):
+            process_idx = self.numeric_process(address)
+
+        return process_idx
+
+    def numeric_process(self, address: int) -> Optional[int]:
+        """
+        :return: Process encoded in a numeric address, unless the actor is hosted by another node of the cluster.
+        """
+        return address_process(address) if address_node(address) == self.config.node_idx else None
+
+    def sample_traffic(self, sender: Address, target: Address):
+        """
+        Counts one of every 'affinity_sampling' messages sent to other processes.
+        """
+        self.traffic_countdown -= 1
+
+        if self.traffic_countdown > 0:
+            return
+
+        self.traffic_countdown = self.config.affinity_sampling
+        self.traffic[(sender, target)] = self.traffic.get((sender, target), 0) + 1
 
     def finalize(self):
+        with self.turn_lock:
+            self.outbound.flush_all()
+
+        self.stop_event_loop()
+
+        if self.blocking_pool is not None:
+            # Blocking calls that are already running are waited for
+            self.blocking_pool.shutdown(cancel_futures=True)
+
         self.event_manager.join()
 
 
@@ -0,0 +1,75 @@
+import time
+from typing import Any, Dict, List
+
+from stardust.actor.system_events import SystemEvent, MessageEvent, MessageBatchEvent
+
+
+class OutboundBuffer:
+    """
+    Per-destination buffers of outgoing messages.
+    Messages that go to the same queue are coalesced into a single MessageBatchEvent, so that a turn of
+    a fan-out actor costs one put per destination instead of one put per message.
+    Buffers are flushed once they reach 'batch_size' messages or once they are older than 'linger' seconds.
+    """
+
+    def __init__(self, batch_size: int, linger: float):
+        self.batch_size = batch_size
+        self.linger = linger
+
+        self.__buffers: Dict[Any, List[MessageEvent]] = dict()
+        self.__created_at: Dict[Any, float] = dict()
+
+    def put(self, queue: Any, event: MessageEvent):
+        buffer = self.__buffers.get(queue, None)
+
+        if buffer is None:
+            buffer = self.__buffers[queue] = []
+            self.__created_at[queue] = time.monotonic()
+
+        buffer.append(event)
+
+        if len(buffer) >= self.batch_size:
+            self.flush(queue)
+
+    def put_now(self, queue: Any, event: SystemEvent):
+        """
+        Puts an event that can not be batched, preserving its order relative to buffered messages.
+        """
+        self.flush(queue)
+        queue.put(event)
+
+    def flush(self, queue: Any):
+        buffer = self.__buffers.pop(queue, None)
+        self.__created_at.pop(queue, None)
+
+        if not buffer:
+            return
+
+        if len(buffer) == 1:
+            queue.put(buffer[0])
+
+        else:
+            queue.put(MessageBatchEvent(events=buffer))
+
+    def flush_expired(self):
+        """
+        Flushes buffers that are older than 'linger' seconds.
+        """
+        if not self.__buffers:
+            return
+
+        if self.linger <= 0:
+            self.flush_all()
+            return
+
+        deadline = time.monotonic() - self.linger
+
+        for queue in [queue for queue, created_at in self.__created_at.items() if created_at <= deadline]:
+            self.flush(queue)
+
+    def flush_all(self):
+        for queue in list(self.__buffers.keys()):
+            self.flush(queue)
+
+    def __len__(self):
+        return sum(len(buffer) for buffer in self.__buffers.values())
@@ -0,0 +1,474 @@
+import time
+import heapq
+import random
+import threading
+import dataclasses
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .address import Address, PROCESS_BITS, PROCESS_MASK
+from .system_events import WorkerStatsEvent, NodeStatsEvent
+
+
+LEAST_LOADED = 'least_loaded'  # the process with the smallest load
+POWER_OF_TWO = 'power_of_two'  # the less loaded of two random processes
+TYPE_SPREAD = 'type_spread'    # the process with the fewest actors of the same type, ties broken by load
+
+PLACEMENT_STRATEGIES = (LEAST_LOADED, POWER_OF_TWO, TYPE_SPREAD)
+
+SUGGEST = 'suggest'  # moves are only suggested, see ActorSystem.affinity_suggestions
+AUTO = 'auto'        # actors are moved with migration
+
+AFFINITY_MODES = (SUGGEST, AUTO)
+
+
+# Workers of other nodes of a cluster are placement targets as well: a target is either the index of a local process,
+# or remote_target(node, process)
+def remote_target(node_idx: int, process_idx: int) -> int:
+    return ((node_idx + 1) << PROCESS_BITS) | process_idx
+
+
+def target_location(target: int) -> Tuple[Optional[int], int]:
+    """
+    :return: Node of a placement target (None for this node) and its process.
+    """
+    if target <= PROCESS_MASK:
+        return None, target
+
+    return (target >> PROCESS_BITS) - 1, target & PROCESS_MASK
+
+
+@dataclass
+class WorkerStats:
+    process_idx: int
+    actors: int = 0                  # actors placed on the process and not yet dead
+    backlog: int = 0                 # messages waiting in mailboxes, as of the last report
+    ready: int = 0                   # actors waiting in the ready queue, as of the last report
+    messages_per_second: float = 0.0
+    cpu_time: float = 0.0            # CPU time of the process, in seconds
+    cpu_usage: float = 0.0           # share of a CPU used by the process since the previous report
+    overflow_counts: Dict[str, int] = field(default_factory=dict)
+    placed_since_report: int = 0     # actors placed after the last report, not yet reflected in its backlog
+    node_idx: Optional[int] = None   # node of a remote worker (None - this node)
+
+    @property
+    def load(self) -> float:
+        return self.backlog + self.ready + self.placed_since_report
+
+
+class LoadBalancingService:
+    """
+    Keeps track of actors and load of every executor, and places new actors according to a placement strategy.
+    Executors report their load with WorkerStatsEvents every 'stats_interval' seconds.
+    Workers of other nodes of a cluster are added with add_node, and their load comes with NodeStatsEvents.
+    """
+
+    def __init__(self, process_indices: List[int], strategy: str = TYPE_SPREAD):
+        assert strategy in PLACEMENT_STRATEGIES, f'Placement strategy must be one of {PLACEMENT_STRATEGIES}.'
+
+        self.strategy = strategy
+
+        self.__stats: Dict[int, WorkerStats] = {
+            process_idx: WorkerStats(process_idx=process_idx) for process_idx in process_indices
+        }
+        self.__reports: Dict[int, WorkerStatsEvent] = dict()
+
+        # Process -> actor type name -> number of actors
+        self.__type_counts: Dict[int, Dict[str, int]] = {process_idx: dict() for process_idx in process_indices}
+
+        # Address -> (process, actor type name) of every live actor
+        self.__actors: Dict[Address, tuple] = dict()
+
+        self.__lock = threading.Lock()
+
+    def place(self, actor_typename: str, process_idx: Optional[int] = None) -> int:
+        """
+        Picks a process for a new actor (unless it is already chosen) and accounts for it.
+        :return: Index of the process that is going to host the actor, or a remote target (see target_location).
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        process_idx = self.__place(actor_typename, process_idx)
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        return process_idx
+
+    def place_many(self, actor_typename: str, process_indices: List[Optional[int]]) -> List[int]:
+        """
+        Same as place, for many actors of the same type at once.
+        :param process_indices: Process of every actor, if it is already chosen, or None.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        placement = list(process_indices)
+
+        if self.strategy == POWER_OF_TWO:
+            placement = [self.__place(actor_typename, process_idx) for process_idx in placement]
+
+        else:
+            # Placing actors one by one on the process with the smallest key comes down to a heap of keys:
+            # every actor placed on a process increases each part of its key by one
+            keys = [(self.__key(process_idx, actor_typename), process_idx) for process_idx in self.__stats.keys()]
+            heapq.heapify(keys)
+
+            for position, process_idx in enumerate(placement):
+                if process_idx is None:
+                    key, process_idx = keys[0]
+                    heapq.heapreplace(keys, (tuple(part + 1 for part in key), process_idx))
+
+                    placement[position] = process_idx
+
+            counts: Dict[int, int] = dict()
+
+            for process_idx in placement:
+                counts[process_idx] = counts.get(process_idx, 0) + 1
+
+            for process_idx, count in counts.items():
+                self.__add(process_idx, actor_typename, count)
+                self.__stats[process_idx].placed_since_report += count
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        return placement
+
+    def register(self, address: Address, actor_typename: str, process_idx: int):
+        """
+        Remembers a placed actor, so that it is accounted for correctly once it dies or moves.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        self.__actors[address] = (process_idx, actor_typename)
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def register_many(self, addresses: List[Address], actor_typename: str, process_indices: List[int]):
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        for address, process_idx in zip(addresses, process_indices):
+            self.__actors[address] = (process_idx, actor_typename)
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def remove(self, address: Address):
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        entry = self.__actors.pop(address, None)
+
+        if entry is not None:
+            self.__discard(*entry)
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def move(self, address: Address, process_idx: int):
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        entry = self.__actors.get(address, None)
+
+        if entry is not None:
+            self.__discard(*entry)
+            self.__add(process_idx, entry[1])
+            self.__actors[address] = (process_idx, entry[1])
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def update(self, event: WorkerStatsEvent):
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        stats = self.__stats[event.process_idx]
+        previous = self.__reports.get(event.process_idx, None)
+
+        stats.backlog = event.backlog
+        stats.ready = event.ready
+        stats.cpu_time = event.cpu_time
+        stats.overflow_counts = dict(event.overflow_counts)
+        stats.placed_since_report = 0
+
+        if previous is not None and event.timestamp > previous.timestamp:
+            elapsed = event.timestamp - previous.timestamp
+            stats.messages_per_second = (event.messages - previous.messages) / elapsed
+            stats.cpu_usage = (event.cpu_time - previous.cpu_time) / elapsed
+
+        self.__reports[event.process_idx] = event
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def add_node(self, node_idx: int, num_processes: int):
+        """
+        Makes workers of another node of the cluster placement targets.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        for process_idx in range(num_processes):
+            target = remote_target(node_idx, process_idx)
+
+            if target not in self.__stats:
+                self.__stats[target] = WorkerStats(process_idx=process_idx, node_idx=node_idx)
+                self.__type_counts[target] = dict()
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def remove_node(self, node_idx: int):
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        targets = {target for target, stats in self.__stats.items() if stats.node_idx == node_idx}
+
+        for target in targets:
+            del self.__stats[target]
+            del self.__type_counts[target]
+
+        for address in [address for address, entry in self.__actors.items() if entry[0] in targets]:
+            del self.__actors[address]
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def update_node(self, event: NodeStatsEvent):
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        for process_idx, (actors, backlog, ready, messages_per_second) in event.loads.items():
+            stats = self.__stats.get(remote_target(event.node_idx, process_idx), None)
+
+            if stats is not None:
+                stats.actors = actors
+                stats.backlog = backlog
+                stats.ready = ready
+                stats.messages_per_second = messages_per_second
+                stats.placed_since_report = 0
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def stats(self, remote: bool = False) -> Dict[int, WorkerStats]:
+        """
+        :param remote: Include workers of other nodes, as of their node's last report.
+        :return: Placement target (see target_location) -> a snapshot of its stats.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        snapshot = {
+            target: dataclasses.replace(stats, overflow_counts=dict(stats.overflow_counts))
+            for target, stats in self.__stats.items()
+            if remote or stats.node_idx is None
+        }
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        return snapshot
+
+    def __place(self, actor_typename: str, process_idx: Optional[int]) -> int:
+        if process_idx is None:
+            if self.strategy == POWER_OF_TWO:
+                candidates = random.sample(list(self.__stats.keys()), min(2, len(self.__stats)))
+                process_idx = min(candidates, key=self.__load)
+
+            else:
+                process_idx = min(self.__stats.keys(), key=lambda idx: self.__key(idx, actor_typename))
+
+        self.__add(process_idx, actor_typename)
+        self.__stats[process_idx].placed_since_report += 1
+
+        return process_idx
+
+    def __load(self, process_idx: int) -> tuple:
+        stats = self.__stats[process_idx]
+        return stats.load, stats.actors
+
+    def __key(self, process_idx: int, actor_typename: str) -> tuple:
+        """
+        :return: Key of a process for the 'least_loaded' and 'type_spread' strategies: the smallest one wins.
+        """
+        if self.strategy == LEAST_LOADED:
+            return self.__load(process_idx)
+
+        return (self.__type_counts[process_idx].get(actor_typename, 0),) + self.__load(process_idx)
+
+    def __add(self, process_idx: int, actor_typename: str, count: int = 1):
+        counts = self.__type_counts[process_idx]
+        counts[actor_typename] = counts.get(actor_typename, 0) + count
+        self.__stats[process_idx].actors += count
+
+    def __discard(self, process_idx: int, actor_typename: str):
+        # Workers of a node that has left are forgotten along with their actors
+        if process_idx not in self.__stats:
+            return
+
+        counts = self.__type_counts[process_idx]
+        counts[actor_typename] = max(counts.get(actor_typename, 0) - 1, 0)
+        self.__stats[process_idx].actors = max(self.__stats[process_idx].actors - 1, 0)
+
+
+class AffinityGraph:
+    """
+    Sampled sender -> target traffic between actors of different processes.
+    Weights decay every round, so the graph follows the recent traffic.
+    """
+
+    # Weights are multiplied by DECAY every round, and forgotten once they fall below 1
+    DECAY = 0.5
+
+    # An actor moves only if it sends/receives at least MIN_GAIN more sampled messages to/from the new process
+    MIN_GAIN = 4
+
+    # An actor that was suggested to move is not suggested again for MOVE_COOLDOWN seconds
+    MOVE_COOLDOWN = 10.0
+
+    MAX_MOVES = 16  # per round
+
+    def __init__(self):
+        self.__weights: Dict[Tuple[Address, Address], float] = dict()
+        self.__last_moved: Dict[Address, float] = dict()
+
+        # Moves suggested by the latest round
+        self.suggestions: List[Tuple[Address, int, int]] = []
+
+        self.__lock = threading.Lock()
+
+    def record(self, traffic: Dict[Tuple[Address, Address], int]):
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        for edge, count in traffic.items():
+            self.__weights[edge] = self.__weights.get(edge, 0.0) + count
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+    def suggest_moves(self,
+                      locations: Dict[Address, int],
+                      actor_counts: Dict[int, int]) -> List[Tuple[Address, int, int]]:
+        """
+        Finds actors that exchange most of their messages with actors of another process, heaviest first.
+        Partners of a moved actor stay where they are during the round, so that a pair does not swap places.
+        An actor is not moved to a process that would host more than twice the average number of actors (plus one).
+        Decays the graph.
+        :param locations: Address -> process of live actors.
+        :param actor_counts: Process -> number of actors.
+        :return: A list of (address, current process, suggested process).
+        """
+        now = time.monotonic()
+        capacity = 2 * sum(actor_counts.values()) / max(len(actor_counts), 1) + 1
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.__lock.acquire()
+        # ==============================================================================================================
+
+        # Address -> process -> weight of messages exchanged with actors of that process
+        neighbours: Dict[Address, Dict[int, float]] = dict()
+        partners: Dict[Address, List[Address]] = dict()
+
+        for (sender, target), weight in self.__weights.items():
+            sender_process = locations.get(sender, None)
+            target_process = locations.get(target, None)
+
+            if sender_process is None or target_process is None:
+                continue
+
+            sender_neighbours = neighbours.setdefault(sender, dict())
+            sender_neighbours[target_process] = sender_neighbours.get(target_process, 0.0) + weight
+
+            target_neighbours = neighbours.setdefault(target, dict())
+            target_neighbours[sender_process] = target_neighbours.get(sender_process, 0.0) + weight
+
+            partners.setdefault(sender, []).append(target)
+            partners.setdefault(target, []).append(sender)
+
+        # Decay, and forget dead actors and weak edges
+        self.__weights = {
+            (sender, target): weight * self.DECAY
+            for (sender, target), weight in self.__weights.items()
+            if weight * self.DECAY >= 1 and sender in locations and target in locations
+        }
+
+        self.__last_moved = {
+            address: moved_at for address, moved_at in self.__last_moved.items()
+            if now - moved_at < self.MOVE_COOLDOWN
+        }
+
+        candidates = []
+
+        for address, weights in neighbours.items():
+            if address in self.__last_moved:
+                continue
+
+            current = locations[address]
+            best = max(weights.keys(), key=weights.get)
+            gain = weights[best] - weights.get(current, 0.0)
+
+            if best != current and gain >= self.MIN_GAIN:
+                candidates.append((gain, address, current, best))
+
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        counts = dict(actor_counts)
+        fixed = set()
+        moves = []
+
+        for gain, address, current, best in candidates:
+            if len(moves) >= self.MAX_MOVES:
+                break
+
+            if address in fixed or counts.get(best, 0) + 1 > capacity:
+                continue
+
+            moves.append((address, current, best))
+
+            counts[best] = counts.get(best, 0) + 1
+            counts[current] = counts.get(current, 0) - 1
+
+            self.__last_moved[address] = now
+
+            fixed.add(address)
+            fixed.update(partners[address])
+
+        self.suggestions = moves
+
+        # ==============================================================================================================
+        self.__lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        return moves
@@ -1,40 +1,311 @@
-from typing import Optional, List
+import heapq
+import threading
+from collections import deque
+from typing import Optional, Deque, Dict, List, Callable, Any
+from .config import MailboxConfig
 from .system_events import MessageEvent
+from .system_messages import SystemMessage, PoisonPillMessage
+
+
+# Shared by mailboxes without a config (configs are immutable)
+DEFAULT_MAILBOX_CONFIG = MailboxConfig()
 
 
 class Mailbox:
-    def __init__(self, actor_address: str, initial_mailbox: Optional[list] = None):
+    __slots__ = ('__address', '__events', '__config', '__overflow_count', '__pills', '__lock')
+
+    def __init__(self,
+                 actor_address: str,
+                 initial_mailbox: Optional[list] = None,
+                 config: Optional[MailboxConfig] = None,
+                 lock: Optional[threading.Lock] = None):
+
         self.__address = actor_address
-        self.__events = []
-        self.__events_in_queue = 0
+        self.__events: Deque[MessageEvent] = deque()
+
+        self.__config = config or DEFAULT_MAILBOX_CONFIG
+        self.__overflow_count = 0
+
+        # Producers and the consumer run in parallel. A bounded mailbox checks for room, and makes it, under a lock;
+        # an unbounded one does without it, since appends and pops of a deque are atomic.
+        if lock is None and self.__config.capacity is not None:
+            lock = threading.Lock()
+
+        self.__lock = lock
+
+        # Poison pills keep their place among other messages, but they never count against the capacity, and are
+        # never dropped: an actor that is stopped softly has to stop. Counted by bounded mailboxes only.
+        self.__pills = 0
 
         if initial_mailbox:
-            self.__events.extend(initial_mailbox)
-            self.__events_in_queue += len(initial_mailbox)
+            for event in initial_mailbox:
+                self.__admit(event)
 
-    def enqueue(self, event: MessageEvent):
-        self.__events.append(event)
-        self.__events_in_queue += 1
+    def enqueue(self, event: MessageEvent) -> bool:
+        """
+        :return: False if a mailbox is full and the event was not queued - depending on the overflow policy, it was
+            dropped, or it has to be rejected.
+        """
+        if self.__lock is None:
+            self._push(event)
+            return True
+
+        with self.__lock:
+            if type(event.message) is PoisonPillMessage:
+                self.__admit(event)
+                return True
+
+            if self.full():
+                self.__overflow_count += 1
+                return False
+
+            self._push(event)
+
+        return True
+
+    def displace(self, event: MessageEvent) -> Optional[MessageEvent]:
+        """
+        Enqueues an event that did not fit in place of the oldest queued message (the 'drop_oldest' overflow policy).
+        :return: The dropped message, or None if the consumer has made room meanwhile.
+        """
+        with self.__lock:
+            evicted = self._evict() if self.full() else None
+            self._push(event)
+
+        return evicted
 
     def dequeue(self) -> Optional[MessageEvent]:
-        event = None if self.__events_in_queue == 0 else self.__events.pop(0)
-        self.__events_in_queue = max(self.__events_in_queue - 1, 0)
+        if self.__lock is None:
+            event = self._pop() if len(self) > 0 else None
+
+        else:
+            with self.__lock:
+                event = self._pop() if len(self) > 0 else None
+
+                if event is not None and type(event.message) is PoisonPillMessage:
+                    self.__pills -= 1
 
         return event
 
+    def full(self) -> bool:
+        capacity = self.__config.capacity
+        return capacity is not None and self._bounded_size() - self.__pills >= capacity
+
+    def __admit(self, event: MessageEvent):
+        if type(event.message) is PoisonPillMessage:
+            self.__pills += 1
+
+        self._push(event)
+
+    def _push(self, event: MessageEvent):
+        self.__events.append(event)
+
+    def _pop(self) -> MessageEvent:
+        return self.__events.popleft()
+
+    def _evict(self) -> Optional[MessageEvent]:
+        """
+        Drops a message to make room for a new one (the 'drop_oldest' overflow policy).
+        :return: The dropped message, or None if there is nothing to drop.
+        """
+        return pop_droppable(self.__events)
+
+    def _bounded_size(self) -> int:
+        """
+        :return: Number of queued messages that count against the capacity.
+        """
+        return len(self.__events)
+
     @property
     def actor_address(self):
         return self.__address
 
+    @property
+    def config(self) -> MailboxConfig:
+        return self.__config
+
+    @property
+    def overflow_policy(self) -> str:
+        return self.__config.overflow_policy
+
+    @property
+    def overflow_count(self) -> int:
+        """
+        :return: How many times a message did not fit into the mailbox.
+        """
+        return self.__overflow_count
+
     @property
     def events(self) -> List[MessageEvent]:
-        return self.__events
+        """
+        :return: Queued events, in the order they are going to be dequeued.
+        """
+        return list(self.__events)
 
     def __len__(self):
-        return self.__events_in_queue
+        return len(self.__events)
 
     def __str__(self):
         return f"Mailbox(Actor '{self.__address}')"
 
     def __repr__(self):
         return str(self)
+
+
+class PriorityMailbox(Mailbox):
+    """
+    Mailbox with a control lane and user-defined priority classes.
+    Control system messages (startup) overtake everything else and never count against the capacity.
+    Other messages, poison pills included, are dequeued by priority (lower value first), and in FIFO order within
+    the same priority.
+    Enqueue and dequeue cost O(log k), where k is the number of priority classes in use, and eviction O(k).
+    """
+    __slots__ = ('__control', '__lanes', '__priorities', '__size', '__priority')
+
+    def __init__(self,
+                 actor_address: str,
+                 initial_mailbox: Optional[list] = None,
+                 config: Optional[MailboxConfig] = None,
+                 priority: Optional[Callable[[Any], int]] = None):
+
+        self.__control: Deque[MessageEvent] = deque()
+        self.__lanes: Dict[int, Deque[MessageEvent]] = dict()
+        self.__priorities: List[int] = []  # heap of priorities that have non-empty lanes
+        self.__size = 0
+
+        self.__priority = priority or message_priority
+
+        # Unlike deque operations, heap operations are not atomic: the mailbox is locked even if it is unbounded
+        super(PriorityMailbox, self).__init__(
+            actor_address=actor_address,
+            initial_mailbox=initial_mailbox,
+            config=config,
+            lock=threading.Lock()
+        )
+
+    def enqueue(self, event: MessageEvent) -> bool:
+        if is_control_message(event.message):
+            self.__control.append(event)
+            return True
+
+        return super(PriorityMailbox, self).enqueue(event)
+
+    def _push(self, event: MessageEvent):
+        if is_control_message(event.message):
+            self.__control.append(event)
+            return
+
+        priority = self.__priority(event.message)
+        lane = self.__lanes.get(priority, None)
+
+        if lane is None:
+            lane = self.__lanes[priority] = deque()
+            heapq.heappush(self.__priorities, priority)
+
+        lane.append(event)
+        self.__size += 1
+
+    def _pop(self) -> MessageEvent:
+        if self.__control:
+            return self.__control.popleft()
+
+        priority = self.__priorities[0]
+        lane = self.__lanes[priority]
+        event = lane.popleft()
+
+        if not lane:
+            heapq.heappop(self.__priorities)
+            del self.__lanes[priority]
+
+        self.__size -= 1
+
+        return event
+
+    def _evict(self) -> Optional[MessageEvent]:
+        # The oldest message of the lowest priority class goes first. A lane may hold nothing but poison pills, then
+        # the next lowest class is tried - rare enough for a linear scan, rather than keeping the classes sorted.
+        skipped = set()
+
+        while len(skipped) < len(self.__priorities):
+            priority = max(candidate for candidate in self.__priorities if candidate not in skipped)
+            lane = self.__lanes[priority]
+            event = pop_droppable(lane)
+
+            if event is not None:
+                break
+
+            skipped.add(priority)
+
+        else:
+            return None
+
+        if not lane:
+            self.__priorities.remove(priority)
+            heapq.heapify(self.__priorities)
+            del self.__lanes[priority]
+
+        self.__size -= 1
+
+        return event
+
+    def _bounded_size(self) -> int:
+        return self.__size
+
+    @property
+    def events(self) -> List[MessageEvent]:
+        events = list(self.__control)
+
+        for priority in sorted(self.__priorities):
+            events.extend(self.__lanes[priority])
+
+        return events
+
+    def __len__(self):
+        return len(self.__control) + self.__size
+
+    def __str__(self):
+        return f"PriorityMailbox(Actor '{self.actor_address}')"
+
+
+def create_mailbox(actor: Any,
+                   config: Optional[MailboxConfig] = None,
+                   initial_mailbox: Optional[list] = None) -> Mailbox:
+    """
+    :return: A mailbox for an actor: a priority one if the config asks for it, classified by Actor.message_priority.
+    """
+    if config is not None and config.priority:
+        return PriorityMailbox(
+            actor_address=actor.address,
+            initial_mailbox=initial_mailbox,
+            config=config,
+            priority=actor.message_priority
+        )
+
+    return Mailbox(
+        actor_address=actor.address,
+        initial_mailbox=initial_mailbox,
+        config=config
+    )
+
+
+def is_control_message(message: Any) -> bool:
+    return isinstance(message, SystemMessage) and message.control
+
+
+def pop_droppable(lane: Deque[MessageEvent]) -> Optional[MessageEvent]:
+    """
+    Removes the oldest message of a lane that may be dropped to make room: any but a poison pill.
+    """
+    for position, event in enumerate(lane):
+        if type(event.message) is not PoisonPillMessage:
+            del lane[position]
+            return event
+
+    return None
+
+
+def message_priority(message: Any) -> int:
+    """
+    Default priority classifier: a 'priority' attribute of a message, or 0.
+    """
+    return getattr(message, 'priority', 0)
@@ -0,0 +1,524 @@
+import os
+import hmac
+import pickle
+import struct
+import asyncio
+import hashlib
+import threading
+from queue import Queue as ThreadingQueue
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .address import Address
+from .codec import BINARY, BinaryCodec
+from .load_balancing_service import WorkerStats
+from .system_events import (
+    MessageEvent, MessageBatchEvent, ExecutionStopped,
+    NodeHelloEvent, NodeMembersEvent, NodeJoinedEvent, NodeLeftEvent, NodeStatsEvent, RouteQueryEvent
+)
+
+
+# Every frame on a connection is prefixed with its size
+FRAME_SIZE = struct.Struct('>I')
+
+# A node that accepts a connection sends a random challenge, which the connecting node signs along with its hello.
+# A hello is small: a larger frame ends the connection before it is read.
+CHALLENGE_SIZE = 32
+SIGNATURE_SIZE = hashlib.sha256().digest_size
+HELLO_SIZE_LIMIT = 1 << 16
+
+# A node that does not get through the handshake within HANDSHAKE_TIMEOUT seconds is disconnected
+HANDSHAKE_TIMEOUT = 5.0
+
+# Seeds that cannot be reached yet are retried every CONNECT_RETRY_INTERVAL seconds
+CONNECT_RETRY_INTERVAL = 0.5
+
+# Events that are still waiting to be written when the actor system stops get up to FLUSH_TIMEOUT seconds
+FLUSH_TIMEOUT = 1.0
+
+
+class Peer:
+    """
+    Another node of the cluster: its events are written to a persistent connection of this node, while
+    the peer writes to a connection of its own, so every connection carries events one way only.
+    """
+
+    __slots__ = (
+        'node_idx', 'host', 'port', 'num_processes', 'reply_prefix',
+        'outbox', 'wakeup', 'writer', 'encode', 'task'
+    )
+
+    def __init__(self, hello: NodeHelloEvent):
+        self.node_idx = hello.node_idx
+        self.host = hello.host
+        self.port = hello.port
+        self.num_processes = hello.num_processes
+        self.reply_prefix = hello.reply_prefix
+
+        # Events waiting to be written, guarded by NetworkService.peers_lock
+        self.outbox: List[Any] = []
+        self.wakeup = asyncio.Event()
+
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.encode: Optional[Callable[[Any], bytes]] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class NetworkService(threading.Thread):
+    """
+    Connects the actor system to other nodes of a cluster over TCP, on an asyncio event loop of its own thread.
+
+    A node listens on 'host':'port' and connects to its seeds. Every connection starts with a NodeHelloEvent,
+    and a node that gets a hello connects back and tells the newcomer about the other nodes it knows,
+    so nodes end up connected to each other. The hello is signed with the cluster's 'secret' (HMAC-SHA256 of
+    a challenge of the accepting node, and of the hello): nothing is decoded before the signature is checked,
+    and connections of nodes that do not know the secret are closed.
+
+    Events for a node are put into its outbox by the actor system's threads, and written by one task per node:
+    consecutive messages are written as a MessageBatchEvent of up to 'batch_size' messages, and frames are encoded
+    by a codec of the connection (see stardust.actor.codec), so an address crosses the network once.
+    Events that arrive from other nodes are put into 'incoming_queue', as events of executors are
+    (see IncomingEventManager). Events for a node that is not connected, or has left, are dropped.
+    """
+
+    def __init__(self,
+
+                 node_idx: int,
+                 host: str,
+                 port: int,
+                 seeds: Tuple[str, ...],
+                 num_processes: int,
+                 reply_prefix: str,
+                 secret: bytes,
+
+                 incoming_queue: ThreadingQueue,
+                 local_stats: Callable[[], Dict[int, WorkerStats]],
+
+                 codec: str = BINARY,
+                 batch_size: int = 64,
+                 stats_interval: float = 0.5,
+
+                 *args, **kwargs):
+
+        super(NetworkService, self).__init__(*args, daemon=True, **kwargs)
+
+        self.node_idx = node_idx
+        self.host = host
+        self.port = port
+        self.seeds = seeds
+        self.num_processes = num_processes
+        self.reply_prefix = reply_prefix
+        self.secret = secret
+
+        self.incoming_queue = incoming_queue
+        self.local_stats = local_stats
+
+        self.codec = codec
+        self.batch_size = batch_size
+        self.stats_interval = stats_interval
+
+        self.loop = asyncio.new_event_loop()
+        self.listening = threading.Event()
+        self.stopping = asyncio.Event()
+
+        self.peers: Dict[int, Peer] = dict()
+        self.peers_lock = threading.Lock()
+
+        # Outgoing connections by (host, port), with the codec of each, and addresses that are being connected to
+        self.connections: Dict[Tuple[str, int], Tuple[asyncio.StreamWriter, Callable[[Any], bytes]]] = dict()
+        self.connecting: Set[Tuple[str, int]] = set()
+
+        # Writers of incoming connections, closed when the node stops
+        self.incoming_writers: Set[asyncio.StreamWriter] = set()
+
+    def send(self, node_idx: int, event: Any) -> bool:
+        """
+        Thread-safe.
+        :return: False if the node is unknown, and the event is dropped.
+        """
+        wake = False
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.peers_lock.acquire()
+        # ==============================================================================================================
+
+        peer = self.peers.get(node_idx, None)
+
+        if peer is not None:
+            peer.outbox.append(event)
+            wake = len(peer.outbox) == 1
+
+        # ==============================================================================================================
+        self.peers_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        # Events put while the outbox is being written wait for the next round, without waking the writer again
+        if wake:
+            self.loop.call_soon_threadsafe(peer.wakeup.set)
+
+        return peer is not None
+
+    def resolve(self, address: Address):
+        """
+        Asks every node where an actor is. The node that hosts it answers with a RouteAnswerEvent.
+        """
+        for node_idx in self.nodes().keys():
+            self.send(node_idx, RouteQueryEvent(address=address, node_idx=self.node_idx))
+
+    def reply_node(self, address: Address) -> Optional[int]:
+        """
+        :return: Node whose actor system waits for replies to an address (see AskService), if any.
+        """
+        if not isinstance(address, str):
+            return None
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.peers_lock.acquire()
+        # ==============================================================================================================
+
+        node_idx = next((peer.node_idx for peer in self.peers.values() if address.startswith(peer.reply_prefix)), None)
+
+        # ==============================================================================================================
+        self.peers_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        return node_idx
+
+    def nodes(self) -> Dict[int, Tuple[str, int]]:
+        """
+        :return: Node index -> (host, port) of other nodes of the cluster.
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        self.peers_lock.acquire()
+        # ==============================================================================================================
+
+        nodes = {node_idx: (peer.host, peer.port) for node_idx, peer in self.peers.items()}
+
+        # ==============================================================================================================
+        self.peers_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        return nodes
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.stopping.set)
+
+    def run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+
+        try:
+            self.loop.run_until_complete(self.serve())
+
+        finally:
+            self.listening.set()
+            self.loop.close()
+
+            self.incoming_queue.put(ExecutionStopped())
+
+    async def serve(self):
+        server = await asyncio.start_server(self.accept, self.host, self.port)
+
+        # The actual port, if any free port was asked for
+        self.port = server.sockets[0].getsockname()[1]
+        self.listening.set()
+
+        for seed in self.seeds:
+            host, _, port = seed.rpartition(':')
+            self.loop.create_task(self.connect(host, int(port), retry=True))
+
+        stats_task = self.loop.create_task(self.report_stats()) if self.stats_interval > 0 else None
+
+        await self.stopping.wait()
+
+        if stats_task is not None:
+            stats_task.cancel()
+
+        server.close()
+
+        for peer in list(self.peers.values()):
+            if peer.task is not None:
+                peer.task.cancel()
+
+            try:
+                await asyncio.wait_for(self.flush(peer), FLUSH_TIMEOUT)
+
+            except (OSError, asyncio.TimeoutError):
+                pass
+
+        for writer, _ in self.connections.values():
+            writer.close()
+
+        for writer in self.incoming_writers:
+            writer.close()
+
+        for task in asyncio.all_tasks():
+            if task is not asyncio.current_task():
+                task.cancel()
+
+    async def connect(self, host: str, port: int, retry: bool = False):
+        """
+        Opens a connection that this node writes to, and introduces the node.
+        :param retry: Keep trying until the node is reached (seeds may start later).
+        """
+        if (host, port) in self.connections or (host, port) in self.connecting:
+            return
+
+        self.connecting.add((host, port))
+
+        while True:
+            writer = None
+
+            try:
+                reader, writer = await asyncio.open_connection(host, port)
+                challenge = await asyncio.wait_for(reader.readexactly(CHALLENGE_SIZE), HANDSHAKE_TIMEOUT)
+                break
+
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                if writer is not None:
+                    writer.close()
+
+                if not retry:
+                    self.connecting.discard((host, port))
+                    return
+
+                await asyncio.sleep(CONNECT_RETRY_INTERVAL)
+
+        encode = BinaryCodec().encode if self.codec == BINARY else pickle.dumps
+
+        hello = encode(
+            NodeHelloEvent(
+                node_idx=self.node_idx,
+                host=self.host,
+                port=self.port,
+                num_processes=self.num_processes,
+                reply_prefix=self.reply_prefix
+            )
+        )
+
+        writer.write(sign(self.secret, challenge, hello) + FRAME_SIZE.pack(len(hello)) + hello)
+
+        self.connecting.discard((host, port))
+        self.connections[(host, port)] = (writer, encode)
+
+        # The node may have introduced itself already
+        for peer in self.peers.values():
+            if (peer.host, peer.port) == (host, port):
+                self.attach(peer)
+
+    def attach(self, peer: Peer):
+        if peer.writer is None and (peer.host, peer.port) in self.connections:
+            peer.writer, peer.encode = self.connections[(peer.host, peer.port)]
+            peer.wakeup.set()
+
+    async def accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Reads events that another node writes to its connection.
+        """
+        self.incoming_writers.add(writer)
+
+        decode = BinaryCodec().decode if self.codec == BINARY else pickle.loads
+        peer = None
+
+        challenge = os.urandom(CHALLENGE_SIZE)
+        writer.write(challenge)
+
+        try:
+            signature, frame = await asyncio.wait_for(self.read_hello(reader), HANDSHAKE_TIMEOUT)
+
+            # Decoding runs code of the sender (pickle), so a node that does not know the secret gets nothing decoded
+            if frame is None or not hmac.compare_digest(signature, sign(self.secret, challenge, frame)):
+                return
+
+            hello = decode(frame)
+
+            if not isinstance(hello, NodeHelloEvent) or hello.node_idx == self.node_idx:
+                return
+
+            peer = self.add_peer(hello)
+
+            while True:
+                event = decode(await self.read_frame(reader))
+
+                if isinstance(event, NodeMembersEvent):
+                    for node_idx, host, port in event.members:
+                        if node_idx != self.node_idx and node_idx not in self.peers:
+                            self.loop.create_task(self.connect(host, port))
+
+                else:
+                    self.incoming_queue.put(event)
+
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+
+        finally:
+            self.incoming_writers.discard(writer)
+            writer.close()
+
+            if peer is not None:
+                self.remove_peer(peer)
+
+    @staticmethod
+    async def read_frame(reader: asyncio.StreamReader) -> bytes:
+        size = FRAME_SIZE.unpack(await reader.readexactly(FRAME_SIZE.size))[0]
+        return await reader.readexactly(size)
+
+    @staticmethod
+    async def read_hello(reader: asyncio.StreamReader) -> Tuple[bytes, Optional[bytes]]:
+        """
+        :return: Signature and frame of a hello, not decoded yet. The frame is None if it is too large for a hello.
+        """
+        signature = await reader.readexactly(SIGNATURE_SIZE)
+        size = FRAME_SIZE.unpack(await reader.readexactly(FRAME_SIZE.size))[0]
+
+        if size > HELLO_SIZE_LIMIT:
+            return signature, None
+
+        return signature, await reader.readexactly(size)
+
+    def add_peer(self, hello: NodeHelloEvent) -> Peer:
+        peer = Peer(hello)
+
+        # The newcomer learns about the other nodes first
+        peer.outbox.append(
+            NodeMembersEvent(members=[(other.node_idx, other.host, other.port) for other in self.peers.values()])
+        )
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.peers_lock.acquire()
+        # ==============================================================================================================
+
+        previous = self.peers.get(peer.node_idx, None)
+        self.peers[peer.node_idx] = peer
+
+        # ==============================================================================================================
+        self.peers_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        if previous is not None and previous.task is not None:
+            previous.task.cancel()
+
+        peer.task = self.loop.create_task(self.write(peer))
+
+        self.attach(peer)
+        self.loop.create_task(self.connect(peer.host, peer.port))
+
+        self.incoming_queue.put(NodeJoinedEvent(node_idx=peer.node_idx, num_processes=peer.num_processes))
+
+        return peer
+
+    def remove_peer(self, peer: Peer):
+        # --------------------------------------------------------------------------------------------------------------
+        self.peers_lock.acquire()
+        # ==============================================================================================================
+
+        # The node may have reconnected meanwhile
+        left = self.peers.get(peer.node_idx, None) is peer
+
+        if left:
+            del self.peers[peer.node_idx]
+
+        # ==============================================================================================================
+        self.peers_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        if not left:
+            return
+
+        if peer.task is not None:
+            peer.task.cancel()
+
+        connection = self.connections.pop((peer.host, peer.port), None)
+
+        if connection is not None:
+            connection[0].close()
+
+        if not self.stopping.is_set():
+            self.incoming_queue.put(NodeLeftEvent(node_idx=peer.node_idx))
+
+    async def write(self, peer: Peer):
+        try:
+            while True:
+                await peer.wakeup.wait()
+                peer.wakeup.clear()
+
+                await self.flush(peer)
+
+        except OSError:
+            self.remove_peer(peer)
+
+    async def flush(self, peer: Peer):
+        """
+        Writes the outbox of a node, if it is connected.
+        """
+        if peer.writer is None:
+            return
+
+        # --------------------------------------------------------------------------------------------------------------
+        self.peers_lock.acquire()
+        # ==============================================================================================================
+
+        events, peer.outbox = peer.outbox, []
+
+        # ==============================================================================================================
+        self.peers_lock.release()
+        # --------------------------------------------------------------------------------------------------------------
+
+        if not events:
+            return
+
+        frames = []
+
+        for event in self.batch(events):
+            frame = peer.encode(event)
+            frames.append(FRAME_SIZE.pack(len(frame)))
+            frames.append(frame)
+
+        peer.writer.writelines(frames)
+        await peer.writer.drain()
+
+    def batch(self, events: List[Any]) -> List[Any]:
+        """
+        :return: Events with runs of messages put together into batches of up to 'batch_size' messages.
+        """
+        batched = []
+        messages: List[MessageEvent] = []
+
+        for event in events:
+            if type(event) is MessageEvent:
+                messages.append(event)
+
+                if len(messages) < self.batch_size:
+                    continue
+
+            if messages:
+                batched.append(messages[0] if len(messages) == 1 else MessageBatchEvent(events=messages))
+                messages = []
+
+            if type(event) is not MessageEvent:
+                batched.append(event)
+
+        if messages:
+            batched.append(messages[0] if len(messages) == 1 else MessageBatchEvent(events=messages))
+
+        return batched
+
+    async def report_stats(self):
+        """
+        Lets other nodes know the load of this node's workers, so they can place actors on them.
+        """
+        while True:
+            await asyncio.sleep(self.stats_interval)
+
+            event = NodeStatsEvent(
+                node_idx=self.node_idx,
+                loads={
+                    stats.process_idx: (stats.actors, stats.backlog, stats.ready, stats.messages_per_second)
+                    for stats in self.local_stats().values()
+                }
+            )
+
+            for node_idx in self.nodes().keys():
+                self.send(node_idx, event)
+
+
+def sign(secret: bytes, challenge: bytes, hello: bytes) -> bytes:
+    return hmac.new(secret, challenge + hello, hashlib.sha256).digest()
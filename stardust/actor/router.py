@@ -0,0 +1,139 @@
+import bisect
+import random
+import hashlib
+import itertools
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from .actor_ref import ActorRef
+from .address import Address
+
+
+# How a router picks a routee for a message
+ROUND_ROBIN = 'round_robin'            # routees in turn
+RANDOM = 'random'                      # a random routee
+CONSISTENT_HASH = 'consistent_hash'    # the same routee for the same key, as long as the routees are the same
+SMALLEST_MAILBOX = 'smallest_mailbox'  # the local routee with the fewest pending messages, see RouterRef.route
+
+ROUTING_STRATEGIES = (ROUND_ROBIN, RANDOM, CONSISTENT_HASH, SMALLEST_MAILBOX)
+
+
+class RouterRef(ActorRef):
+    """
+    Refers to a pool of actors (routees) that share a job. A message sent to a router goes to one of the routees,
+    chosen in the sender's process while the message is sent: there is no router actor in between.
+    Router refs can be passed to actors and sent in messages, so the key function has to be picklable
+    (a module-level function, not a lambda).
+    """
+
+    __slots__ = ('_routees', '_strategy', '_key', '__counter', '__ring')
+
+    # Points of every routee on the consistent hash ring
+    VIRTUAL_NODES = 64
+
+    def __init__(self,
+                 address: Address,
+                 routees: Sequence[ActorRef],
+                 strategy: str = ROUND_ROBIN,
+                 key: Optional[Callable[[Any], Any]] = None):
+
+        assert len(routees) > 0, 'Router must have routees.'
+        assert strategy in ROUTING_STRATEGIES, f'Routing strategy must be one of {ROUTING_STRATEGIES}.'
+
+        super(RouterRef, self).__init__(address)
+
+        self._routees: Tuple[ActorRef, ...] = tuple(routees)
+        self._strategy = strategy
+        self._key = key
+
+        # Every process starts from a random routee, so that senders do not pick the same routees in lockstep
+        self.__counter = itertools.count(random.randrange(len(self._routees)))
+        self.__ring: Optional[Tuple[List[int], List[ActorRef]]] = None
+
+    @property
+    def routees(self) -> Tuple[ActorRef, ...]:
+        return self._routees
+
+    @property
+    def strategy(self) -> str:
+        return self._strategy
+
+    def route(self, message: Any, mailbox_size: Optional[Callable[[Address], Optional[int]]] = None) -> ActorRef:
+        """
+        Picks a routee for a message.
+        :param mailbox_size: Number of messages that a routee has to process, or None if it is not known
+            (e.g. the routee runs in another process). With 'smallest_mailbox', routees with known sizes are
+            preferred, and routees are taken in turn if no size is known.
+        """
+        if self._strategy == ROUND_ROBIN:
+            return self._routees[next(self.__counter) % len(self._routees)]
+
+        if self._strategy == RANDOM:
+            return random.choice(self._routees)
+
+        if self._strategy == CONSISTENT_HASH:
+            return self.__hash_route(self._key(message) if self._key is not None else message)
+
+        return self.__smallest_mailbox(mailbox_size)
+
+    def __hash_route(self, key: Any) -> ActorRef:
+        if self.__ring is None:
+            points = sorted(
+                (stable_hash(f"{routee.address}#{node}"), idx)
+                for idx, routee in enumerate(self._routees)
+                for node in range(self.VIRTUAL_NODES)
+            )
+
+            self.__ring = [point for point, _ in points], [self._routees[idx] for _, idx in points]
+
+        hashes, routees = self.__ring
+        position = bisect.bisect(hashes, stable_hash(key)) % len(hashes)
+
+        return routees[position]
+
+    def __smallest_mailbox(self, mailbox_size: Optional[Callable[[Address], Optional[int]]]) -> ActorRef:
+        start = next(self.__counter)
+
+        if mailbox_size is not None:
+            best, best_size = None, None
+
+            # Ties go to the routee that comes first after the rotating start, to spread the load
+            for offset in range(len(self._routees)):
+                routee = self._routees[(start + offset) % len(self._routees)]
+                size = mailbox_size(routee.address)
+
+                if size is not None and (best_size is None or size < best_size):
+                    best, best_size = routee, size
+
+                    if size == 0:
+                        break
+
+            if best is not None:
+                return best
+
+        return self._routees[start % len(self._routees)]
+
+    def __reduce__(self):
+        return RouterRef, (self._address, self._routees, self._strategy, self._key)
+
+    def __str__(self):
+        return f"RouterRef({self._address}, {self._strategy}, {len(self._routees)} routees)"
+
+
+def stable_hash(key: Any) -> int:
+    """
+    :return: Hash of a key that is the same in every process (unlike hash() of strings).
+        Keys of the same value have to have the same str(), e.g. strings, numbers and tuples of them.
+    """
+    return int.from_bytes(hashlib.md5(str(key).encode()).digest()[:8], 'little')
+
+
+def resolve(actor_ref: ActorRef,
+            message: Any,
+            mailbox_size: Optional[Callable[[Address], Optional[int]]] = None) -> ActorRef:
+    """
+    :return: A routee for a message sent to a router, or the given ref itself.
+    """
+    if isinstance(actor_ref, RouterRef):
+        return actor_ref.route(message, mailbox_size)
+
+    return actor_ref
@@ -0,0 +1,44 @@
+from typing import Dict, Optional
+
+from .address import Address
+from .system_events import RoutingUpdateEvent
+
+
+class RoutingTable(dict):
+    """
+    Actor address -> process index table.
+    The actor system holds the authoritative copy and broadcasts every change as a versioned RoutingUpdateEvent,
+    so that each executor keeps a local replica and routes messages with a plain dict lookup.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(RoutingTable, self).__init__(*args, **kwargs)
+        self.version = 0
+
+    def update_routes(self,
+                      routes: Dict[Address, Optional[int]],
+                      moved_from: Optional[int] = None) -> RoutingUpdateEvent:
+        """
+        Applies changes to the authoritative copy.
+        :param moved_from: Process that the routed actors are migrating from, if any.
+        :return: An event that brings replicas up to date.
+        """
+        self.version += 1
+        self.__apply(routes)
+
+        return RoutingUpdateEvent(version=self.version, routes=routes, moved_from=moved_from)
+
+    def apply(self, event: RoutingUpdateEvent):
+        """
+        Applies changes received from the authoritative copy to a replica.
+        """
+        self.version = max(self.version, event.version)
+        self.__apply(event.routes)
+
+    def __apply(self, routes: Dict[Address, Optional[int]]):
+        for address, process_idx in routes.items():
+            if process_idx is None:
+                self.pop(address, None)
+
+            else:
+                self[address] = process_idx
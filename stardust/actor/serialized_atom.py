@@ -1,11 +1,17 @@
 from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from .address import Address
+from .config import MailboxConfig
 
 
 @dataclass
 class SerializedAtom:
-    address: str
-    actor_data: str
-    mailbox_data: str
+    address: Address
+    actor_data: bytes
+    mailbox_data: bytes
+    mailbox_config: Optional[MailboxConfig] = None
+    topics: Tuple[str, ...] = ()  # topics that the actor is subscribed to (see EventService)
 
     def __str__(self):
         return f"SerializedAtom(Actor({self.address}))"
@@ -0,0 +1,86 @@
+import mmap
+import os
+from typing import Sequence
+
+try:
+    import _posixshmem
+except ImportError:  # not a POSIX system
+    _posixshmem = None
+
+
+SHARED_MEMORY_SUPPORTED = _posixshmem is not None
+
+# Buffers are placed at aligned offsets of a segment, e.g. for vectorized access to array data
+ALIGNMENT = 64
+
+
+def aligned(size: int) -> int:
+    return (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def segment_size(sizes: Sequence[int]) -> int:
+    """
+    :return: Size of a segment that holds buffers of given sizes.
+    """
+    return max(sum(aligned(size) for size in sizes), 1)
+
+
+def write_segment(name: str, buffers: Sequence[memoryview]):
+    """
+    Copies buffers into a new shared memory segment. The writer does not keep the segment mapped:
+    it is unlinked by its reader (see read_segment).
+    :param buffers: Contiguous byte views.
+    """
+    size = segment_size([buffer.nbytes for buffer in buffers])
+    fd = _posixshmem.shm_open(f'/{name}', os.O_CREAT | os.O_EXCL | os.O_RDWR, mode=0o600)
+
+    try:
+        os.ftruncate(fd, size)
+
+        with mmap.mmap(fd, size) as segment:
+            offset = 0
+
+            for buffer in buffers:
+                segment[offset:offset + buffer.nbytes] = buffer
+                offset += aligned(buffer.nbytes)
+
+    except BaseException:
+        _posixshmem.shm_unlink(f'/{name}')
+        raise
+
+    finally:
+        os.close(fd)
+
+
+def read_segment(name: str, size: int) -> memoryview:
+    """
+    Maps a segment written by write_segment, and unlinks it right away: its memory is freed by the OS
+    once the returned view, and every view taken from it, is released.
+    """
+    fd = _posixshmem.shm_open(f'/{name}', os.O_RDWR, mode=0o600)
+
+    try:
+        segment = mmap.mmap(fd, size)
+
+    finally:
+        os.close(fd)
+        _posixshmem.shm_unlink(f'/{name}')
+
+    return memoryview(segment)
+
+
+def release_segments(prefix: str):
+    """
+    Unlinks segments that were never read, e.g. of messages that were still queued when the actor system stopped.
+    Segments are listed only where they are visible as files (Linux).
+    """
+    if not SHARED_MEMORY_SUPPORTED or not os.path.isdir('/dev/shm'):
+        return
+
+    for name in os.listdir('/dev/shm'):
+        if name.startswith(prefix):
+            try:
+                _posixshmem.shm_unlink(f'/{name}')
+
+            except FileNotFoundError:
+                pass
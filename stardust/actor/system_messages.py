@@ -1,8 +1,15 @@
 class SystemMessage:
-    pass
+    __slots__ = ()
+
+    # Control messages overtake user messages in a priority mailbox
+    control = False
 
 
 class StartupMessage(SystemMessage):
+    __slots__ = ()
+
+    control = True
+
     def __str__(self):
         return "StartupMessage()"
 
@@ -11,8 +18,49 @@ class StartupMessage(SystemMessage):
 
 
 class PoisonPillMessage(SystemMessage):
+    """
+    Stops its receiver softly (see Actor.kill): messages that were queued before the pill are processed first,
+    so it does not overtake them even in a priority mailbox.
+    """
+    __slots__ = ()
+
     def __str__(self):
         return "PoisonPillMessage()"
 
     def __repr__(self):
         return str(self)
+
+
+class MailboxOverflowMessage(SystemMessage):
+    """
+    Sent back to a sender of a message that was rejected by a full mailbox.
+    """
+    __slots__ = ('message', 'target')
+
+    def __init__(self, message, target):
+        self.message = message
+        self.target = target
+
+    def __str__(self):
+        return f"MailboxOverflowMessage({self.message!r}, {self.target})"
+
+    def __repr__(self):
+        return str(self)
+
+
+class RelayFenceMessage(SystemMessage):
+    """
+    Follows messages that an executor relayed through the actor system while their target's location was unknown.
+    It is not delivered: the target's executor tells the sending executor, which then sends to the target directly
+    (see ExecutorService.fence).
+    """
+    __slots__ = ('process_idx',)
+
+    def __init__(self, process_idx: int):
+        self.process_idx = process_idx
+
+    def __str__(self):
+        return f"RelayFenceMessage({self.process_idx})"
+
+    def __repr__(self):
+        return str(self)
@@ -0,0 +1,68 @@
+import multiprocessing as mp
+from multiprocessing.managers import SyncManager
+from typing import Any, Optional
+
+from .codec import BINARY, wrap_queue
+
+
+class ConnectionQueue:
+    """
+    Queue-like wrapper around a one-way multiprocessing.Pipe.
+    Events are written straight into the OS pipe by the sending process, without passing through
+    a Manager server process. Writers are serialized with an interprocess lock, so any number of
+    processes may put into the same queue, while only a single process is expected to read from it.
+    """
+
+    def __init__(self):
+        self._reader, self._writer = mp.Pipe(duplex=False)
+        self._write_lock = mp.Lock()
+
+    def put(self, event: Any):
+        with self._write_lock:
+            self._writer.send(event)
+
+    def get(self) -> Any:
+        return self._reader.recv()
+
+    def put_bytes(self, data: bytes):
+        with self._write_lock:
+            self._writer.send_bytes(data)
+
+    def get_bytes(self) -> bytes:
+        return self._reader.recv_bytes()
+
+
+TRANSPORTS = ('queue', 'connection', 'manager')
+
+
+def create_queue(transport: str,
+                 manager: Optional[SyncManager] = None,
+                 codec: str = BINARY,
+                 shared_memory_threshold: int = 0,
+                 segment_prefix: str = 'stardust'):
+    """
+    :param transport: One of TRANSPORTS.
+        'queue' - multiprocessing.Queue (OS pipe with a background feeder thread, non-blocking puts);
+        'connection' - ConnectionQueue (OS pipe written synchronously by the sender);
+        'manager' - Manager-proxied queue, kept as a fallback.
+    :param manager: Manager instance, required for the 'manager' transport.
+    :param codec: How events are encoded, one of stardust.actor.codec.CODECS.
+    :param shared_memory_threshold: Payloads of this size or larger go through shared memory (0 - never).
+    :param segment_prefix: Names of shared memory segments of the queue start with it.
+    :return: A queue that can be shared between the actor system and its executors.
+    """
+    return wrap_queue(create_raw_queue(transport, manager), codec, shared_memory_threshold, segment_prefix)
+
+
+def create_raw_queue(transport: str, manager: Optional[SyncManager] = None):
+    if transport == 'queue':
+        return mp.Queue()
+
+    elif transport == 'connection':
+        return ConnectionQueue()
+
+    elif transport == 'manager':
+        assert manager is not None, 'Manager transport requires a running manager.'
+        return manager.Queue()
+
+    raise ValueError(f"Unknown transport '{transport}', expected one of {TRANSPORTS}.")
@@ -0,0 +1,24 @@
+import pytest
+
+import stardust
+
+
+@pytest.fixture
+def make_system():
+    """
+    Starts actor systems, and stops the ones that a test has left running.
+    """
+    systems = []
+
+    def make(name: str = 'T', **config) -> stardust.ActorSystem:
+        system = stardust.ActorSystem(name=name, config=stardust.SystemConfig(**config))
+        system.run()
+        systems.append(system)
+
+        return system
+
+    yield make
+
+    for system in reversed(systems):
+        if any(worker.is_alive() for worker in system.workers):
+            system.stop()
@@ -0,0 +1,84 @@
+import os
+import time
+from typing import Callable
+
+import stardust
+
+
+def wait_until(condition: Callable[[], bool], timeout: float = 10.0, interval: float = 0.05) -> bool:
+    """
+    :return: True as soon as a condition holds, False if it still does not after the timeout.
+    """
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+
+        time.sleep(interval)
+
+    return condition()
+
+
+class Echo(stardust.Actor):
+    """
+    Answers ('echo', x) with x, and 'pid' with the process it runs in.
+    """
+
+    def receive(self, message, sender):
+        if isinstance(message, tuple) and message[0] == 'echo':
+            yield self.respond(message[1])
+
+        elif message == 'pid':
+            yield self.respond(os.getpid())
+
+
+class Counter(stardust.Actor):
+    """
+    Counts 'inc' messages, and answers 'count' with their number.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(Counter, self).__init__(*args, **kwargs)
+        self.count = 0
+
+    def receive(self, message, sender):
+        if message == 'inc':
+            self.count += 1
+
+        elif message == 'count':
+            yield self.respond(self.count)
+
+
+class Sequencer(stardust.Actor):
+    """
+    Receives (producer, seq) messages and checks that every producer's sequence arrives complete and in order.
+    Answers 'report' with (messages received, out-of-order messages, processes it has run in).
+    """
+
+    def __init__(self, *args, work: float = 0.0, **kwargs):
+        super(Sequencer, self).__init__(*args, **kwargs)
+        self.work = work
+        self.last = dict()
+        self.received = 0
+        self.disorders = 0
+        self.pids = set()
+
+    def receive(self, message, sender):
+        if isinstance(message, tuple):
+            producer, seq = message
+
+            if self.last.get(producer, -1) + 1 != seq:
+                self.disorders += 1
+
+            self.last[producer] = seq
+            self.received += 1
+            self.pids.add(os.getpid())
+
+            deadline = time.perf_counter() + self.work
+
+            while time.perf_counter() < deadline:
+                pass
+
+        elif message == 'report':
+            yield self.respond((self.received, self.disorders, len(self.pids)))
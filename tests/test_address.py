@@ -0,0 +1,49 @@
+import pytest
+
+from stardust.actor.address import (
+    AddressAllocator, address_process, address_node, is_numeric,
+    PROCESS_MASK, NODE_MASK, ALLOCATOR_MASK, REMOTE_ALLOCATOR
+)
+
+
+@pytest.mark.parametrize('allocator_idx, node_idx, process_idx', [
+    (0, 0, 0),
+    (1, 0, 3),
+    (7, 12, 5),
+    (REMOTE_ALLOCATOR - 3, NODE_MASK, PROCESS_MASK),
+    (ALLOCATOR_MASK, 1, 1),
+])
+def test_numeric_round_trip(allocator_idx, node_idx, process_idx):
+    allocator = AddressAllocator(allocator_idx=allocator_idx, node_idx=node_idx)
+    addresses = [allocator.allocate(process_idx) for _ in range(1000)]
+
+    assert all(is_numeric(address) for address in addresses)
+    assert len(set(addresses)) == len(addresses)
+
+    # The address tells where the actor runs
+    assert {address_process(address) for address in addresses} == {process_idx}
+    assert {address_node(address) for address in addresses} == {node_idx}
+
+
+def test_allocators_never_collide():
+    # The actor system and executors of a node allocate addresses for the same process independently
+    allocators = [AddressAllocator(allocator_idx=idx, node_idx=2) for idx in range(4)]
+    addresses = [allocator.allocate(1) for allocator in allocators for _ in range(1000)]
+
+    assert len(set(addresses)) == len(addresses)
+
+
+def test_path_addresses_are_not_numeric():
+    assert not is_numeric('System/Actor-1')
+    assert not is_numeric(True)
+
+
+def test_out_of_range():
+    with pytest.raises(AssertionError):
+        AddressAllocator(allocator_idx=ALLOCATOR_MASK + 1)
+
+    with pytest.raises(AssertionError):
+        AddressAllocator(allocator_idx=0, node_idx=NODE_MASK + 1)
+
+    with pytest.raises(AssertionError):
+        AddressAllocator(allocator_idx=0).allocate(PROCESS_MASK + 1)
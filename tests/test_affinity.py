@@ -0,0 +1,59 @@
+import stardust
+
+from .support import Sequencer, wait_until
+
+CHUNK = 10
+
+
+class Streamer(stardust.Actor):
+    """
+    Streams numbered messages to a sequencer, a chunk at a time: the sequencer's report asks for the next chunk.
+    Answers 'sent' with the number of messages sent, and stops streaming on 'stop'.
+    """
+
+    def __init__(self, *args, target=None, **kwargs):
+        super(Streamer, self).__init__(*args, **kwargs)
+        self.target = target
+        self.sent = 0
+        self.stopped = False
+
+    def receive(self, message, sender):
+        if isinstance(message, stardust.StartupMessage) or isinstance(message, tuple) and not self.stopped:
+            for _ in range(CHUNK):
+                yield self.send(self.target, (0, self.sent))
+                self.sent += 1
+
+            yield self.send(self.target, 'report')
+
+        elif message == 'stop':
+            self.stopped = True
+            yield self.respond(self.sent)
+
+
+def test_chatty_actors_move_together(make_system):
+    system = make_system(num_processes=4, affinity='auto', affinity_sampling=1, affinity_interval=0.2)
+
+    sequencers = [system.spawn(Sequencer) for _ in range(4)]
+
+    def process(ref):
+        return system.actor_to_process.get(ref.address)
+
+    assert wait_until(lambda: all(process(ref) is not None for ref in sequencers))
+
+    # Every streamer starts next to another sequencer than its own
+    streamers = [
+        system.spawn(Streamer, target=sequencer, near=sequencers[(i + 1) % len(sequencers)])
+        for i, sequencer in enumerate(sequencers)
+    ]
+
+    assert wait_until(lambda: all(process(ref) is not None for ref in streamers))
+
+    assert any(process(a) != process(b) for a, b in zip(streamers, sequencers))
+
+    assert wait_until(lambda: all(process(a) == process(b) for a, b in zip(streamers, sequencers)), timeout=20)
+
+    for streamer, sequencer in zip(streamers, sequencers):
+        sent = system.ask(streamer, 'stop', timeout=10).result()
+
+        assert wait_until(lambda: system.ask(sequencer, 'report', timeout=10).result()[0] == sent)
+        assert system.ask(sequencer, 'report', timeout=10).result()[1] == 0
@@ -0,0 +1,176 @@
+import asyncio
+import time
+
+import pytest
+
+import stardust
+
+from .support import Counter, Echo, wait_until
+
+
+class Slow(stardust.Actor):
+    """
+    Answers ('work', seconds, x) with x, after keeping its executor busy for the given time.
+    """
+
+    def receive(self, message, sender):
+        if isinstance(message, tuple) and message[0] == 'work':
+            time.sleep(message[1])
+            yield self.respond(message[2])
+
+
+class Asker(stardust.Actor):
+    """
+    Answers ('ask', target, message, timeout) with the target's response, or with 'timeout'.
+    An ('ask_unhandled', ...) leaves AskTimeout to the actor system. Answers 'stray' with messages that were
+    not expected.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(Asker, self).__init__(*args, **kwargs)
+        self.stray = []
+
+    def receive(self, message, sender):
+        if isinstance(message, tuple) and message[0] == 'ask':
+            _, target, request, timeout = message
+
+            try:
+                response = yield self.ask(target, request, timeout=timeout)
+
+            except stardust.AskTimeout:
+                response = 'timeout'
+
+            yield self.respond(response)
+
+        elif isinstance(message, tuple) and message[0] == 'ask_unhandled':
+            _, target, request, timeout = message
+
+            response = yield self.ask(target, request, timeout=timeout)
+            yield self.respond(response)
+
+        elif message == 'stray':
+            yield self.respond(self.stray)
+
+        elif not isinstance(message, stardust.StartupMessage):
+            self.stray.append(message)
+
+
+@pytest.fixture
+def system(make_system):
+    return make_system(num_processes=2)
+
+
+def apart(system, first, second) -> bool:
+    """
+    :return: True if two actors run in different processes, once both are placed.
+    """
+    def placed():
+        return None not in (system.actor_to_process.get(first.address), system.actor_to_process.get(second.address))
+
+    assert wait_until(placed)
+
+    return system.actor_to_process[first.address] != system.actor_to_process[second.address]
+
+
+def spawn_apart(system, actor_type, near):
+    """
+    :return: A new actor in another process than the given one.
+    """
+    for _ in range(10):
+        ref = system.spawn(actor_type)
+
+        if apart(system, ref, near):
+            return ref
+
+    pytest.fail('actors are not spread over processes')
+
+
+def test_ask_between_actors(system):
+    echo = system.spawn(Echo)
+    askers = [system.spawn(Asker) for _ in range(4)]
+
+    futures = [
+        system.ask(asker, ('ask', echo, ('echo', (i, j)), None), timeout=10)
+        for j in range(20)
+        for i, asker in enumerate(askers)
+    ]
+
+    # Every response goes to the ask that it answers
+    assert [future.result() for future in futures] == [(i, j) for j in range(20) for i in range(len(askers))]
+
+
+def test_ask_timeout_in_actor(system):
+    slow = system.spawn(Slow)
+    asker = spawn_apart(system, Asker, slow)
+
+    assert system.ask(asker, ('ask', slow, ('work', 0.0, 'fast'), 5), timeout=10).result() == 'fast'
+    assert system.ask(asker, ('ask', slow, ('work', 1.0, 'late'), 0.1), timeout=10).result() == 'timeout'
+
+    # The late response is dropped instead of being delivered as a plain message
+    time.sleep(1.5)
+    assert system.ask(asker, 'stray', timeout=10).result() == []
+
+
+def test_unhandled_ask_timeout(system):
+    silent = system.spawn(Counter)
+    asker = system.spawn(Asker)
+
+    # The timeout ends processing of the message, so there is no answer
+    with pytest.raises(stardust.AskTimeout):
+        system.ask(asker, ('ask_unhandled', silent, 'inc', 0.1), timeout=1).result()
+
+    # And the actor goes on with the next one
+    assert system.ask(asker, 'stray', timeout=10).result() == []
+
+
+def test_system_ask(system):
+    echo = system.spawn(Echo)
+
+    assert system.ask(echo, ('echo', 'result'), timeout=10).result() == 'result'
+
+
+def test_system_ask_timeout(system):
+    silent = system.spawn(Counter)
+
+    future = system.ask(silent, 'inc', timeout=0.1)
+
+    with pytest.raises(stardust.AskTimeout):
+        future.result(timeout=5)
+
+    assert system.asks.pending == {}
+
+
+def test_system_ask_async(system):
+    echo = system.spawn(Echo)
+    silent = system.spawn(Counter)
+
+    async def ask():
+        responses = await asyncio.gather(*[system.ask_async(echo, ('echo', i), timeout=10) for i in range(10)])
+
+        with pytest.raises(stardust.AskTimeout):
+            await system.ask_async(silent, 'inc', timeout=0.1)
+
+        return responses
+
+    assert asyncio.run(ask()) == list(range(10))
+
+
+def test_cancelled_ask(system):
+    slow = system.spawn(Slow)
+
+    future = system.ask(slow, ('work', 0.5, 'late'))
+
+    assert future.cancel()
+    assert system.asks.pending == {}
+
+    # The response that comes after all is dropped, and other asks still work
+    time.sleep(1.0)
+    assert system.ask(slow, ('work', 0.0, 'next'), timeout=10).result() == 'next'
+
+
+def test_stop_cancels_asks(system):
+    future = system.ask(system.spawn(Counter), 'inc')
+
+    system.stop()
+
+    assert future.cancelled()
@@ -0,0 +1,134 @@
+import pytest
+
+import stardust
+
+from .support import Counter, Echo, wait_until
+
+
+@pytest.fixture(params=['path', 'numeric'])
+def cluster(request, make_system):
+    """
+    Two nodes on localhost, with ephemeral ports: node 1 joins node 0.
+    """
+    config = dict(num_processes=2, cluster=True, port=0, secret='s3cret', addressing=request.param, stats_interval=0.1)
+
+    first = make_system('A', node_idx=0, **config)
+    second = make_system('B', node_idx=1, seeds=(f'127.0.0.1:{first.network.port}',), **config)
+
+    assert wait_until(lambda: 1 in first.nodes() and 0 in second.nodes())
+
+    return first, second
+
+
+def hosted_by(asker, host, refs):
+    """
+    :return: Actors that run in workers of the host system. Asking them also waits until they have started.
+    """
+    pids = {worker.pid for worker in host.workers}
+    return [ref for ref in refs if asker.ask(ref, 'pid', timeout=10).result() in pids]
+
+
+def test_remote_spawn_and_ask(cluster):
+    first, second = cluster
+
+    refs = first.spawn_many(Echo, [()] * 20)
+    remote = hosted_by(first, second, refs)
+
+    assert 0 < len(remote) < len(refs), 'actors are spread over both nodes'
+
+    for i, ref in enumerate(refs):
+        assert first.ask(ref, ('echo', i), timeout=10).result() == i
+
+
+def test_remote_send_keeps_order(cluster):
+    first, second = cluster
+
+    refs = first.spawn_many(Counter, [()] * 8)
+
+    for ref in refs:
+        for _ in range(500):
+            first.send(ref, 'inc')
+
+    for ref in refs:
+        assert first.ask(ref, 'count', timeout=10).result() == 500
+
+    assert wait_until(lambda: sum(stats.actors for stats in second.stats().values()) > 0)
+
+
+def test_ask_from_the_other_node(cluster):
+    first, second = cluster
+
+    ref = first.spawn(Echo)
+    assert first.ask(ref, ('echo', 'here'), timeout=10).result() == 'here'
+
+    # Numeric addresses tell their node, path ones are resolved through the cluster
+    assert second.ask(ref, ('echo', 'there'), timeout=10).result() == 'there'
+
+
+def test_node_leave(cluster):
+    first, second = cluster
+
+    remote = hosted_by(first, second, first.spawn_many(Echo, [()] * 20))
+    assert remote
+
+    second.stop()
+
+    assert wait_until(lambda: first.nodes() == {})
+    assert first.remote_routes == {}
+
+    for ref in remote:
+        first.send(ref, 'pid')
+
+    # Dropped at once, instead of waiting for a route that is never going to come
+    assert wait_until(lambda: first.dead_letters().counts.get('unreachable', 0) == len(remote), timeout=2)
+
+    # New actors are placed on the remaining node
+    refs = first.spawn_many(Echo, [()] * 10)
+    assert len(hosted_by(first, first, refs)) == len(refs)
+
+
+def test_clean_stop(cluster):
+    first, second = cluster
+
+    first.ask(first.spawn(Echo), 'pid', timeout=10).result()
+
+    second.stop()
+    first.stop()
+
+    for system in (first, second):
+        assert not system.network.is_alive()
+        assert not any(worker.is_alive() for worker in system.workers)
+        assert not system.system_event_manager.is_alive()
+        assert not system.outgoing_event_manager.is_alive()
+
+
+def test_nodes_form_a_full_mesh(make_system):
+    config = dict(num_processes=1, cluster=True, port=0, secret='s3cret')
+
+    first = make_system('A', node_idx=0, **config)
+    seeds = (f'127.0.0.1:{first.network.port}',)
+
+    second = make_system('B', node_idx=1, seeds=seeds, **config)
+    third = make_system('C', node_idx=2, seeds=seeds, **config)
+
+    # The third node learns about the second one from the seed
+    assert wait_until(lambda: set(third.nodes()) == {0, 1} and set(second.nodes()) == {0, 2})
+    assert set(first.nodes()) == {1, 2}
+
+
+def test_nodes_share_a_secret(make_system):
+    with pytest.raises(AssertionError):
+        stardust.SystemConfig(cluster=True)
+
+    config = dict(num_processes=1, cluster=True, port=0)
+
+    first = make_system('A', node_idx=0, secret='s3cret', **config)
+    seeds = (f'127.0.0.1:{first.network.port}',)
+
+    stranger = make_system('B', node_idx=1, seeds=seeds, secret='guess', **config)
+    member = make_system('C', node_idx=2, seeds=seeds, secret='s3cret', **config)
+
+    # The stranger's hello is never decoded, and nodes that know the secret do not learn about it
+    assert wait_until(lambda: set(member.nodes()) == {0} and set(first.nodes()) == {2})
+    assert not wait_until(lambda: 1 in first.nodes() or 1 in member.nodes(), timeout=1)
+    assert stranger.nodes() == {}
@@ -0,0 +1,188 @@
+import queue
+
+import pytest
+
+from stardust.actor.actor_ref import ActorRef
+from stardust.actor.codec import (
+    BinaryCodec, CodecQueue, wrap_queue, register_serializer,
+    PICKLED_FRAME, MESSAGE_FRAME, BATCH_FRAME, USER_SERIALIZERS, BINARY, PICKLE
+)
+from stardust.actor.router import RouterRef, ROUND_ROBIN
+from stardust.actor.system_events import MessageEvent, MessageBatchEvent, RoutingUpdateEvent
+
+
+class Point:
+    def __init__(self, x: int, y: int):
+        self.x = x
+        self.y = y
+
+    def __eq__(self, other):
+        return isinstance(other, Point) and (self.x, self.y) == (other.x, other.y)
+
+
+POINT_SERIALIZER = 200
+
+# Registered once for the whole session, the way an application does it at import time
+register_serializer(
+    Point,
+    POINT_SERIALIZER,
+    lambda point: f'{point.x},{point.y}'.encode(),
+    lambda data: Point(*map(int, str(data, 'ascii').split(',')))
+)
+
+
+def message(sender='a', target='b', payload='hello', context_code=None, response=False) -> MessageEvent:
+    return MessageEvent(
+        sender=ActorRef(sender),
+        target=ActorRef(target),
+        message=payload,
+        context_code=context_code,
+        response=response
+    )
+
+
+def unpack(event: MessageEvent) -> tuple:
+    """
+    :return: What a message event carries, refs compared by their addresses.
+    """
+    return event.sender.address, event.target.address, event.message, event.context_code, event.response
+
+
+@pytest.fixture
+def codecs():
+    """
+    A writer and a reader of one connection.
+    """
+    return BinaryCodec(), BinaryCodec()
+
+
+@pytest.mark.parametrize('payload', ['text', b'bytes', 42, {'nested': [1, 2.5, None]}, Point(1, 2)])
+def test_message_round_trip(codecs, payload):
+    writer, reader = codecs
+
+    frame = writer.encode(message(payload=payload))
+    event = reader.decode(frame)
+
+    assert frame[0] == MESSAGE_FRAME
+    assert unpack(event) == unpack(message(payload=payload))
+
+
+def test_addresses_are_interned(codecs):
+    writer, reader = codecs
+
+    first = writer.encode(message(payload=b'x'))
+    second = writer.encode(message(payload=b'x'))
+
+    # The second frame refers to addresses defined by the first one
+    assert len(second) < len(first)
+
+    assert unpack(reader.decode(first)) == unpack(message(payload=b'x'))
+    assert unpack(reader.decode(second)) == unpack(message(payload=b'x'))
+
+    # Numeric addresses are interned as well
+    numeric = message(sender=1 << 40, target=7)
+    assert unpack(reader.decode(writer.encode(numeric))) == unpack(numeric)
+
+
+def test_tables_are_kept_per_writer():
+    reader = BinaryCodec()
+    writers = [BinaryCodec(), BinaryCodec()]
+
+    frames = [writer.encode(message(sender=f'from-{i}')) for i, writer in enumerate(writers)]
+    frames += [writer.encode(message(target=f'to-{i}')) for i, writer in enumerate(writers)]
+
+    decoded = [reader.decode(frame) for frame in frames]
+
+    assert [event.sender.address for event in decoded] == ['from-0', 'from-1', 'a', 'a']
+    assert [event.target.address for event in decoded] == ['b', 'b', 'to-0', 'to-1']
+
+
+def test_batch_round_trip(codecs):
+    writer, reader = codecs
+
+    events = [message(sender=f's{i % 3}', payload=i) for i in range(50)]
+    frame = writer.encode(MessageBatchEvent(events=events))
+
+    assert frame[0] == BATCH_FRAME
+    assert [unpack(event) for event in reader.decode(frame).events] == [unpack(event) for event in events]
+
+
+@pytest.mark.parametrize('context_code', [0, -1, 123456789, -(1 << 63), (1 << 63) - 1])
+def test_context_codes(codecs, context_code):
+    writer, reader = codecs
+
+    for response in (False, True):
+        event = message(context_code=context_code, response=response)
+        assert unpack(reader.decode(writer.encode(event))) == unpack(event)
+
+
+def test_context_code_out_of_range_is_pickled(codecs):
+    writer, reader = codecs
+
+    event = message(context_code=1 << 70)
+    frame = writer.encode(event)
+
+    assert frame[0] == PICKLED_FRAME
+    assert unpack(reader.decode(frame)) == unpack(event)
+
+    # Addresses that the pickled frame would have defined are defined by the next frame that uses them
+    assert unpack(reader.decode(writer.encode(message()))) == unpack(message())
+
+
+def test_custom_serializer(codecs):
+    writer, reader = codecs
+
+    frame = writer.encode(message(payload=Point(3, -4)))
+
+    assert b'3,-4' in frame
+    assert reader.decode(frame).message == Point(3, -4)
+
+
+def test_serializer_codes_are_checked():
+    with pytest.raises(AssertionError):
+        register_serializer(complex, USER_SERIALIZERS - 1, str.encode, bytes)
+
+    with pytest.raises(AssertionError):
+        register_serializer(complex, POINT_SERIALIZER, str.encode, bytes)
+
+
+def test_other_events_are_pickled(codecs):
+    writer, reader = codecs
+
+    routing_update = RoutingUpdateEvent(version=3, routes={'a': 1, 'b': None})
+    frame = writer.encode(routing_update)
+
+    assert frame[0] == PICKLED_FRAME
+    assert reader.decode(frame) == routing_update
+
+    # Router refs are not interned
+    router = RouterRef('pool', routees=[ActorRef('x'), ActorRef('y')], strategy=ROUND_ROBIN)
+    frame = writer.encode(MessageEvent(sender=router, target=ActorRef('b'), message='m'))
+
+    assert frame[0] == PICKLED_FRAME
+
+    sender = reader.decode(frame).sender
+
+    assert isinstance(sender, RouterRef)
+    assert [routee.address for routee in sender.routees] == ['x', 'y']
+
+
+def test_codec_queue():
+    codec_queue = CodecQueue(queue.Queue())
+
+    events = [message(payload=i) for i in range(10)]
+
+    for event in events:
+        codec_queue.put(event)
+
+    assert [unpack(codec_queue.get()) for _ in events] == [unpack(event) for event in events]
+
+
+def test_wrap_queue():
+    plain = queue.Queue()
+
+    assert wrap_queue(plain, PICKLE) is plain
+    assert isinstance(wrap_queue(plain, BINARY), CodecQueue)
+
+    with pytest.raises(ValueError):
+        wrap_queue(plain, 'json')
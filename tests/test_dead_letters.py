@@ -0,0 +1,220 @@
+import time
+
+import pytest
+
+import stardust
+from stardust.actor.actor_ref import ActorRef
+from stardust.actor.dead_letters import (
+    DeadLetters, DeadLetterStats, PendingMessages, Tombstones,
+    KILLED, EXPIRED, OVERFLOW, UNREACHABLE, MAILBOX_FULL
+)
+from stardust.actor.system_events import MessageEvent
+from stardust.actor.system_messages import RelayFenceMessage
+
+from .support import Counter, wait_until
+
+
+def event(target='target', message='m') -> MessageEvent:
+    return MessageEvent(sender=ActorRef('sender'), target=ActorRef(target), message=message)
+
+
+def test_tombstones():
+    tombstones = Tombstones(capacity=10, ttl=60)
+
+    assert 'a' not in tombstones
+    assert tombstones.cause('a') is None
+
+    tombstones.bury(['a', 'b'])
+    tombstones.bury(['c'], UNREACHABLE)
+
+    assert 'a' in tombstones and 'b' in tombstones
+    assert tombstones.cause('a') == KILLED
+    assert tombstones.cause('c') == UNREACHABLE
+
+    # A named actor may be spawned again
+    tombstones.revive(['a'])
+
+    assert 'a' not in tombstones
+    assert 'b' in tombstones
+
+
+def test_tombstones_are_bounded():
+    tombstones = Tombstones(capacity=3, ttl=60)
+
+    tombstones.bury(range(5))
+
+    # The oldest are forgotten first
+    assert [address in tombstones for address in range(5)] == [False, False, True, True, True]
+
+    # Burying again makes an address the newest
+    tombstones.bury([2])
+    tombstones.bury([5])
+
+    assert [address in tombstones for address in range(2, 6)] == [True, False, True, True]
+
+
+def test_tombstones_expire():
+    tombstones = Tombstones(capacity=10, ttl=0.05)
+
+    tombstones.bury(['a'])
+    assert 'a' in tombstones
+
+    time.sleep(0.1)
+    assert 'a' not in tombstones
+
+
+def test_pending_messages():
+    pending = PendingMessages(capacity=10, ttl=60)
+
+    for i in range(3):
+        assert pending.hold(event('a', i))
+        assert pending.hold(event('b', i))
+
+    pending.reserve('c')
+
+    assert 'a' in pending and 'c' in pending
+    assert len(pending) == 3
+    assert pending.size == 6
+
+    # In arrival order
+    assert [held.message for held in pending.pop('a')] == [0, 1, 2]
+    assert pending.pop('a') == []
+    assert pending.pop('c') == []
+
+    assert pending.size == 3
+
+
+def test_pending_messages_are_bounded():
+    pending = PendingMessages(capacity=3, ttl=60)
+
+    assert [pending.hold(event('a', i)) for i in range(5)] == [True, True, True, False, False]
+
+    # Fences of relayed messages are held anyway, or their senders would wait for them forever
+    assert pending.hold(event('a', RelayFenceMessage(0)))
+
+
+def test_pending_messages_expire():
+    pending = PendingMessages(capacity=10, ttl=60)
+
+    pending.hold(event('a', 0))
+    pending.hold(event('b', 0))
+    pending.hold(event('a', 1))
+
+    now = time.monotonic()
+
+    assert pending.expire(now) == []
+    assert [(held.target.address, held.message) for held in pending.expire(now + 61)] == [('a', 0), ('a', 1), ('b', 0)]
+    assert len(pending) == 0 and pending.size == 0
+
+
+def test_dead_letters():
+    dead_letters = DeadLetters(sample_size=3)
+
+    dead_letters.record([event(message=i) for i in range(5)], KILLED)
+    dead_letters.record([event('other')], EXPIRED)
+
+    # Fences are not messages that anyone sent
+    dead_letters.record([event(message=RelayFenceMessage(0))], KILLED)
+
+    report = dead_letters.take_report()
+
+    assert report.counts == {KILLED: 5, EXPIRED: 1}
+    assert report.total == 6
+    assert [sample.reason for sample in report.samples] == [KILLED, KILLED, EXPIRED]
+    assert report.samples[-1].target == 'other'
+
+    # Samples are reported once, counts keep adding up
+    dead_letters.record([event()], OVERFLOW)
+    report = dead_letters.take_report()
+
+    assert report.counts == {KILLED: 5, EXPIRED: 1, OVERFLOW: 1}
+    assert len(report.samples) == 1
+
+
+def test_dead_letters_add_up_reports():
+    dead_letters = DeadLetters()
+
+    dead_letters.record([event()], EXPIRED)
+
+    dead_letters.update(0, DeadLetterStats(counts={KILLED: 2}, samples=[]))
+    dead_letters.update(1, DeadLetterStats(counts={KILLED: 1, MAILBOX_FULL: 4}, samples=[]))
+
+    # A report replaces the previous one of the same process
+    dead_letters.update(0, DeadLetterStats(counts={KILLED: 3}, samples=[]))
+
+    assert dead_letters.stats().counts == {EXPIRED: 1, KILLED: 4, MAILBOX_FULL: 4}
+
+
+class Relay(stardust.Actor):
+    """
+    On ('send', target, n), sends n 'inc' messages to the target.
+    """
+
+    def receive(self, message, sender):
+        if isinstance(message, tuple) and message[0] == 'send':
+            for _ in range(message[2]):
+                yield self.send(message[1], 'inc')
+
+
+@pytest.fixture
+def system(make_system):
+    return make_system(num_processes=2, stats_interval=0.1, pending_ttl=0.3, pending_capacity=50)
+
+
+def killed(system) -> int:
+    return system.dead_letters().counts.get(KILLED, 0)
+
+
+def test_messages_to_killed_actors(system):
+    counter = system.spawn(Counter)
+    relay = system.spawn(Relay)
+
+    assert system.ask(counter, 'count', timeout=10).result() == 0
+
+    system.kill(counter)
+    assert wait_until(lambda: system.actor_to_process.get(counter.address) is None)
+
+    # Dropped by the actor system, and by an executor
+    for _ in range(10):
+        system.send(counter, 'inc')
+
+    system.send(relay, ('send', counter, 5))
+
+    assert wait_until(lambda: killed(system) == 15)
+
+
+def test_soft_kill_drops_nothing(system):
+    counter = system.spawn(Counter)
+
+    assert system.ask(counter, 'count', timeout=10).result() == 0
+
+    for _ in range(100):
+        system.send(counter, 'inc')
+
+    system.kill(counter, soft=True)
+
+    # Messages queued before the pill are processed, later ones are dead letters
+    assert wait_until(lambda: system.actor_to_process.get(counter.address) is None)
+
+    system.send(counter, 'inc')
+
+    assert wait_until(lambda: killed(system) == 1)
+
+
+def test_pending_messages_expire_in_the_system(system):
+    for i in range(5):
+        system.send(ActorRef('nowhere'), i)
+
+    assert wait_until(lambda: system.dead_letters().counts.get(EXPIRED, 0) == 5)
+
+    samples = system.dead_letters().samples
+
+    assert {sample.target for sample in samples} == {'nowhere'}
+
+
+def test_pending_overflow_in_the_system(system):
+    for i in range(60):
+        system.send(ActorRef('nowhere'), i)
+
+    assert wait_until(lambda: system.dead_letters().counts.get(OVERFLOW, 0) == 10)
+    assert wait_until(lambda: system.dead_letters().counts.get(EXPIRED, 0) == 50)
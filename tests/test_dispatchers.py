@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+import pytest
+
+import stardust
+from stardust.actor.actor_events import AwaitEvent
+from stardust.actor.actor_ref import ActorRef
+from stardust.actor.atom import Atom
+from stardust.actor.config import BLOCKING_DISPATCHER
+from stardust.actor.mailbox import Mailbox
+from stardust.actor.system_events import MessageEvent
+
+from .support import Counter, wait_until
+
+MESSAGES = 50
+
+
+class Stray(stardust.Actor):
+    """
+    Yields something that is not an actor event.
+    """
+
+    def receive(self, message, sender):
+        yield message
+
+
+class AsyncStray(stardust.Actor):
+
+    async def receive(self, message, sender):
+        yield message
+
+
+def atom_with(actor_type, message) -> Atom:
+    atom = Atom(actor=actor_type('stray', ActorRef('parent')), mailbox=Mailbox('stray'))
+    atom.enqueue(MessageEvent(sender=ActorRef('sender'), target=ActorRef('stray'), message=message))
+
+    return atom
+
+
+def test_unknown_event_raises():
+    generator = atom_with(Stray, 'not an event').execute()
+
+    with pytest.raises(TypeError, match='not an actor event'):
+        next(generator)
+
+
+def test_unknown_async_event_raises():
+    generator = atom_with(AsyncStray, 'not an event').execute()
+    actor_event = next(generator)
+
+    assert isinstance(actor_event, AwaitEvent)
+
+    # The executor's event loop runs the step, and sends its outcome back
+    with pytest.raises(StopIteration) as step:
+        actor_event.awaitable.send(None)
+
+    with pytest.raises(TypeError, match='not an actor event'):
+        generator.send(step.value.value)
+
+
+class AsyncSequencer(stardust.Actor):
+    """
+    Awaits for every number it receives, and answers 'report' with (numbers in the order they were processed,
+    most numbers processed at once).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(AsyncSequencer, self).__init__(*args, **kwargs)
+        self.received = []
+        self.active = 0
+        self.most_active = 0
+
+    async def receive(self, message, sender):
+        if isinstance(message, int):
+            self.active += 1
+            self.most_active = max(self.most_active, self.active)
+
+            await asyncio.sleep(0.001)
+
+            self.received.append(message)
+            self.active -= 1
+
+        elif message == 'report':
+            yield self.respond((self.received, self.most_active))
+
+
+def test_async_receive_in_order(make_system):
+    system = make_system(num_processes=1)
+    ref = system.spawn(AsyncSequencer)
+
+    for i in range(MESSAGES):
+        system.send(ref, i)
+
+    assert wait_until(lambda: len(system.ask(ref, 'report', timeout=10).result()[0]) == MESSAGES)
+
+    received, most_active = system.ask(ref, 'report', timeout=10).result()
+
+    # The next message waits until the actor is done awaiting for the previous one
+    assert received == list(range(MESSAGES))
+    assert most_active == 1
+
+
+class Sleeper(stardust.Actor):
+    """
+    Blocks its thread for a while on 'sleep', and answers when it wakes up.
+    """
+    dispatcher = BLOCKING_DISPATCHER
+
+    def receive(self, message, sender):
+        if message == 'sleep':
+            time.sleep(1.0)
+            yield self.respond('awake')
+
+
+def test_blocking_actor_does_not_stall_others(make_system):
+    system = make_system(num_processes=1)
+
+    sleeper = system.spawn(Sleeper)
+    counter = system.spawn(Counter)
+
+    awake = system.ask(sleeper, 'sleep', timeout=10)
+    time.sleep(0.1)
+
+    # The only executor keeps running other actors while the sleeper blocks a thread of its pool
+    started = time.monotonic()
+
+    for _ in range(10):
+        system.send(counter, 'inc')
+
+    assert system.ask(counter, 'count', timeout=10).result() == 10
+    assert time.monotonic() - started < 0.5
+    assert not awake.done()
+
+    assert awake.result() == 'awake'
@@ -0,0 +1,187 @@
+import threading
+
+import stardust
+from stardust.actor.actor_tree import ActorTree
+from stardust.actor.system_events import ActorBatchDeathEvent
+
+from .support import wait_until
+
+FANOUT = 3
+
+
+def test_tree_removes_parents_before_children():
+    tree = ActorTree(root='system')
+    tree.add('system', ['a', 'b'])
+    tree.add('a', ['a1', 'a2'])
+    tree.add('a1', ['a11'])
+    tree.add('b', ['b1'])
+
+    removed = tree.remove(['a'])
+
+    assert set(removed) == {'a', 'a1', 'a2', 'a11'}
+    assert removed.index('a') < removed.index('a1') < removed.index('a11')
+
+    # Siblings and their subtrees stay, and children of the actor system are not kept
+    assert set(tree.select(lambda address: True)) == {'b', 'b1'}
+    assert tree.remove(['b1']) == ['b1']
+    assert tree.select(lambda address: True) == []
+
+
+def test_tree_forgets_without_killing():
+    tree = ActorTree(root='system')
+    tree.add('a', ['a1'])
+    tree.add('a1', ['a11', 'a12'])
+
+    tree.forget(['a1'])
+
+    # Children of a forgotten actor become roots, and are not killed along with its parent anymore
+    assert tree.remove(['a']) == ['a']
+    assert set(tree.select(lambda address: True)) == set()
+    assert tree.remove(['a11']) == ['a11']
+
+
+class Family(stardust.Actor):
+    """
+    Spawns FANOUT children as soon as it starts, which spawn theirs in turn, down to a depth.
+    Answers 'children' with its children, and ('kill', ref) by killing one of them.
+    """
+
+    def __init__(self, *args, depth: int = 0, **kwargs):
+        super(Family, self).__init__(*args, **kwargs)
+        self.depth = depth
+        self.children = []
+
+    def receive(self, message, sender):
+        if isinstance(message, stardust.StartupMessage):
+            for _ in range(FANOUT if self.depth > 0 else 0):
+                child = yield self.spawn(Family, depth=self.depth - 1)
+                self.children.append(child)
+
+        elif message == 'children':
+            yield self.respond(self.children)
+
+        elif isinstance(message, tuple) and message[0] == 'kill':
+            yield self.kill(message[1])
+
+
+class Recorder:
+    """
+    Stands in for a queue to a worker, and records the batch deaths that are put on it.
+    """
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def put(self, obj, *args, **kwargs):
+        if isinstance(obj, ActorBatchDeathEvent):
+            with self.lock:
+                self.batches.append(list(obj.addresses))
+
+        self.queue.put(obj, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.queue, name)
+
+
+def subtree(system, root) -> list:
+    """
+    :return: Refs of an actor and its descendants, parents before children.
+    """
+    refs = [root]
+
+    for ref in refs:
+        refs.extend(system.ask(ref, 'children', timeout=10).result())
+
+    return refs
+
+
+def killed(system) -> int:
+    return system.dead_letters().counts.get('killed', 0)
+
+
+def routed(system, refs) -> set:
+    return {system.actor_to_process.get(ref.address) for ref in refs}
+
+
+def test_subtree_killed_with_one_batch_per_worker(make_system):
+    system = make_system(num_processes=3)
+
+    root = system.spawn(Family, depth=2)
+    other = system.spawn(Family, depth=1)
+
+    refs = subtree(system, root)
+    others = subtree(system, other)
+
+    assert len(refs) == 1 + FANOUT + FANOUT * FANOUT
+    assert wait_until(lambda: None not in routed(system, refs + others))
+
+    processes = routed(system, refs)
+    assert len(processes) > 1
+
+    # Workers were started with the queues, so recording them in this process does not change what they read
+    recorders = {}
+
+    for process_idx, pipe in system.process_to_pipe.items():
+        recorders[process_idx] = pipe.out_queue = Recorder(pipe.out_queue)
+
+    system.kill(root)
+
+    assert wait_until(lambda: routed(system, refs) == {None})
+
+    # One batch per worker that hosts a part of the subtree, with the actors that it hosts
+    for process_idx, recorder in recorders.items():
+        assert len(recorder.batches) == (1 if process_idx in processes else 0)
+
+    batches = [address for recorder in recorders.values() for batch in recorder.batches for address in batch]
+    assert sorted(batches) == sorted(ref.address for ref in refs)
+
+    # The whole subtree is gone, another one is not
+    for ref in refs:
+        system.send(ref, 'children')
+
+    assert wait_until(lambda: killed(system) == len(refs))
+    assert len(subtree(system, other)) == len(others)
+
+
+def test_actor_kills_a_subtree(make_system):
+    system = make_system(num_processes=2)
+
+    root = system.spawn(Family, depth=2)
+    refs = subtree(system, root)
+    assert wait_until(lambda: None not in routed(system, refs))
+
+    child = refs[1]
+    doomed = subtree(system, child)
+
+    system.send(root, ('kill', child))
+
+    assert wait_until(lambda: routed(system, doomed) == {None})
+
+    # The parent and the siblings of the killed child live on, and the parent still refers to the child
+    gone = {ref.address for ref in doomed}
+    survivors = [ref for ref in refs if ref.address not in gone]
+
+    assert None not in routed(system, survivors)
+    assert len(system.ask(root, 'children', timeout=10).result()) == FANOUT
+
+    for ref in doomed:
+        system.send(ref, 'children')
+
+    assert wait_until(lambda: killed(system) == len(doomed))
+
+
+def test_soft_kill_takes_descendants(make_system):
+    system = make_system(num_processes=2)
+
+    root = system.spawn(Family, depth=1)
+    refs = subtree(system, root)
+    assert wait_until(lambda: None not in routed(system, refs))
+
+    # The root answers what is queued before the pill, and its children are killed once it has stopped
+    answers = [system.ask(root, 'children', timeout=10) for _ in range(5)]
+    system.kill(root, soft=True)
+
+    assert all(len(answer.result()) == FANOUT for answer in answers)
+    assert wait_until(lambda: routed(system, refs) == {None})
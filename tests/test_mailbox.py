@@ -0,0 +1,295 @@
+import threading
+import time
+
+import pytest
+
+import stardust
+from stardust.actor.actor_ref import ActorRef
+from stardust.actor.config import MailboxConfig, DROP_NEWEST, DROP_OLDEST, REJECT, OVERFLOW_POLICIES
+from stardust.actor.mailbox import Mailbox, PriorityMailbox
+from stardust.actor.system_events import MessageEvent
+from stardust.actor.system_messages import PoisonPillMessage, StartupMessage
+
+from .support import wait_until
+
+MESSAGES = 200
+
+
+def event(message) -> MessageEvent:
+    return MessageEvent(sender=ActorRef('sender'), target=ActorRef('target'), message=message)
+
+
+def bounded(capacity: int, policy: str) -> Mailbox:
+    return Mailbox('target', config=MailboxConfig(capacity=capacity, overflow_policy=policy))
+
+
+def drain(mailbox: Mailbox) -> list:
+    messages = []
+
+    while (queued := mailbox.dequeue()) is not None:
+        messages.append(queued.message)
+
+    return messages
+
+
+def test_unbounded():
+    mailbox = Mailbox('target')
+
+    assert all(mailbox.enqueue(event(i)) for i in range(1000))
+    assert not mailbox.full()
+    assert drain(mailbox) == list(range(1000))
+
+
+@pytest.mark.parametrize('policy', [DROP_NEWEST, DROP_OLDEST, REJECT])
+def test_full_mailbox_refuses(policy):
+    mailbox = bounded(3, policy)
+
+    assert [mailbox.enqueue(event(i)) for i in range(5)] == [True, True, True, False, False]
+    assert mailbox.full()
+    assert mailbox.overflow_count == 2
+
+    # The mailbox keeps what fitted, and the overflow policy is up to its caller
+    assert drain(mailbox) == [0, 1, 2]
+
+
+def test_displace():
+    mailbox = bounded(3, DROP_OLDEST)
+
+    for i in range(3):
+        mailbox.enqueue(event(i))
+
+    assert not mailbox.enqueue(event(3))
+    assert mailbox.displace(event(3)).message == 0
+    assert drain(mailbox) == [1, 2, 3]
+
+    # The consumer may have made room meanwhile
+    assert mailbox.displace(event(4)) is None
+    assert drain(mailbox) == [4]
+
+
+def test_concurrent_drop_oldest():
+    mailbox = bounded(8, DROP_OLDEST)
+    evicted, consumed = [], []
+    done = threading.Event()
+
+    def produce():
+        for i in range(20000):
+            if not mailbox.enqueue(event(i)):
+                dropped = mailbox.displace(event(i))
+
+                if dropped is not None:
+                    evicted.append(dropped.message)
+
+        done.set()
+
+    def consume():
+        while not done.is_set() or len(mailbox) > 0:
+            queued = mailbox.dequeue()
+
+            if queued is not None:
+                consumed.append(queued.message)
+
+    threads = [threading.Thread(target=produce), threading.Thread(target=consume)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert consumed == sorted(consumed)
+    assert sorted(consumed + evicted) == list(range(20000))
+
+
+@pytest.mark.parametrize('policy', OVERFLOW_POLICIES)
+def test_poison_pill_is_exempt(policy):
+    mailbox = bounded(2, policy)
+
+    mailbox.enqueue(event(0))
+    mailbox.enqueue(event(1))
+
+    # A pill fits into a full mailbox, and does not take room from messages
+    assert mailbox.enqueue(event(PoisonPillMessage()))
+    assert mailbox.full()
+
+    assert mailbox.dequeue().message == 0
+    assert not mailbox.full()
+    assert mailbox.enqueue(event(2))
+
+    if policy == DROP_OLDEST:
+        # Eviction skips the pill, which keeps its place
+        assert mailbox.displace(event(3)).message == 1
+
+    messages = ['pill' if isinstance(message, PoisonPillMessage) else message for message in drain(mailbox)]
+
+    assert messages == (['pill', 2, 3] if policy == DROP_OLDEST else [1, 'pill', 2])
+
+
+def prioritized(capacity=None, policy=DROP_NEWEST) -> PriorityMailbox:
+    """
+    A priority mailbox of (priority, value) messages.
+    """
+    return PriorityMailbox(
+        'target',
+        config=MailboxConfig(capacity=capacity, overflow_policy=policy, priority=True),
+        priority=lambda message: message[0] if isinstance(message, tuple) else 0
+    )
+
+
+def test_priority_order():
+    mailbox = prioritized()
+
+    for message in [(2, 'a'), (0, 'b'), (1, 'c'), (0, 'd'), (2, 'e'), (1, 'f')]:
+        mailbox.enqueue(event(message))
+
+    # By priority, and in arrival order within a priority
+    assert [value for _, value in drain(mailbox)] == ['b', 'd', 'c', 'f', 'a', 'e']
+
+
+def test_control_messages_go_first():
+    mailbox = prioritized(capacity=2)
+
+    mailbox.enqueue(event((0, 'a')))
+    mailbox.enqueue(event((0, 'b')))
+
+    # Control messages never count against the capacity, poison pills keep their place
+    assert mailbox.enqueue(event(PoisonPillMessage()))
+    assert mailbox.enqueue(event(StartupMessage()))
+    assert not mailbox.enqueue(event((0, 'c')))
+
+    messages = drain(mailbox)
+
+    assert isinstance(messages[0], StartupMessage)
+    assert messages[1:3] == [(0, 'a'), (0, 'b')]
+    assert isinstance(messages[3], PoisonPillMessage)
+
+
+def test_priority_eviction():
+    mailbox = prioritized(capacity=3, policy=DROP_OLDEST)
+
+    for message in [(0, 'a'), (5, 'b'), (5, 'c')]:
+        mailbox.enqueue(event(message))
+
+    # The oldest message of the lowest priority class makes room
+    assert not mailbox.enqueue(event((1, 'd')))
+    assert mailbox.displace(event((1, 'd'))).message == (5, 'b')
+
+    assert not mailbox.enqueue(event((0, 'e')))
+    assert mailbox.displace(event((0, 'e'))).message == (5, 'c')
+
+    assert [value for _, value in drain(mailbox)] == ['a', 'e', 'd']
+
+
+def test_priority_eviction_skips_poison_pills():
+    mailbox = PriorityMailbox(
+        'target',
+        config=MailboxConfig(capacity=2, overflow_policy=DROP_OLDEST, priority=True),
+        priority=lambda message: 9 if isinstance(message, PoisonPillMessage) else message[0]
+    )
+
+    mailbox.enqueue(event(PoisonPillMessage()))
+    mailbox.enqueue(event((0, 'a')))
+    mailbox.enqueue(event((1, 'b')))
+
+    # The lowest priority class holds nothing but the pill, so the next one makes room
+    assert not mailbox.enqueue(event((0, 'c')))
+    assert mailbox.displace(event((0, 'c'))).message == (1, 'b')
+    assert len(mailbox) == 3
+
+    messages = drain(mailbox)
+
+    assert messages[:2] == [(0, 'a'), (0, 'c')]
+    assert isinstance(messages[2], PoisonPillMessage)
+
+    # With nothing but pills, nothing is evicted, and the size stays as it was
+    mailbox.enqueue(event(PoisonPillMessage()))
+
+    assert mailbox._evict() is None
+    assert len(mailbox) == 1
+
+
+class Slow(stardust.Actor):
+    """
+    Takes a while for every number, and answers 'received' with the numbers it has processed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(Slow, self).__init__(*args, **kwargs)
+        self.received = []
+
+    def receive(self, message, sender):
+        if isinstance(message, int):
+            time.sleep(0.002)
+            self.received.append(message)
+
+        elif message == 'received':
+            yield self.respond(self.received)
+
+
+class Producer(stardust.Actor):
+    """
+    Floods its target as soon as it starts, and answers 'rejected' with the messages sent back to it.
+    """
+
+    def __init__(self, *args, target=None, **kwargs):
+        super(Producer, self).__init__(*args, **kwargs)
+        self.target = target
+        self.rejected = []
+
+    def receive(self, message, sender):
+        if isinstance(message, stardust.StartupMessage):
+            for i in range(MESSAGES):
+                yield self.send(self.target, i)
+
+        elif isinstance(message, stardust.MailboxOverflowMessage):
+            self.rejected.append(message.message)
+
+        elif message == 'rejected':
+            yield self.respond(self.rejected)
+
+
+@pytest.mark.parametrize('policy', OVERFLOW_POLICIES)
+def test_overflow_policies(make_system, policy):
+    system = make_system(num_processes=2, batch_size=1, stats_interval=0.1)
+
+    slow = system.spawn(Slow, mailbox_config=stardust.MailboxConfig(capacity=10, overflow_policy=policy))
+    producer = system.spawn(Producer, target=slow)
+
+    def overflows():
+        return sum(stats.overflow_counts.get(policy, 0) for stats in system.stats().values())
+
+    def backlog():
+        return sum(stats.backlog for stats in system.stats().values())
+
+    # Asked while the mailbox is full, the actors would be subject to the overflow policy as well
+    assert wait_until(lambda: overflows() > 0 and backlog() == 0, timeout=30)
+
+    def accounted():
+        received = system.ask(slow, 'received', timeout=10).result()
+        rejected = system.ask(producer, 'rejected', timeout=10).result()
+        dropped = system.dead_letters().counts.get('mailbox_full', 0)
+
+        return received, rejected, dropped
+
+    def total(received, rejected, dropped):
+        return len(received) + len(rejected) + dropped
+
+    assert wait_until(lambda: total(*accounted()) == MESSAGES)
+
+    received, rejected, dropped = accounted()
+
+    # Whatever got through did so in order
+    assert received == sorted(received)
+
+    if policy == REJECT:
+        assert rejected and not dropped
+        assert sorted(received + rejected) == list(range(MESSAGES))
+
+    else:
+        assert dropped and not rejected
+
+        if policy == DROP_NEWEST:
+            assert received[:10] == list(range(10))
+
+        else:
+            assert received[-1] == MESSAGES - 1
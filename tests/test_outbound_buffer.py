@@ -0,0 +1,95 @@
+import time
+
+from stardust.actor.actor_ref import ActorRef
+from stardust.actor.executor.outbound_buffer import OutboundBuffer
+from stardust.actor.system_events import MessageEvent, MessageBatchEvent, RoutingUpdateEvent
+
+
+class Destination:
+    """
+    Queue of another process: records what is put into it.
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def put(self, event):
+        self.events.append(event)
+
+    def messages(self):
+        messages = []
+
+        for event in self.events:
+            messages.extend(event.events if isinstance(event, MessageBatchEvent) else [event])
+
+        return [message.message for message in messages if isinstance(message, MessageEvent)]
+
+
+def event(message) -> MessageEvent:
+    return MessageEvent(sender=ActorRef('sender'), target=ActorRef('target'), message=message)
+
+
+def test_flush_on_size():
+    outbound = OutboundBuffer(batch_size=3, linger=10.0)
+    queue = Destination()
+
+    for i in range(7):
+        outbound.put(queue, event(i))
+
+    # Two full batches have gone, the last message waits
+    assert [type(sent) for sent in queue.events] == [MessageBatchEvent, MessageBatchEvent]
+    assert queue.messages() == list(range(6))
+    assert len(outbound) == 1
+
+
+def test_flush_on_linger():
+    outbound = OutboundBuffer(batch_size=100, linger=0.05)
+    queue = Destination()
+
+    outbound.put(queue, event(0))
+    outbound.flush_expired()
+
+    assert queue.events == []
+
+    time.sleep(0.06)
+    outbound.put(queue, event(1))
+    outbound.flush_expired()
+
+    # The buffer is as old as its first message
+    assert [type(sent) for sent in queue.events] == [MessageBatchEvent]
+    assert queue.messages() == [0, 1]
+    assert len(outbound) == 0
+
+
+def test_flush_at_turn_end():
+    # Without linger, the executor's check after every turn flushes whatever the turn has sent
+    outbound = OutboundBuffer(batch_size=100, linger=0.0)
+    first, second = Destination(), Destination()
+
+    outbound.put(first, event(0))
+    outbound.put(second, event(1))
+    outbound.put(second, event(2))
+
+    assert first.events == [] and second.events == []
+
+    outbound.flush_expired()
+
+    # A single message is sent as it is
+    assert [type(sent) for sent in first.events] == [MessageEvent]
+    assert [type(sent) for sent in second.events] == [MessageBatchEvent]
+    assert first.messages() == [0] and second.messages() == [1, 2]
+
+
+def test_put_now_keeps_order():
+    outbound = OutboundBuffer(batch_size=100, linger=10.0)
+    queue = Destination()
+    update = RoutingUpdateEvent(version=1, routes={'target': 1})
+
+    outbound.put(queue, event(0))
+    outbound.put(queue, event(1))
+    outbound.put_now(queue, update)
+    outbound.put(queue, event(2))
+    outbound.flush_all()
+
+    assert queue.events[1] is update
+    assert queue.messages() == [0, 1, 2]
@@ -0,0 +1,102 @@
+import time
+from collections import Counter
+
+import pytest
+
+from stardust.actor.dead_letters import DeadLetterStats
+from stardust.actor.load_balancing_service import LoadBalancingService, LEAST_LOADED, POWER_OF_TWO, TYPE_SPREAD
+from stardust.actor.system_events import WorkerStatsEvent
+
+
+def balancer(strategy: str, backlogs: dict) -> LoadBalancingService:
+    """
+    :return: A balancer whose workers have reported the given backlogs.
+    """
+    service = LoadBalancingService(list(backlogs.keys()), strategy=strategy)
+
+    for process_idx, backlog in backlogs.items():
+        service.update(
+            WorkerStatsEvent(
+                process_idx=process_idx,
+                timestamp=time.monotonic(),
+                backlog=backlog,
+                ready=0,
+                messages=0,
+                cpu_time=0.0,
+                overflow_counts={},
+                dead_letters=DeadLetterStats()
+            )
+        )
+
+    return service
+
+
+def test_least_loaded_picks_the_lighter_worker():
+    service = balancer(LEAST_LOADED, {0: 50, 1: 5, 2: 20})
+
+    assert service.place('Worker') == 1
+
+
+def test_least_loaded_counts_actors_placed_since_the_report():
+    service = balancer(LEAST_LOADED, {0: 10, 1: 0})
+
+    # The lighter worker takes new actors until it is as loaded as the other one, then they take turns
+    placement = [service.place('Worker') for _ in range(14)]
+
+    assert placement[:10] == [1] * 10
+    assert Counter(placement[10:]) == {0: 2, 1: 2}
+
+
+def test_least_loaded_batch():
+    service = balancer(LEAST_LOADED, {0: 10, 1: 0})
+    placement = service.place_many('Worker', [None] * 14)
+
+    assert placement[:10] == [1] * 10
+    assert Counter(placement) == {0: 2, 1: 12}
+
+    # Processes that are already chosen are kept
+    service = balancer(LEAST_LOADED, {0: 0, 1: 10})
+
+    assert service.place_many('Worker', [1, None, 1]) == [1, 0, 1]
+
+
+@pytest.mark.parametrize('batch', [False, True])
+def test_power_of_two_avoids_the_heaviest_worker(batch):
+    service = balancer(POWER_OF_TWO, {0: 1000, 1: 0, 2: 0, 3: 0})
+
+    if batch:
+        placement = service.place_many('Worker', [None] * 100)
+
+    else:
+        placement = [service.place('Worker') for _ in range(100)]
+
+    # The heaviest worker loses every comparison
+    assert 0 not in placement
+    assert set(placement) == {1, 2, 3}
+
+
+def test_power_of_two_picks_the_lighter_of_two():
+    service = balancer(POWER_OF_TWO, {0: 30, 1: 0})
+
+    assert [service.place('Worker') for _ in range(30)] == [1] * 30
+
+
+def test_type_spread():
+    service = balancer(TYPE_SPREAD, {0: 0, 1: 0, 2: 0})
+
+    placement = [service.place('Worker') for _ in range(9)] + service.place_many('Other', [None] * 6)
+
+    assert Counter(placement[:9]) == {0: 3, 1: 3, 2: 3}
+    assert Counter(placement[9:]) == {0: 2, 1: 2, 2: 2}
+
+
+def test_removed_actors_are_not_counted():
+    service = balancer(TYPE_SPREAD, {0: 0, 1: 0})
+
+    for idx in range(4):
+        service.register(f'worker-{idx}', 'Worker', service.place('Worker'))
+
+    service.remove('worker-0')
+    service.remove('worker-2')
+
+    assert sum(stats.actors for stats in service.stats().values()) == 2
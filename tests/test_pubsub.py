@@ -0,0 +1,65 @@
+import os
+
+import stardust
+
+from .support import wait_until
+
+SUBSCRIBERS = 6
+
+
+class Subscriber(stardust.Actor):
+    """
+    Subscribes to 'news' as soon as it starts. Answers 'report' with (process, copy, payload) of every message
+    it has got, where the copy tells apart the objects that a process holds.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(Subscriber, self).__init__(*args, **kwargs)
+        self.received = []
+
+    def receive(self, message, sender):
+        if isinstance(message, stardust.StartupMessage):
+            yield self.subscribe('news')
+
+        elif isinstance(message, list):
+            self.received.append(message)
+
+        elif message == 'report':
+            yield self.respond([(os.getpid(), id(news), news[0]) for news in self.received])
+
+
+class Publisher(stardust.Actor):
+
+    def receive(self, message, sender):
+        if isinstance(message, list):
+            yield self.publish('news', message)
+
+
+def test_published_once_per_process(make_system):
+    system = make_system(num_processes=3)
+
+    subscribers = [system.spawn(Subscriber) for _ in range(SUBSCRIBERS)]
+
+    def processes():
+        return {system.actor_to_process.get(ref.address) for ref in subscribers}
+
+    assert wait_until(lambda: None not in processes())
+    assert len(processes()) > 1
+
+    # Processes announce their first subscriber of a topic
+    assert wait_until(lambda: set(system.topics.interested_processes('news')) == processes())
+
+    system.publish('news', ['from the system'])
+    system.send(system.spawn(Publisher), ['from an actor'])
+
+    def reports():
+        return [system.ask(ref, 'report', timeout=10).result() for ref in subscribers]
+
+    assert wait_until(lambda: all(len(report) == 2 for report in reports()))
+
+    for payload in ('from the system', 'from an actor'):
+        received = [(pid, copy) for report in reports() for pid, copy, news in report if news == payload]
+
+        # Every subscriber gets the message, and subscribers of a process share one copy of it
+        assert len(received) == SUBSCRIBERS
+        assert len(set(received)) == len(processes())
@@ -0,0 +1,89 @@
+import pickle
+
+import stardust
+from stardust.actor.actor_ref import ActorRef
+from stardust.actor.router import RouterRef, ROUND_ROBIN, CONSISTENT_HASH, SMALLEST_MAILBOX
+
+from .support import Counter, wait_until
+
+KEYS = 10000
+
+
+def routees(n: int, first: int = 0):
+    return [ActorRef(f'routee-{idx}') for idx in range(first, first + n)]
+
+
+def test_round_robin_cycles_in_order():
+    router = RouterRef('router', routees(3), strategy=ROUND_ROBIN)
+    addresses = [ref.address for ref in router.routees]
+    picked = [router.route(None).address for _ in range(9)]
+
+    # Starts from a random routee, then takes them in turn
+    start = addresses.index(picked[0])
+
+    assert picked == [addresses[(start + step) % 3] for step in range(9)]
+
+
+def test_consistent_hash_is_stable():
+    router = RouterRef('router', routees(4), strategy=CONSISTENT_HASH)
+    first = [router.route(key).address for key in range(KEYS)]
+
+    # Another ref of the same routees, e.g. one that has crossed processes, picks the same routees
+    copy = pickle.loads(pickle.dumps(router))
+
+    assert [router.route(key).address for key in range(KEYS)] == first
+    assert [copy.route(key).address for key in range(KEYS)] == first
+
+    # Every routee gets a share of the keys
+    assert set(first) == {ref.address for ref in router.routees}
+
+
+def test_consistent_hash_moves_few_keys():
+    n = 8
+
+    before = RouterRef('router', routees(n), strategy=CONSISTENT_HASH)
+    after = RouterRef('router', routees(n + 1), strategy=CONSISTENT_HASH)
+
+    moved = [key for key in range(KEYS) if before.route(key).address != after.route(key).address]
+
+    # About 1/(n + 1) of the keys move, all of them to the new routee
+    assert 0.5 / (n + 1) < len(moved) / KEYS < 2.0 / (n + 1)
+    assert {after.route(key).address for key in moved} == {f'routee-{n}'}
+
+
+def test_consistent_hash_key():
+    router = RouterRef('router', routees(4), strategy=CONSISTENT_HASH, key=len)
+
+    assert router.route('ab').address == router.route('cd').address
+
+
+def test_smallest_mailbox_picks_the_shortest_backlog():
+    router = RouterRef('router', routees(4), strategy=SMALLEST_MAILBOX)
+    sizes = {'routee-0': 5, 'routee-1': 2, 'routee-2': None, 'routee-3': 7}
+
+    # Routees of other processes (unknown sizes) are passed over, whatever routee the rotation starts from
+    assert {router.route(None, sizes.get).address for _ in range(8)} == {'routee-1'}
+
+    # Ties are spread
+    sizes = {'routee-0': 1, 'routee-1': 1, 'routee-2': 1, 'routee-3': 1}
+    assert {router.route(None, sizes.get).address for _ in range(8)} == set(sizes)
+
+    # With no size known, routees are taken in turn
+    assert {router.route(None, lambda address: None).address for _ in range(4)} == set(sizes)
+
+
+def test_router_shares_messages(make_system):
+    system = make_system(num_processes=2)
+    router = system.spawn_router(Counter, 4)
+
+    for _ in range(40):
+        system.send(router, 'inc')
+
+    def counts():
+        return [system.ask(ref, 'count', timeout=10).result() for ref in router.routees]
+
+    assert wait_until(lambda: sum(counts()) == 40)
+    assert counts() == [10] * 4
+
+    # The routees run in both processes
+    assert wait_until(lambda: len({system.actor_to_process.get(ref.address) for ref in router.routees}) == 2)
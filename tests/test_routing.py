@@ -0,0 +1,54 @@
+import time
+
+import stardust
+
+from .support import Sequencer, wait_until
+
+MESSAGES = 600
+CHUNK = 20
+STREAMERS = 6
+
+
+class Streamer(stardust.Actor):
+    """
+    Spawns a sequencer and streams numbered messages to it right away, before its executor has learned where
+    the sequencer is, a chunk per turn. Answers 'target' with the sequencer.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(Streamer, self).__init__(*args, **kwargs)
+        self.target = None
+        self.sent = 0
+
+    def receive(self, message, sender):
+        if isinstance(message, stardust.StartupMessage):
+            self.target = yield self.spawn(Sequencer)
+            yield self.send(self.ref, 'next')
+
+        elif message == 'next':
+            for _ in range(CHUNK):
+                yield self.send(self.target, (0, self.sent))
+                self.sent += 1
+
+            # Spreads the stream over the time it takes the route to arrive
+            if self.sent < MESSAGES:
+                time.sleep(0.001)
+                yield self.send(self.ref, 'next')
+
+        elif message == 'target':
+            yield self.respond(self.target)
+
+
+def test_order_across_a_route_update(make_system):
+    system = make_system(num_processes=2)
+
+    streamers = [system.spawn(Streamer) for _ in range(STREAMERS)]
+    targets = [system.ask(ref, 'target', timeout=10).result() for ref in streamers]
+
+    def reports():
+        return [system.ask(ref, 'report', timeout=10).result() for ref in targets]
+
+    assert wait_until(lambda: all(received == MESSAGES for received, _, _ in reports()), timeout=30)
+
+    # Messages relayed through the actor system are not overtaken by ones sent directly once the route is known
+    assert all(disorders == 0 for _, disorders, _ in reports())
@@ -0,0 +1,138 @@
+import os
+import pickle
+import uuid
+
+import pytest
+
+from stardust.actor.actor_ref import ActorRef
+from stardust.actor.codec import BinaryCodec, PICKLED_FRAME
+from stardust.actor.shared_buffers import (
+    SHARED_MEMORY_SUPPORTED, aligned, segment_size, write_segment, read_segment, release_segments
+)
+from stardust.actor.system_events import MessageEvent
+
+from .support import Echo
+
+pytestmark = pytest.mark.skipif(
+    not SHARED_MEMORY_SUPPORTED or not os.path.isdir('/dev/shm'),
+    reason='needs POSIX shared memory visible as files'
+)
+
+THRESHOLD = 1024
+
+
+def segments(prefix: str) -> list:
+    return [name for name in os.listdir('/dev/shm') if name.startswith(prefix)]
+
+
+@pytest.fixture
+def prefix():
+    """
+    A prefix of its own for every test, so that segments of other tests or processes are not counted.
+    """
+    prefix = f'sdtest{uuid.uuid4().hex[:8]}'
+
+    yield prefix
+
+    release_segments(prefix)
+
+
+def round_trip(prefix: str, payload):
+    writer, reader = BinaryCodec(THRESHOLD, prefix), BinaryCodec()
+
+    frame = writer.encode(MessageEvent(sender=ActorRef('a'), target=ActorRef('b'), message=payload))
+
+    assert len(frame) < THRESHOLD, 'the payload is not copied into the frame'
+    assert len(segments(prefix)) == 1
+
+    message = reader.decode(frame).message
+
+    # The reader unlinks the segment as soon as it has mapped it
+    assert segments(prefix) == []
+
+    return message
+
+
+def test_bytes(prefix):
+    payload = os.urandom(64 * 1024)
+
+    assert round_trip(prefix, payload) == payload
+
+
+def test_out_of_band_buffers(prefix):
+    payload = bytearray(os.urandom(64 * 1024))
+
+    assert bytes(round_trip(prefix, pickle.PickleBuffer(payload))) == payload
+
+
+def test_numpy_arrays(prefix):
+    numpy = pytest.importorskip('numpy')
+
+    arrays = [numpy.arange(10000, dtype=numpy.float64), numpy.ones((50, 30), dtype=numpy.int32)]
+    received = round_trip(prefix, arrays)
+
+    for array, copy in zip(arrays, received):
+        assert copy.dtype == array.dtype
+        assert numpy.array_equal(copy, array)
+
+
+def test_small_payloads_stay_in_the_frame(prefix):
+    writer, reader = BinaryCodec(THRESHOLD, prefix), BinaryCodec()
+
+    for payload in (os.urandom(THRESHOLD - 1), pickle.PickleBuffer(bytearray(THRESHOLD - 1))):
+        frame = writer.encode(MessageEvent(sender=ActorRef('a'), target=ActorRef('b'), message=payload))
+
+        assert frame[0] != PICKLED_FRAME
+        assert len(frame) >= THRESHOLD - 1
+        assert segments(prefix) == []
+
+        reader.decode(frame)
+
+
+def test_segments_and_their_buffers():
+    name = f'sdtest{uuid.uuid4().hex[:8]}'
+    buffers = [memoryview(os.urandom(size)) for size in (1, 100, 64, 1000)]
+
+    write_segment(name, buffers)
+
+    segment = read_segment(name, segment_size([buffer.nbytes for buffer in buffers]))
+    offset = 0
+
+    for buffer in buffers:
+        assert segment[offset:offset + buffer.nbytes] == buffer
+        offset += aligned(buffer.nbytes)
+
+    assert not os.path.exists(f'/dev/shm/{name}')
+
+    # Reads and writes of the mapped segment outlive its name
+    segment[0] = 255
+    assert segment[0] == 255
+
+    segment.release()
+
+
+def test_release_unread_segments(prefix):
+    writer = BinaryCodec(THRESHOLD, prefix)
+
+    for _ in range(3):
+        writer.encode(MessageEvent(sender=ActorRef('a'), target=ActorRef('b'), message=os.urandom(THRESHOLD)))
+
+    assert len(segments(prefix)) == 3
+
+    release_segments(prefix)
+
+    assert segments(prefix) == []
+
+
+def test_system_leaves_no_segments(make_system):
+    system = make_system(num_processes=2, shared_memory_threshold=THRESHOLD)
+
+    refs = system.spawn_many(Echo, [()] * 4)
+    payload = os.urandom(256 * 1024)
+
+    for ref in refs:
+        assert system.ask(ref, ('echo', payload), timeout=10).result() == payload
+
+    system.stop()
+
+    assert segments(system.segment_prefix) == []
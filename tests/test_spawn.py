@@ -0,0 +1,110 @@
+import pytest
+
+import stardust
+
+from .support import Counter, wait_until
+
+ACTORS = 40
+
+
+class Numbered(stardust.Actor):
+    """
+    Answers 'idx' with its number. Fails to start if asked to.
+    """
+
+    def __init__(self, *args, idx: int = 0, fail: bool = False, **kwargs):
+        super(Numbered, self).__init__(*args, **kwargs)
+
+        if fail:
+            raise ValueError(f'Actor {idx} does not start.')
+
+        self.idx = idx
+
+    def receive(self, message, sender):
+        if message == 'idx':
+            yield self.respond(self.idx)
+
+
+class Spawner(stardust.Actor):
+    """
+    Answers ('spawn_many', kwargs_list) with refs of the actors it has spawned.
+    """
+
+    def receive(self, message, sender):
+        if isinstance(message, tuple) and message[0] == 'spawn_many':
+            refs = yield self.spawn_many(Numbered, [()] * len(message[1]), message[1])
+            yield self.respond(refs)
+
+
+def failing(idx: int) -> bool:
+    return idx % 10 == 3
+
+
+@pytest.mark.parametrize('addressing', ['path', 'numeric'])
+@pytest.mark.parametrize('spawner', ['system', 'actor'])
+def test_spawn_many(make_system, addressing, spawner):
+    # Batches of a few actors, so that the actors are shipped in several of them
+    system = make_system(num_processes=2, addressing=addressing, spawn_batch_size=7)
+    kwargs_list = [dict(idx=idx, fail=failing(idx)) for idx in range(ACTORS)]
+
+    if spawner == 'system':
+        refs = system.spawn_many(Numbered, [()] * ACTORS, kwargs_list)
+
+    else:
+        refs = system.ask(system.spawn(Spawner), ('spawn_many', kwargs_list), timeout=10).result()
+
+    assert len(refs) == ACTORS
+    assert len({ref.address for ref in refs}) == ACTORS
+
+    # Refs come in the order of their arguments
+    for idx, ref in enumerate(refs):
+        if not failing(idx):
+            assert system.ask(ref, 'idx', timeout=10).result() == idx
+
+    # An actor that fails to start does not stop others of its batch, and is not routed: messages to it are dropped
+    failed = [ref for idx, ref in enumerate(refs) if failing(idx)]
+
+    for ref in failed:
+        system.send(ref, 'idx')
+
+    assert wait_until(lambda: system.dead_letters().counts.get('killed', 0) == len(failed))
+
+
+class Parent(stardust.Actor):
+    """
+    Spawns a local counter as soon as it starts, and counts up on it right away.
+    Answers 'child' with the counter.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(Parent, self).__init__(*args, **kwargs)
+        self.child = None
+
+    def receive(self, message, sender):
+        if isinstance(message, stardust.StartupMessage):
+            self.child = yield self.spawn(Counter, local=True)
+
+            for _ in range(5):
+                yield self.send(self.child, 'inc')
+
+        elif message == 'child':
+            yield self.respond(self.child)
+
+
+@pytest.mark.parametrize('addressing', ['path', 'numeric'])
+def test_local_spawn(make_system, addressing):
+    system = make_system(num_processes=4, addressing=addressing)
+
+    parents = [system.spawn(Parent) for _ in range(8)]
+    children = [system.ask(ref, 'child', timeout=10).result() for ref in parents]
+
+    # Messages sent before the child was routed have reached it, and other processes reach it once it is
+    for child in children:
+        assert system.ask(child, 'count', timeout=10).result() == 5
+
+    def process(ref):
+        return system.actor_to_process.get(ref.address)
+
+    # Every child runs on its parent's worker
+    assert wait_until(lambda: all(process(child) is not None for child in children))
+    assert all(process(child) == process(parent) for parent, child in zip(parents, children))
@@ -0,0 +1,47 @@
+import stardust
+
+from .support import Sequencer, wait_until
+
+MESSAGES = 300
+PRODUCERS = 4
+
+
+class Producer(stardust.Actor):
+    """
+    Sends its sequence of messages to every target as soon as it starts.
+    """
+
+    def __init__(self, *args, idx: int = 0, targets=(), **kwargs):
+        super(Producer, self).__init__(*args, **kwargs)
+        self.idx = idx
+        self.targets = targets
+
+    def receive(self, message, sender):
+        if isinstance(message, stardust.StartupMessage):
+            for seq in range(MESSAGES):
+                for target in self.targets:
+                    yield self.send(target, (self.idx, seq))
+
+
+def test_stolen_actors_keep_their_messages(make_system):
+    system = make_system(num_processes=4, work_stealing=True, steal_threshold=1, steal_interval=0.01)
+
+    # Every sequencer starts in the process of the first one, so the others have nothing to do but steal
+    first = system.spawn(Sequencer, work=0.0002)
+    assert wait_until(lambda: system.actor_to_process.get(first.address) is not None)
+
+    sequencers = [first] + [system.spawn(Sequencer, near=first, work=0.0002) for _ in range(11)]
+    hot = system.actor_to_process.get(first.address)
+
+    assert wait_until(lambda: {system.actor_to_process.get(ref.address) for ref in sequencers} == {hot})
+
+    for idx in range(PRODUCERS):
+        system.spawn(Producer, idx=idx, targets=sequencers)
+
+    def reports():
+        return [system.ask(ref, 'report', timeout=10).result() for ref in sequencers]
+
+    assert wait_until(lambda: all(received == MESSAGES * PRODUCERS for received, _, _ in reports()), timeout=60)
+
+    assert all(disorders == 0 for _, disorders, _ in reports())
+    assert any(pids > 1 for _, _, pids in reports()), 'some actors were stolen'